@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Batched VM benchmark: one compiled program run over many inputs, once with
+the NumPy lane VM and once with a loop of scalar VMs. Reports lanes/s for
+both and the speedup. Inputs vary per lane, so the lanes diverge.
+
+Usage:
+    python benchmarks/bench_batch.py [--lanes 1000] [--n 12]
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_calls import compile_source
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_batch import CMaBatchProcessor
+
+# The input n is passed as the argument of f; main only makes the program complete
+PROGRAMS = {
+    "fib": """
+int f(int n) {
+    if (n <= 1) {
+        return n;
+    }
+    return f(n - 1) + f(n - 2);
+}
+int main() { return f(10); }
+""",
+    "collatz": """
+int f(int n) {
+    int steps = 0;
+    while (n != 1) {
+        if (n % 2 == 0) {
+            n = n / 2;
+        } else {
+            n = 3 * n + 1;
+        }
+        steps = steps + 1;
+    }
+    return steps;
+}
+int main() { return f(27); }
+""",
+}
+
+
+def run_scalar(instructions, inputs):
+    results = []
+    for n in inputs:
+        vm = CMaInstructionProcessor()
+        vm.load_instructions(instructions + CMaProgramParser().parse_string(
+            f"driver:\nLOADC {n}\nCALL f\nHALT"))
+        vm.pc = vm.labels["driver"]
+        vm.run()
+        results.append(vm.return_value)
+    return results
+
+
+def bench(name, lanes, n, scalar_lanes):
+    instructions = CMaProgramParser().parse_string(compile_source(PROGRAMS[name]))
+    rng = np.random.default_rng(0)
+    inputs = rng.integers(1, n + 1, size=lanes)
+
+    vm = CMaBatchProcessor()
+    vm.load_instructions(instructions)
+    start = time.perf_counter()
+    batched = vm.run(entry="f", args=inputs)
+    batch_time = time.perf_counter() - start
+
+    sample = inputs[:scalar_lanes].tolist()
+    start = time.perf_counter()
+    expected = run_scalar(instructions, sample)
+    scalar_time = (time.perf_counter() - start) * lanes / len(sample)
+
+    assert batched[:len(sample)].tolist() == expected, "batched and scalar results differ"
+    print(f"{name}: lanes={lanes} n<={n} steps={vm.steps} "
+          f"batched={lanes / batch_time:,.0f} lanes/s scalar={lanes / scalar_time:,.0f} lanes/s "
+          f"speedup={scalar_time / batch_time:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched CMa VM benchmark')
+    parser.add_argument('--lanes', type=int, default=1000, help='Number of inputs run together')
+    parser.add_argument('--n', type=int, default=12, help='Largest input value for fib')
+    parser.add_argument('--scalar-lanes', type=int, default=100,
+                        help='Inputs run on the scalar VM (time is extrapolated)')
+    args = parser.parse_args()
+
+    bench("fib", args.lanes, args.n, args.scalar_lanes)
+    bench("collatz", args.lanes, 1000, args.scalar_lanes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Build mode benchmark: clean builds of a few thousand generated sources with
+1..N worker processes, plus a no-op rebuild (everything up to date) and a
+rebuild after touching every file (hash check, nothing recompiled).
+
+Usage:
+    python benchmarks/bench_build.py [--files 3000] [--jobs 1,2,4]
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.build import Builder
+
+SOURCE = """int work{index}(int n) {{
+    int i;
+    int r = {index};
+    for (i = 0; i < n; i = i + 1) {{
+        if (i % 3 == 0) {{ r = r + i * 2; }} else {{ r = r - 1; }}
+    }}
+    return r;
+}}
+int main() {{ return work{index}({index} % 17); }}
+"""
+
+
+def default_jobs():
+    jobs = [1]
+    while jobs[-1] * 2 <= os.cpu_count():
+        jobs.append(jobs[-1] * 2)
+    if jobs[-1] != os.cpu_count():
+        jobs.append(os.cpu_count())
+    return ','.join(map(str, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel incremental build benchmark')
+    parser.add_argument('--files', type=int, default=3000, help='Generated source files')
+    parser.add_argument('--jobs', default=default_jobs(), help='Comma-separated worker counts')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_build_')
+    try:
+        src = os.path.join(root, 'src')
+        for index in range(args.files):
+            directory = os.path.join(src, f"d{index % 10}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"file{index}.c"), 'w') as f:
+                f.write(SOURCE.format(index=index))
+        manifest = os.path.join(root, 'manifest.json')
+
+        base = None
+        for jobs in [int(j) for j in args.jobs.split(',')]:
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            summary = Builder(jobs=jobs, manifest=manifest).build([src])
+            assert summary['totals']['compiled'] == args.files
+            base = base or summary['elapsed']
+            print(f"clean build, {jobs} jobs: {summary['elapsed']:.2f}s "
+                  f"({args.files / summary['elapsed']:.0f} files/s, speedup {base / summary['elapsed']:.2f}x)")
+
+        summary = Builder(manifest=manifest).build([src])
+        assert summary['totals']['up-to-date'] == args.files
+        print(f"no-op rebuild: {summary['elapsed']:.2f}s")
+
+        for directory, _, files in os.walk(src):
+            for name in files:
+                os.utime(os.path.join(directory, name))
+        summary = Builder(manifest=manifest).build([src])
+        assert summary['totals']['up-to-date'] == args.files
+        print(f"rebuild after touching every file: {summary['elapsed']:.2f}s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bytecode vs text benchmark: file size and load time of a synthetic CMA
+program with a million instructions, as .cma text (CMaProgramParser) and as
+.cmab bytecode (mmap via src.bytecode.load).
+
+Usage:
+    python benchmarks/bench_bytecode.py [--instructions 1000000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import bytecode
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+
+def make_text(count, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    label = 0
+    for i in range(count):
+        if i % 50 == 0:
+            lines.append(f"block_{label}:")
+            label += 1
+        choice = rng.random()
+        if choice < 0.4:
+            lines.append(f"LOADC {rng.randint(-1000, 100000)}    // Push constant")
+        elif choice < 0.6:
+            lines.append(f"LOADR {rng.randint(0, 15)}    // Load variable")
+        elif choice < 0.7:
+            lines.append(f"STORER {rng.randint(0, 15)}")
+        elif choice < 0.75:
+            lines.append(f"JUMPZ block_{rng.randint(0, count // 50)}")
+        else:
+            lines.append(rng.choice(["ADD", "SUB", "MUL", "EQ", "NOT    // Logical NOT"]))
+    return "\n".join(lines) + "\n"
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytecode vs text load benchmark')
+    parser.add_argument('--instructions', type=int, default=1000000)
+    args = parser.parse_args()
+
+    text = make_text(args.instructions)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "program.cma")
+        bytecode_path = os.path.join(tmp, "program.cmab")
+        with open(text_path, "w") as f:
+            f.write(text)
+        data, assemble_time = timed(lambda: bytecode.assemble_text(text))
+        bytecode.write(bytecode_path, data)
+
+        _, text_time = timed(lambda: CMaProgramParser().parse_file(text_path))
+        program, mmap_time = timed(lambda: bytecode.load(bytecode_path))
+
+        def materialize():
+            vm = CMaInstructionProcessor()
+            vm.load_bytecode(program)
+            return vm
+        _, vm_time = timed(materialize)
+        program.close()
+
+        print(f"instructions={args.instructions:,} assemble={assemble_time:.3f}s")
+        print(f"text:     size={os.path.getsize(text_path):>12,} B  parse={text_time:.3f}s")
+        print(f"bytecode: size={os.path.getsize(bytecode_path):>12,} B  mmap load={mmap_time * 1000:.2f}ms  "
+              f"VM materialize={vm_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compilation cache benchmark: builds a tree of generated source files through
+compile_file three times against a fresh cache directory: cold (every file
+compiled), warm (nothing changed) and after editing a fraction of the files.
+Reports wall time, hit rate and the compile time saved by hits.
+
+Usage:
+    python benchmarks/bench_cache.py [--files 3000] [--edited 0.05]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from compiler import compile_file
+from src.cache import CompileCache
+
+
+def make_source(index, edit=0):
+    return f"""int helper{index}(int n) {{
+    int i;
+    int r = {index % 97 + edit};
+    for (i = 0; i < n; i = i + 1) {{
+        if (i % 3 == 0) {{ r = r + i * {index % 13}; }} else {{ r = r - 1; }}
+    }}
+    return r;
+}}
+int main() {{
+    return helper{index}({index % 50 + 1});
+}}
+"""
+
+
+def build(paths, cache):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in paths:
+            if not compile_file(path, cache=cache):
+                raise RuntimeError(f"Compilation failed: {path}")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CMa compilation cache benchmark')
+    parser.add_argument('--files', type=int, default=3000, help='Number of generated source files')
+    parser.add_argument('--edited', type=float, default=0.05, help='Fraction of files edited before the last build')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_cache_')
+    try:
+        paths = []
+        for index in range(args.files):
+            path = os.path.join(root, f"file{index}.c")
+            with open(path, 'w') as f:
+                f.write(make_source(index))
+            paths.append(path)
+
+        step = max(1, round(1 / args.edited)) if args.edited else None
+        for name in ('cold', 'warm', 'edited'):
+            if name == 'edited' and step:
+                for index in range(0, args.files, step):
+                    with open(paths[index], 'w') as f:
+                        f.write(make_source(index, edit=1))
+            cache = CompileCache(os.path.join(root, 'cache'))
+            elapsed = build(paths, cache)
+            stats = cache.stats()
+            print(f"{name}: {elapsed:.2f}s for {args.files} files, hit rate {stats['hit_rate']:.1%}, "
+                  f"compile time saved {stats['saved_seconds']:.2f}s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Call-heavy VM benchmarks: recursive programs compiled with the full pipeline
+and executed on the Python CMa VM. Reports calls/s, instructions/s and the
+frame memory high-water mark.
+
+Usage:
+    python benchmarks/bench_calls.py [--fib 25] [--repeat 1]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+PROGRAMS = {
+    # name: (source template, number of calls as a function of n)
+    "fib": ("""
+int fib(int n) {
+    if (n <= 1) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+int main() { return fib(%d); }
+""", lambda n: 2 * _fib(n + 1) - 1),
+    "sum_rec": ("""
+int sum(int n) {
+    if (n == 0) {
+        return 0;
+    }
+    return n + sum(n - 1);
+}
+int main() { return sum(%d); }
+""", lambda n: n + 1),
+    "leaf_calls": ("""
+int add(int a, int b) {
+    return a + b;
+}
+int main() {
+    int i;
+    int r = 0;
+    for (i = 0; i < %d; i = i + 1) {
+        r = add(r, 1);
+    }
+    return r;
+}
+""", lambda n: n),
+}
+
+
+def _fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def compile_source(source):
+    ast = CParser().parse(source)
+    errors = SemanticAnalyzer().analyze(ast)
+    if errors:
+        raise Exception("Semantic errors:\n" + "\n".join(errors))
+    return CodeGenerator().generate(ast)
+
+
+class CountingProcessor(CMaInstructionProcessor):
+    """Counts executed instructions without changing dispatch."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.steps = 0
+
+    def step(self):
+        self.steps += 1
+        super().step()
+
+
+def bench(name, n, repeat):
+    template, calls_for = PROGRAMS[name]
+    instructions = CMaProgramParser().parse_string(compile_source(template % n))
+    best = None
+    for _ in range(repeat):
+        vm = CountingProcessor()
+        vm.load_instructions(instructions)
+        start = time.perf_counter()
+        vm.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    calls = calls_for(n) + 1  # + main
+    print(f"{name}({n}): result={vm.return_value} calls={calls} steps={vm.steps} "
+          f"time={best:.3f}s calls/s={calls / best:,.0f} instr/s={vm.steps / best:,.0f} "
+          f"memory_cells={len(vm.memory)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Call-heavy CMa VM benchmarks')
+    parser.add_argument('--fib', type=int, default=25, help='Argument of fib(n)')
+    parser.add_argument('--depth', type=int, default=5000, help='Recursion depth of sum_rec')
+    parser.add_argument('--calls', type=int, default=100000, help='Loop iterations of leaf_calls')
+    parser.add_argument('--repeat', type=int, default=1, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    bench("fib", args.fib, args.repeat)
+    bench("sum_rec", args.depth, args.repeat)
+    bench("leaf_calls", args.calls, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
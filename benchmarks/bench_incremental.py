@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Incremental compilation benchmark: a generated file with thousands of
+functions is compiled once, then one function in the middle is edited and
+the file recompiled. Compares the full pipeline (parse, analyze, generate)
+with IncrementalCompiler for three kinds of edit: a body change, a body
+change that adds labels (later blocks are renumbered) and a signature
+change (callers are regenerated too).
+
+Usage:
+    python benchmarks/bench_incremental.py [--functions 5000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.incremental import IncrementalCompiler
+
+
+def make_function(index, variant=''):
+    call = f"    r = r + f{index - 1}(r, 1);\n" if index else ""
+    extra = "    if (r > 100) { r = r - 100; }\n" if variant == 'labels' else ""
+    param = "int b" if variant != 'signature' else "int b, int c"
+    constant = 7 if variant == 'body' else 3
+    return (f"int f{index}(int a, {param}) {{\n"
+            f"    int i;\n"
+            f"    int r = a;\n"
+            f"    for (i = 0; i < b; i = i + 1) {{ r = r + i * {constant}; }}\n"
+            f"{call}{extra}"
+            f"    return r;\n"
+            f"}}\n")
+
+
+def make_source(functions, edited=None, variant=''):
+    parts = []
+    for index in range(functions):
+        parts.append(make_function(index, variant if index == edited else ''))
+    if variant == 'signature' and edited is not None and edited + 1 < functions:
+        # Keep the caller valid for the new parameter list
+        parts[edited + 1] = parts[edited + 1].replace(f"f{edited}(r, 1)", f"f{edited}(r, 1, 2)")
+    parts.append(f"int main() {{ return f{functions - 1}(1, 2); }}\n")
+    return ''.join(parts)
+
+
+def full_compile(source):
+    ast = CParser().parse(source)
+    errors = SemanticAnalyzer().analyze(ast)
+    if errors:
+        raise Exception("Semantic errors:\n" + "\n".join(errors))
+    return CodeGenerator().generate(ast)
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental recompilation benchmark')
+    parser.add_argument('--functions', type=int, default=5000, help='Functions in the generated file')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    original = make_source(args.functions)
+    middle = args.functions // 2
+    compiler = IncrementalCompiler()
+    initial, _ = timed(lambda: compiler.compile(original), 1)
+    print(f"initial incremental compile: {initial:.2f}s")
+    for variant in ('body', 'labels', 'signature'):
+        edited = make_source(args.functions, middle, variant)
+        full, expected = timed(lambda: full_compile(edited), args.repeat)
+
+        def recompile():
+            compiler.compile(original)
+            start = time.perf_counter()
+            code = compiler.compile(edited)
+            return time.perf_counter() - start, code
+        latency, code = min(recompile() for _ in range(args.repeat))
+        assert code == expected
+        print(f"edit ({variant}): full {full * 1e3:.0f}ms, incremental {latency * 1e3:.1f}ms "
+              f"({full / latency:.0f}x), regenerated {compiler.stats['generated']} of "
+              f"{compiler.stats['functions']} functions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+CMA text loader throughput: lines/s of CMaProgramParser.parse_file on a
+multi-megabyte synthetic .cma file and on the cma_examples set.
+
+Usage:
+    python benchmarks/bench_loader.py [--instructions 500000] [--repeat 3]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.vm.cma_parser import CMaProgramParser
+from bench_bytecode import make_text
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def throughput(paths, repeat):
+    lines = 0
+    for path in paths:
+        with open(path) as f:
+            lines += sum(1 for _ in f)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            CMaProgramParser().parse_file(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return lines, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CMA text loader throughput')
+    parser.add_argument('--instructions', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "program.cma")
+        with open(path, "w") as f:
+            f.write(make_text(args.instructions))
+        lines, elapsed = throughput([path], args.repeat)
+        print(f"synthetic: {os.path.getsize(path) / 1e6:.1f} MB, {lines:,} lines, "
+              f"{elapsed:.3f}s, {lines / elapsed:,.0f} lines/s")
+
+    examples = sorted(glob.glob(os.path.join(ROOT, "cma_examples", "*.cma")))
+    lines, elapsed = throughput(examples * 200, args.repeat)
+    print(f"cma_examples x200: {lines:,} lines, {elapsed:.3f}s, {lines / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+VM memory benchmark: dense list memory against paged sparse memory.
+
+Sparse: a function with a huge local array that touches a few cells far
+apart. Dense: a loop that writes and then sums every cell of an array.
+Reports run time and peak Python allocation (tracemalloc) per model, and the
+resident pages of the paged memory.
+
+Usage:
+    python benchmarks/bench_memory.py [--cells 1000000] [--dense-cells 5000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_calls import compile_source
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+SPARSE = """
+int main() {{
+    int a[{cells}];
+    int i;
+    i = 0;
+    while (i < {cells}) {{
+        a[i] = i;
+        i = i + {stride};
+    }}
+    return a[{last}];
+}}
+"""
+
+DENSE = """
+int main() {{
+    int a[{cells}];
+    int i;
+    int sum;
+    i = 0;
+    while (i < {cells}) {{
+        a[i] = i;
+        i = i + 1;
+    }}
+    i = 0;
+    sum = 0;
+    while (i < {cells}) {{
+        sum = sum + a[i];
+        i = i + 1;
+    }}
+    return sum;
+}}
+"""
+
+
+def run(instructions, model):
+    vm = CMaInstructionProcessor(memory_model=model)
+    vm.load_instructions(instructions)
+    tracemalloc.start()
+    start = time.perf_counter()
+    vm.run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return vm, elapsed, peak
+
+
+def bench(name, source, repeat):
+    instructions = CMaProgramParser().parse_string(compile_source(source))
+    results = {}
+    for model in ('dense', 'paged'):
+        best = None
+        for _ in range(repeat):
+            vm, elapsed, peak = run(instructions, model)
+            if best is None or elapsed < best[1]:
+                best = (vm, elapsed, peak)
+        results[model] = best
+        vm, elapsed, peak = best
+        resident = ''
+        if model == 'paged':
+            resident = f" resident_pages={vm.memory.stats()['resident_pages']}"
+        print(f"{name} {model}: {elapsed * 1e3:.1f}ms peak={peak / 1e6:.2f}MB{resident}")
+    assert results['dense'][0].return_value == results['paged'][0].return_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CMa VM dense vs paged memory benchmark')
+    parser.add_argument('--cells', type=int, default=1_000_000, help='Array size of the sparse program')
+    parser.add_argument('--dense-cells', type=int, default=5_000, help='Array size of the dense program')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    stride = max(1, args.cells // 16)
+    bench('sparse', SPARSE.format(cells=args.cells, stride=stride, last=(args.cells - 1) // stride * stride), args.repeat)
+    bench('dense', DENSE.format(cells=args.dense_cells), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Process-pool benchmark: many short compiled programs run with
+src/vm/cma_pool.run_batch at increasing worker counts. Reports
+programs/s and the speedup and parallel efficiency over one worker.
+
+Usage:
+    python benchmarks/bench_pool.py [--programs 10000] [--workers 1,2,4,8]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_calls import compile_source
+from src.vm.cma_pool import run_batch
+
+# Compiled once; the marker constant is replaced to get distinct programs
+MARKER = 987654321
+TEMPLATE = """
+int main() {
+    int i;
+    int s = 0;
+    for (i = 0; i < %d; i = i + 1) {
+        s = s + i;
+    }
+    return s %% 256;
+}
+""" % MARKER
+
+
+def make_programs(count, iterations):
+    code = compile_source(TEMPLATE)
+    return [code.replace(str(MARKER), str(iterations + i % 7)) for i in range(count)]
+
+
+def bench(programs, workers):
+    start = time.perf_counter()
+    results = list(run_batch(programs, workers=workers))
+    elapsed = time.perf_counter() - start
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise Exception(f"{len(failed)} jobs failed, e.g. {failed[0]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process-pool CMa batch benchmark')
+    parser.add_argument('--programs', type=int, default=10000, help='Number of programs')
+    parser.add_argument('--iterations', type=int, default=20, help='Loop iterations per program')
+    parser.add_argument('--workers', default=None,
+                        help='Comma-separated worker counts (default: 1, 2, 4, ... up to all cores)')
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(',')]
+    else:
+        cores = os.cpu_count() or 1
+        counts = [1 << i for i in range(cores.bit_length()) if 1 << i <= cores]
+        if counts[-1] != cores:
+            counts.append(cores)
+
+    programs = make_programs(args.programs, args.iterations)
+    print(f"{len(programs)} programs, {os.cpu_count()} cores")
+    baseline = None
+    for workers in counts:
+        elapsed = bench(programs, workers)
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"workers={workers}: {elapsed:.2f}s {len(programs) / elapsed:,.0f} programs/s "
+              f"speedup={speedup:.2f}x efficiency={speedup / workers:.0%}")
+
+
+if __name__ == "__main__":
+    main()
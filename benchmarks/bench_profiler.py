@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Profiler overhead benchmark: the call-heavy programs of bench_calls run with
+and without CMaProfiler. Reports the time of both and the relative overhead.
+
+Usage:
+    python benchmarks/bench_profiler.py [--fib 20] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_calls import PROGRAMS, compile_source
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+
+def timed(instructions, profile, repeat):
+    best = None
+    for _ in range(repeat):
+        vm = CMaInstructionProcessor()
+        vm.load_instructions(instructions)
+        if profile:
+            vm.enable_profiling()
+        start = time.perf_counter()
+        vm.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, vm
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CMa profiler overhead benchmark')
+    parser.add_argument('--fib', type=int, default=20, help='Argument of fib(n)')
+    parser.add_argument('--calls', type=int, default=50000, help='Loop iterations of leaf_calls')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    for name, n in (("fib", args.fib), ("leaf_calls", args.calls)):
+        template, _ = PROGRAMS[name]
+        instructions = CMaProgramParser().parse_string(compile_source(template % n))
+        off, _ = timed(instructions, False, args.repeat)
+        on, vm = timed(instructions, True, args.repeat)
+        total = sum(vm.profiler.counts)
+        print(f"{name}({n}): {total} instructions, off={off:.3f}s on={on:.3f}s "
+              f"overhead={on / off - 1:.0%} ({(on - off) / total * 1e9:.0f}ns/instruction)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compile-and-run latency for small programs: the file-based path
+(compile_file writes a .cma, CMaProgramParser reads it back, the VM runs it)
+against run_string, which hands the code generator's instruction stream to
+the VM in memory. compile_file sets up its parser per call, as one CLI run
+does; run_string keeps one, so the difference is parser setup, formatting,
+disk I/O and re-parsing. Reports the median per program.
+
+Usage:
+    python benchmarks/bench_run.py [--repeat 50]
+"""
+
+import io
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from compiler import compile_file, run_string
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+
+def run_via_file(path, output):
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not compile_file(path, output):
+            raise RuntimeError(f"Compilation failed: {path}")
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_file(output), verify=True)
+    vm.run()
+    return vm.return_value
+
+
+def median_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-memory compile-and-run vs. the file-based path')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per program and path')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_run_')
+    try:
+        output = os.path.join(root, 'program.cma')
+        paths = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'tests', 'resources', '*.c')))
+        total_file = total_memory = 0.0
+        for path in paths:
+            with open(path) as f:
+                source = f.read()
+            if run_via_file(path, output) != run_string(source)[0]:  # Also warms both paths up
+                raise RuntimeError(f"Results differ: {path}")
+            via_file = median_time(lambda: run_via_file(path, output), args.repeat)
+            in_memory = median_time(lambda: run_string(source), args.repeat)
+            total_file += via_file
+            total_memory += in_memory
+            print(f"{os.path.basename(path)}: file {via_file * 1e3:.2f}ms, "
+                  f"in-memory {in_memory * 1e3:.2f}ms ({via_file / in_memory:.2f}x)")
+        print(f"total: file {total_file * 1e3:.2f}ms, in-memory {total_memory * 1e3:.2f}ms "
+              f"({total_file / total_memory:.2f}x)")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Scaling curves: runs every phase over geometrically growing generated
+programs and fits the empirical complexity exponent of its time and memory.
+
+Two axes are grown by --factor per step: the number of functions (each of
+--statements statements) and the number of statements in a single function.
+Input size n is the number of tokens. For every phase the slope of
+log(time) over log(n) is fitted by least squares and compared with the slope
+of n log n over the same sizes; a phase whose slope exceeds that by more
+than --tolerance is reported as superlinear. Memory is the tracemalloc peak
+of each phase (PassTimer), measured in a separate run.
+
+Exits with status 1 when a phase is reported, so it can gate a change.
+The default sizes run in a few minutes.
+
+Usage:
+    python benchmarks/bench_scaling.py [--steps 5] [--factor 2] [--start 16]
+                                       [--tolerance 0.2] [--json scaling.json]
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import argparse
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.generator import generate_program
+from benchmarks.bench_suite import best_of, run_vm
+from src.lexer import CLexer
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.verifier import StackVerifier
+from src.instrument import PassTimer
+
+PHASES = ('lex', 'parse', 'semantics', 'codegen', 'verify', 'vm')
+
+
+# A function's statements are far fewer tokens than whole functions, so
+# that axis starts this many times larger
+STATEMENTS_SCALE = 4
+
+
+def axis_params(axis, size, statements):
+    if axis == 'functions':
+        return dict(functions=size, statements=statements, depth=2, loop_count=2)
+    return dict(functions=1, statements=size * STATEMENTS_SCALE, depth=2, loop_count=2)
+
+
+def phase_functions(source, lexer, parser):
+    """Phase name → zero-argument callable; later phases use earlier results."""
+    state = {}
+
+    def parse():
+        state['ast'] = parser.parse(source)
+
+    def semantics():
+        with contextlib.redirect_stdout(io.StringIO()):  # The analyzer prints debug output
+            SemanticAnalyzer().analyze(state['ast'])
+
+    def codegen():
+        generator = CodeGenerator()
+        generator.generate(state['ast'])
+        state['lines'] = generator.code
+        state['program'] = generator.instructions()
+
+    return {
+        'lex': lambda: lexer.tokenize(source),
+        'parse': parse,
+        'semantics': semantics,
+        'codegen': codegen,
+        'verify': lambda: StackVerifier().verify_lines(state['lines']),
+        'vm': lambda: run_vm(state['program']),
+    }
+
+
+def measure(source, repeat):
+    """(tokens, phase → seconds, phase → peak bytes) for one program."""
+    lexer = CLexer()
+    lexer.build()
+    parser = CParser().build()
+    tokens = len(lexer.tokenize(source))
+
+    seconds = {}
+    for name, function in phase_functions(source, lexer, parser).items():
+        seconds[name] = best_of(repeat, function, min_time=0.1, max_runs=10)[0]
+
+    timer = PassTimer(memory=True)
+    try:
+        for name, function in phase_functions(source, lexer, parser).items():
+            with timer.phase(name):
+                function()
+    finally:
+        timer.close()
+    peaks = {name: entry['peak'] for name, entry in timer.phases.items()}
+    return tokens, seconds, peaks
+
+
+def fit_exponent(sizes, values):
+    """Least-squares slope of log(value) over log(size)."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-12)) for value in values]
+    mx = sum(xs) / len(xs)
+    my = sum(ys) / len(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+
+def nlogn_exponent(sizes):
+    """Slope that n log n itself shows over these sizes (slightly above 1)."""
+    return fit_exponent(sizes, [size * math.log(size) for size in sizes])
+
+
+def superlinear(sizes, values, tolerance):
+    """(exponent, True if it grows faster than n log n by more than tolerance)."""
+    exponent = fit_exponent(sizes, values)
+    return exponent, exponent > nlogn_exponent(sizes) + tolerance
+
+
+def run_axis(axis, args):
+    sizes = []
+    seconds = {name: [] for name in PHASES}
+    peaks = {name: [] for name in PHASES}
+    for step in range(args.steps):
+        size = args.start * args.factor ** step
+        source = generate_program(**axis_params(axis, size, args.statements))
+        tokens, phase_seconds, phase_peaks = measure(source, args.repeat)
+        sizes.append(tokens)
+        for name in PHASES:
+            seconds[name].append(phase_seconds[name])
+            peaks[name].append(phase_peaks[name])
+        print(f"{axis} x{size}: {tokens} tokens, "
+              + ", ".join(f"{name} {phase_seconds[name] * 1e3:.1f}ms" for name in PHASES))
+    return sizes, seconds, peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Empirical complexity of every compiler phase')
+    parser.add_argument('--steps', type=int, default=5, help='Sizes per axis')
+    parser.add_argument('--factor', type=int, default=2, help='Growth factor between sizes')
+    parser.add_argument('--start', type=int, default=16, help='Functions of the smallest input (statements: 4x as many)')
+    parser.add_argument('--statements', type=int, default=10, help='Statements per function on the functions axis')
+    parser.add_argument('--repeat', type=int, default=3, help='Minimum timed runs per phase and size')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed exponent above n log n')
+    parser.add_argument('--axis', nargs='+', choices=['functions', 'statements'], default=['functions', 'statements'])
+    parser.add_argument('--json', help='Write sizes, measurements and exponents as JSON')
+    args = parser.parse_args()
+
+    report = {}
+    flagged = []
+    for axis in args.axis:
+        sizes, seconds, peaks = run_axis(axis, args)
+        reference = nlogn_exponent(sizes)
+        report[axis] = {'tokens': sizes, 'nlogn_exponent': reference, 'phases': {}}
+        for name in PHASES:
+            time_exponent, time_flag = superlinear(sizes, seconds[name], args.tolerance)
+            memory_exponent, memory_flag = superlinear(sizes, peaks[name], args.tolerance)
+            report[axis]['phases'][name] = {
+                'seconds': seconds[name], 'peak_bytes': peaks[name],
+                'time_exponent': time_exponent, 'memory_exponent': memory_exponent,
+            }
+            verdict = []
+            if time_flag:
+                verdict.append('time')
+            if memory_flag:
+                verdict.append('memory')
+            if verdict:
+                flagged.append((axis, name, ' and '.join(verdict)))
+            print(f"{axis} {name}: time ~n^{time_exponent:.2f}, memory ~n^{memory_exponent:.2f} "
+                  f"(n log n ~n^{reference:.2f})" + (f"  SUPERLINEAR {' and '.join(verdict)}" if verdict else ""))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    for axis, name, what in flagged:
+        print(f"REPORT {name} grows faster than n log n in {what} along {axis}")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
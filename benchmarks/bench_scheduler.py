@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Scheduler benchmark: many VMs interleaved by src/vm/cma_scheduler with
+different quantum sizes, against running the same VMs one after the other
+with run(). Reports aggregate instructions/s and the scheduling overhead per
+quantum.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--vms 1000] [--n 200] [--quanta 10,100,1000]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_calls import compile_source
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_scheduler import VMScheduler
+
+TEMPLATE = """
+int main() {
+    int i;
+    int s = 0;
+    for (i = 0; i < %d; i = i + 1) {
+        s = s + i %% 7;
+    }
+    return s %% 256;
+}
+"""
+
+
+def make_vms(instructions, count):
+    vms = []
+    for _ in range(count):
+        vm = CMaInstructionProcessor()
+        vm.load_instructions(instructions)
+        vms.append(vm)
+    return vms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cooperative VM scheduler benchmark')
+    parser.add_argument('--vms', type=int, default=1000, help='Number of concurrent VMs')
+    parser.add_argument('--n', type=int, default=200, help='Loop iterations per program')
+    parser.add_argument('--quanta', default='10,100,1000', help='Comma-separated quantum sizes')
+    args = parser.parse_args()
+
+    instructions = CMaProgramParser().parse_string(compile_source(TEMPLATE % args.n))
+
+    vms = make_vms(instructions, args.vms)
+    start = time.perf_counter()
+    for vm in vms:
+        vm.run()
+    direct = time.perf_counter() - start
+    steps = make_vms(instructions, 1)[0]
+    while steps.resume(1 << 30):
+        pass
+    total = steps.executed * args.vms
+    print(f"{args.vms} VMs x {steps.executed} instructions")
+    print(f"sequential run(): {direct:.2f}s {total / direct:,.0f} instr/s")
+
+    for quantum in (int(q) for q in args.quanta.split(',')):
+        scheduler = VMScheduler(quantum=quantum)
+        for vm in make_vms(instructions, args.vms):
+            scheduler.spawn(vm)
+        start = time.perf_counter()
+        tasks = scheduler.run()
+        elapsed = time.perf_counter() - start
+        assert all(task.result == vms[0].return_value for task in tasks)
+        overhead = (elapsed - direct) / scheduler.switches
+        print(f"quantum={quantum}: {elapsed:.2f}s {total / elapsed:,.0f} instr/s "
+              f"quanta={scheduler.switches} overhead/quantum={overhead * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
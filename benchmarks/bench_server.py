@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compile server benchmark: per-file latency of cold `compiler.py` runs against
+the compile server (src/server.py) reached through the thin client CLI, a
+persistent client connection, and pipelined requests on one connection.
+
+Usage:
+    python benchmarks/bench_server.py [--files 20] [--workers 2]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from src.client import CompileClient
+
+SOURCE = """int f(int n) {{
+    int i;
+    int r = {seed};
+    for (i = 0; i < n; i = i + 1) {{
+        if (i % 2 == 0) {{ r = r + i; }} else {{ r = r - 1; }}
+    }}
+    return r;
+}}
+int main() {{ return f({seed}); }}
+"""
+
+
+def per_file(label, paths, run):
+    start = time.perf_counter()
+    for path in paths:
+        run(path)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed / len(paths) * 1e3:.1f}ms per file")
+    return elapsed / len(paths)
+
+
+def check(completed):
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stdout + completed.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile server latency benchmark')
+    parser.add_argument('--files', type=int, default=20, help='Files per measurement')
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_server_')
+    socket_path = os.path.join(root, 'server.sock')
+    server = subprocess.Popen([sys.executable, '-m', 'src.server', '--socket', socket_path,
+                               '--workers', str(args.workers)], cwd=ROOT, stderr=subprocess.DEVNULL)
+    try:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(root, f"prog{i}.c")
+            with open(path, 'w') as f:
+                f.write(SOURCE.format(seed=i))
+            paths.append(path)
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+
+        cold = per_file("cold compiler.py", paths, lambda path: check(subprocess.run(
+            [sys.executable, 'compiler.py', path, '--no-cache'], cwd=ROOT, capture_output=True, text=True)))
+        cli = per_file("client CLI -> server", paths, lambda path: check(subprocess.run(
+            [sys.executable, '-m', 'src.client', path, '--socket', socket_path],
+            cwd=ROOT, capture_output=True, text=True)))
+        with CompileClient(socket_path) as client:
+            client.compile(input=paths[0])  # Warm up every connection path once
+            warm = per_file("persistent client", paths,
+                            lambda path: client.compile(input=path)['ok'] or sys.exit(f"failed: {path}"))
+            start = time.perf_counter()
+            responses = client.compile_many([{'input': path} for path in paths])
+            pipelined = (time.perf_counter() - start) / len(paths)
+            assert all(response['ok'] for response in responses)
+            print(f"pipelined requests: {pipelined * 1e3:.1f}ms per file")
+        print(f"speedup vs cold: client CLI {cold / cli:.1f}x, persistent {cold / warm:.0f}x, "
+              f"pipelined {cold / pipelined:.0f}x")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
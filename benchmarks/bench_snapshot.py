@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Snapshot benchmark: size and save/restore latency of VM snapshots with a
+1M-cell memory, for a sparse memory (only the first cells used), a dense
+one (every cell nonzero) and with and without compression.
+
+Usage:
+    python benchmarks/bench_snapshot.py [--cells 1000000] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_snapshot import capture
+
+PROGRAM = "LOADA 0\nLOADC 1\nADD\nHALT"
+
+
+def make_vm(cells, dense):
+    vm = CMaInstructionProcessor(memory_size=cells)
+    vm.load_instructions(CMaProgramParser().parse_string(PROGRAM))
+    rng = random.Random(0)
+    used = cells if dense else 1000
+    vm.memory[:used] = [rng.randrange(1 << 20) for _ in range(used)]
+    vm.stack = list(range(16))
+    return vm
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CMa VM snapshot benchmark')
+    parser.add_argument('--cells', type=int, default=1_000_000, help='Memory cells')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    for dense in (False, True):
+        vm = make_vm(args.cells, dense)
+        pause, _ = best_of(args.repeat, lambda: capture(vm))
+        for compress in (False, True):
+            save, data = best_of(args.repeat, lambda: vm.snapshot(compress=compress))
+            target = make_vm(16, False)
+            restore, _ = best_of(args.repeat, lambda: target.restore(data))
+            assert target.memory == vm.memory
+            print(f"{'dense' if dense else 'sparse'} compress={compress}: size={len(data) / 1e6:.2f}MB "
+                  f"save={save * 1e3:.1f}ms restore={restore * 1e3:.1f}ms "
+                  f"(VM pause for a background checkpoint: {pause * 1e3:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
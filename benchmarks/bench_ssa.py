@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+SSA middle end on large single functions: times construction, the dominator
+tree, common subexpression elimination, dead code elimination and lowering
+back to CMa code over a geometrically growing number of statements in one
+function, and fits the complexity exponent of each like bench_scaling.py
+does, so the IR itself does not become the bottleneck of -O2.
+
+Input size n is the number of SSA values after construction. The passes
+change the module, so they run on a fresh one each time.
+
+Exits with status 1 when a phase grows faster than n log n by more than
+--tolerance.
+
+Usage:
+    python benchmarks/bench_ssa.py [--steps 5] [--factor 2] [--start 64]
+                                   [--tolerance 0.2] [--json ssa.json]
+"""
+
+import io
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.generator import generate_program
+from benchmarks.bench_suite import best_of
+from benchmarks.bench_scaling import nlogn_exponent, superlinear
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src import ssa
+
+PHASES = ('build', 'dominators', 'cse', 'dce', 'lower')
+
+
+def fresh_best_of(repeat, function, ast):
+    """Shortest time of `function(module)` over `repeat` freshly built modules."""
+    best = float('inf')
+    for _ in range(repeat):
+        module = ssa.build(ast)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(module)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def measure(source, repeat):
+    """(SSA values, phase → seconds) for one program."""
+    ast = CParser().build().parse(source)
+    with contextlib.redirect_stdout(io.StringIO()):  # The analyzer prints debug output
+        SemanticAnalyzer().analyze(ast)
+    module = ssa.build(ast)
+    values = sum(1 for function in module.functions for _ in function.values())
+
+    seconds = {
+        'build': best_of(repeat, lambda: ssa.build(ast), min_time=0.1, max_runs=10)[0],
+        'dominators': best_of(repeat, lambda: [ssa.DominatorTree(function) for function in module.functions],
+                              min_time=0.1, max_runs=10)[0],
+        'cse': fresh_best_of(repeat, lambda fresh: [ssa.eliminate_common_subexpressions(function)
+                                                    for function in fresh.functions], ast),
+        'dce': fresh_best_of(repeat, lambda fresh: [ssa.eliminate_dead_code(function) for function in fresh.functions], ast),
+    }
+    for function in module.functions:
+        ssa.eliminate_common_subexpressions(function)
+        ssa.eliminate_dead_code(function)
+    seconds['lower'] = best_of(repeat, lambda: ssa.lower(module), min_time=0.1, max_runs=10)[0]
+    return values, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of the SSA phases on large single functions')
+    parser.add_argument('--steps', type=int, default=5, help='Sizes')
+    parser.add_argument('--factor', type=int, default=2, help='Growth factor between sizes')
+    parser.add_argument('--start', type=int, default=64, help='Statements of the smallest function')
+    parser.add_argument('--repeat', type=int, default=3, help='Minimum timed runs per phase and size')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed exponent above n log n')
+    parser.add_argument('--json', help='Write sizes, measurements and exponents as JSON')
+    args = parser.parse_args()
+
+    sizes = []
+    seconds = {name: [] for name in PHASES}
+    for step in range(args.steps):
+        statements = args.start * args.factor ** step
+        source = generate_program(functions=1, statements=statements, depth=2, loop_count=2)
+        values, phase_seconds = measure(source, args.repeat)
+        sizes.append(values)
+        for name in PHASES:
+            seconds[name].append(phase_seconds[name])
+        print(f"{statements} statements: {values} values, "
+              + ", ".join(f"{name} {phase_seconds[name] * 1e3:.1f}ms" for name in PHASES))
+
+    reference = nlogn_exponent(sizes)
+    report = {'values': sizes, 'nlogn_exponent': reference, 'phases': {}}
+    flagged = []
+    for name in PHASES:
+        exponent, flag = superlinear(sizes, seconds[name], args.tolerance)
+        report['phases'][name] = {'seconds': seconds[name], 'time_exponent': exponent}
+        if flag:
+            flagged.append(name)
+        print(f"{name}: time ~n^{exponent:.2f} (n log n ~n^{reference:.2f})" + ("  SUPERLINEAR" if flag else ""))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    for name in flagged:
+        print(f"REPORT {name} grows faster than n log n")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Startup cost: cumulative `python -X importtime` of `import compiler` in a
+fresh interpreter, best of a few runs. It was about 50ms while compiler.py
+imported the whole pipeline eagerly.
+
+Exits with status 1 when the import takes longer than --budget.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--budget 25]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def import_time(module):
+    """Cumulative import time of `module` in microseconds, in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                            capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT))
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f"no importtime line for {module}:\n{result.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time of the compiler')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs; the least disturbed one counts')
+    parser.add_argument('--budget', type=float, default=25, help='Allowed import time in ms')
+    args = parser.parse_args()
+
+    best = min(import_time('compiler') for _ in range(args.repeat)) / 1000
+    print(f"import compiler: {best:.1f}ms (budget {args.budget:g}ms)")
+    sys.exit(1 if best > args.budget else 0)
+
+
+if __name__ == "__main__":
+    main()
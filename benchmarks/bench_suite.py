@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark suite with regression gates.
+
+Runs every compiler phase (CLexer, CParser, SemanticAnalyzer,
+CodeGenerator) and the CMaInstructionProcessor over programs from the
+deterministic generator (benchmarks/generator.py) and reports the best of
+at least --repeat runs per phase with its throughput (tokens, source lines,
+AST functions, instructions or executed instructions per second).
+
+Results are written as JSON. Against a stored baseline (default
+benchmarks/baseline.json) a phase fails when it is slower than its baseline
+time by more than --threshold; the process then exits with status 1. Times
+are compared relative to a fixed pure-Python calibration loop measured in
+the same run, so a baseline recorded on another machine stays usable.
+
+Usage:
+    python benchmarks/bench_suite.py [--repeat 5] [--threshold 0.25] [--output results.json]
+                                     [--baseline benchmarks/baseline.json] [--save-baseline]
+                                     [--workload small ...]
+"""
+
+import gc
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.generator import generate_program
+from src.lexer import CLexer
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# name → generator parameters
+WORKLOADS = {
+    'small': dict(functions=8, statements=12, depth=2, loop_count=8, array_size=8),
+    'wide': dict(functions=150, statements=20, depth=1, loop_count=4, array_size=4),
+    'deep': dict(functions=4, statements=24, depth=4, loop_count=6, array_size=16),
+}
+
+def best_of(repeat, function, min_time=0.3, max_runs=50):
+    """
+    Shortest wall time and the last result of at least `repeat` calls, more
+    (up to max_runs) until min_time has been spent, so short phases get
+    enough samples for a stable minimum. No collections while timing.
+    """
+    best = float('inf')
+    result = None
+    spent = 0.0
+    runs = 0
+    while runs < repeat or (spent < min_time and runs < max_runs):
+        runs += 1
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = min(best, elapsed)
+        spent += elapsed
+    return best, result
+
+
+def calibrate(repeat):
+    """Seconds for a fixed pure-Python loop: the machine's speed in this run."""
+    def loop():
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        return total
+    return best_of(3 * repeat, loop)[0]
+
+
+def run_vm(program):
+    vm = CMaInstructionProcessor()
+    vm.load_program(program, verify=True)
+    vm.resume(1 << 62)  # Like run(), but counts executed instructions
+    return vm.executed
+
+
+def bench_workload(params, repeat):
+    """Phase name → {'seconds', 'items', 'unit'} for one generated program."""
+    source = generate_program(**params)
+    lexer = CLexer()
+    lexer.build()
+    parser = CParser().build()
+    phases = {}
+
+    seconds, tokens = best_of(repeat, lambda: lexer.tokenize(source))
+    phases['lex'] = {'seconds': seconds, 'items': len(tokens), 'unit': 'tokens'}
+    seconds, ast = best_of(repeat, lambda: parser.parse(source))
+    phases['parse'] = {'seconds': seconds, 'items': source.count('\n'), 'unit': 'lines'}
+    with contextlib.redirect_stdout(io.StringIO()):  # The analyzer prints debug output
+        seconds, errors = best_of(repeat, lambda: SemanticAnalyzer().analyze(ast))
+    if errors:
+        raise RuntimeError("Generated program has semantic errors:\n" + "\n".join(errors))
+    phases['semantics'] = {'seconds': seconds, 'items': len(ast), 'unit': 'functions'}
+    generator = CodeGenerator()
+    seconds, _ = best_of(repeat, lambda: generator.generate(ast))
+    program = generator.instructions()
+    phases['codegen'] = {'seconds': seconds, 'items': len(program), 'unit': 'instructions'}
+    seconds, executed = best_of(repeat, lambda: run_vm(program))
+    phases['vm'] = {'seconds': seconds, 'items': executed, 'unit': 'executed instructions'}
+    return phases
+
+
+def run_suite(workloads, repeat):
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'workloads': {},
+    }
+    calibration = calibrate(repeat)
+    for name in workloads:
+        results['workloads'][name] = {'params': WORKLOADS[name], 'phases': bench_workload(WORKLOADS[name], repeat)}
+    # Before and after, so a slow moment at either end does not skew every ratio
+    results['calibration'] = min(calibration, calibrate(repeat))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    (workload, phase, ratio) for every phase present in both whose
+    calibrated time exceeds the baseline's by more than `threshold`;
+    ratio is new time / baseline time. Also returns all ratios.
+    """
+    scale = baseline['calibration'] / results['calibration']
+    ratios = {}
+    regressions = []
+    for name, workload in results['workloads'].items():
+        base = baseline['workloads'].get(name)
+        if base is None or base['params'] != workload['params']:
+            continue  # Different program, nothing to compare against
+        for phase, entry in workload['phases'].items():
+            if phase not in base['phases']:
+                continue
+            ratio = entry['seconds'] * scale / base['phases'][phase]['seconds']
+            ratios[(name, phase)] = ratio
+            if ratio > 1 + threshold:
+                regressions.append((name, phase, ratio))
+    return regressions, ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiler and VM throughput suite with regression gates')
+    parser.add_argument('--repeat', type=int, default=5, help='Minimum runs per phase; the best one counts')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown against the baseline (0.25 = 25%%)')
+    parser.add_argument('--workload', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS), help='Workloads to run')
+    parser.add_argument('--output', help='Write the results as JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline instead of comparing')
+    args = parser.parse_args()
+
+    results = run_suite(args.workload, args.repeat)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions, ratios = compare(results, baseline, args.threshold) if baseline else ([], {})
+
+    for name, workload in results['workloads'].items():
+        for phase, entry in workload['phases'].items():
+            line = (f"{name} {phase}: {entry['seconds'] * 1e3:.2f}ms, "
+                    f"{entry['items'] / entry['seconds']:,.0f} {entry['unit']}/s")
+            if (name, phase) in ratios:
+                line += f", {ratios[(name, phase)] - 1:+.1%} vs. baseline"
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    for name, phase, ratio in regressions:
+        print(f"REGRESSION {name} {phase}: {ratio - 1:+.1%} (threshold {args.threshold:+.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
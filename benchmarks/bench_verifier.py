@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Stack verifier benchmark: times StackVerifier on large generated CMA programs
+(many functions, each with nested loops, branches and calls).
+
+Usage:
+    python benchmarks/bench_verifier.py [--functions 2000] [--statements 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.verifier import StackVerifier
+
+
+def make_source(functions, statements):
+    parts = []
+    for f in range(functions):
+        body = ["    int i;", "    int r = a;"]
+        for s in range(statements):
+            if s % 3 == 0:
+                body.append(f"    for (i = 0; i < {s + 2}; i = i + 1) {{ r = r + i * {s}; }}")
+            elif s % 3 == 1:
+                body.append(f"    if (r > {s}) {{ r = r - b; }} else {{ r = r + b * 2; }}")
+            elif f > 0:
+                body.append(f"    r = r + f{f - 1}(r, {s});")
+            else:
+                body.append(f"    while (r > {s * 100}) {{ r = r / 2; }}")
+        body.append("    return r;")
+        parts.append(f"int f{f}(int a, int b) {{\n" + "\n".join(body) + "\n}")
+    parts.append(f"int main() {{ return f{functions - 1}(1, 2); }}")
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stack verifier benchmark')
+    parser.add_argument('--functions', type=int, default=2000)
+    parser.add_argument('--statements', type=int, default=20)
+    args = parser.parse_args()
+
+    ast = CParser().parse(make_source(args.functions, args.statements))
+    errors = SemanticAnalyzer().analyze(ast)
+    if errors:
+        raise Exception("Semantic errors:\n" + "\n".join(errors))
+    code_generator = CodeGenerator()
+    code_generator.generate(ast)
+    lines = code_generator.code
+
+    start = time.perf_counter()
+    info = StackVerifier().verify_lines(lines)
+    elapsed = time.perf_counter() - start
+
+    instructions = len(info.depths)
+    print(f"functions={len(info.functions) - 1} instructions={instructions} "
+          f"max_depth={info.max_depth} verify_time={elapsed:.3f}s "
+          f"instr/s={instructions / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
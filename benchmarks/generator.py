@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of well-typed programs for benchmarks.
+
+generate_program() builds a program from a seed and size parameters: every
+function declares its scalars, loop counters and one array up front, fills
+the array, runs `statements` top-level statements (assignments, if/else,
+for and while loops nested up to `depth` and ifs up to two levels more,
+array stores and loads) and
+returns a value. Function k calls function k - 1 once, outside of loops, so
+the run time stays linear in the number of functions.
+
+All values stay in [0, 1000): arithmetic is reduced with % 1000 and
+subtraction is written as (a + 1000 - b % 1000), so division and modulo
+never see negative operands and the result is the same as with gcc. Array
+indices are loop counters reduced modulo the array size.
+
+Usage:
+    python benchmarks/generator.py [--functions 8] [--statements 12] [--depth 2]
+                                   [--loop-count 8] [--array-size 8] [--seed 0]
+"""
+
+import random
+import argparse
+
+SCALARS = 4
+COMPARISONS = ('<', '>', '<=', '>=', '==', '!=')
+
+
+class ProgramGenerator:
+    def __init__(self, functions=8, statements=12, depth=2, loop_count=8, array_size=8, seed=0):
+        if functions < 1 or array_size < 1:
+            raise ValueError("functions and array_size must be at least 1")
+        self.functions = functions
+        self.statements = statements
+        self.depth = depth
+        self.loop_count = loop_count
+        self.array_size = array_size
+        self.random = random.Random(seed)
+        self.lines = []
+
+    def generate(self):
+        for index in range(self.functions):
+            self.function(index)
+        last = self.functions - 1
+        self.lines.append("int main() {")
+        self.lines.append(f"    return f{last}(3, 7) % 256;")
+        self.lines.append("}")
+        return '\n'.join(self.lines) + '\n'
+
+    def emit(self, indent, text):
+        self.lines.append('    ' * indent + text)
+
+    def function(self, index):
+        self.emit(0, f"int f{index}(int a, int b) {{")
+        for k in range(SCALARS):
+            self.emit(1, f"int v{k} = {self.random.randint(0, 99)};" if k else f"int v0 = (a + b + {index}) % 1000;")
+        for level in range(max(1, self.depth)):
+            self.emit(1, f"int i{level} = 0;")
+        self.emit(1, f"int buf[{self.array_size}];")
+        self.emit(1, f"for (i0 = 0; i0 < {self.array_size}; i0 = i0 + 1) {{")
+        self.emit(2, f"buf[i0] = (i0 * {self.random.randint(1, 9)} + {index}) % 1000;")
+        self.emit(1, "}")
+        if index > 0:
+            self.emit(1, f"v1 = f{index - 1}(v0, {self.random.randint(0, 99)}) % 1000;")
+        for _ in range(self.statements):
+            self.statement(1, [])
+        self.emit(1, f"return ({' + '.join(f'v{k}' for k in range(SCALARS))}) % 1000;")
+        self.emit(0, "}")
+
+    def operand(self, counters):
+        """A value in [0, 1000): a scalar, a constant or an array element."""
+        choice = self.random.random()
+        if choice < 0.5:
+            return f"v{self.random.randrange(SCALARS)}"
+        if choice < 0.75 or not counters:
+            return str(self.random.randint(0, 99))
+        return f"buf[{self.random.choice(counters)} % {self.array_size}]"
+
+    def expression(self, counters):
+        """A value in [0, 1000)."""
+        a = self.operand(counters)
+        b = self.operand(counters)
+        shape = self.random.randrange(5)
+        if shape == 0:
+            return f"({a} + {b}) % 1000"
+        if shape == 1:
+            return f"({a} * {b} + {self.operand(counters)}) % 1000"
+        if shape == 2:
+            return f"({a} + 1000 - {b} % 1000) % 1000"
+        if shape == 3:
+            return f"{a} / {self.random.randint(1, 9)}"
+        return f"({a} % {self.random.randint(1, 50)} + {b}) % 1000"
+
+    def condition(self, counters):
+        left = f"{self.operand(counters)} {self.random.choice(COMPARISONS)} {self.operand(counters)}"
+        shape = self.random.randrange(4)
+        if shape == 0:
+            return f"{left} && {self.operand(counters)} > {self.random.randint(0, 500)}"
+        if shape == 1:
+            return f"!({left})"
+        return left
+
+    def statement(self, indent, counters):
+        level = len(counters)
+        nested = level < self.depth
+        choice = self.random.random()
+        if nested and choice < 0.2:
+            self.loop(indent, counters, 'for')
+        elif nested and choice < 0.3:
+            self.loop(indent, counters, 'while')
+        elif choice < 0.45 and indent <= self.depth + 2:  # Bounds nesting of ifs as well
+            self.emit(indent, f"if ({self.condition(counters)}) {{")
+            self.block(indent, counters)
+            if self.random.random() < 0.5:
+                self.emit(indent, "} else {")
+                self.block(indent, counters)
+            self.emit(indent, "}")
+        elif counters and choice < 0.6:
+            self.emit(indent, f"buf[{counters[-1]} % {self.array_size}] = {self.expression(counters)};")
+        else:
+            self.emit(indent, f"v{self.random.randrange(SCALARS)} = {self.expression(counters)};")
+
+    def block(self, indent, counters):
+        for _ in range(self.random.randint(1, 2)):
+            self.statement(indent + 1, counters)
+
+    def loop(self, indent, counters, kind):
+        counter = f"i{len(counters)}"
+        inner = counters + [counter]
+        if kind == 'for':
+            self.emit(indent, f"for ({counter} = 0; {counter} < {self.loop_count}; {counter} = {counter} + 1) {{")
+            self.block(indent, inner)
+        else:
+            self.emit(indent, f"{counter} = 0;")
+            self.emit(indent, f"while ({counter} < {self.loop_count}) {{")
+            self.block(indent, inner)
+            self.emit(indent + 1, f"{counter} = {counter} + 1;")
+        self.emit(indent, "}")
+
+
+def generate_program(functions=8, statements=12, depth=2, loop_count=8, array_size=8, seed=0):
+    """Source text of a generated program; the same arguments give the same text."""
+    return ProgramGenerator(functions, statements, depth, loop_count, array_size, seed).generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic well-typed program')
+    parser.add_argument('--functions', type=int, default=8, help='Number of functions besides main')
+    parser.add_argument('--statements', type=int, default=12, help='Top-level statements per function')
+    parser.add_argument('--depth', type=int, default=2, help='Maximum loop nesting depth')
+    parser.add_argument('--loop-count', type=int, default=8, help='Iterations of every loop')
+    parser.add_argument('--array-size', type=int, default=8, help='Elements of the array in every function')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+    print(generate_program(args.functions, args.statements, args.depth, args.loop_count,
+                           args.array_size, args.seed), end='')
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,25 @@ This script compiles a simplified C-like language to CMA code.
 
 import sys
 import os
-import argparse
-from src.parser import CParser
-from src.semantics import SemanticAnalyzer
-from src.codegen import CodeGenerator
+import time
 
-def compile_file(input_file, output_file=None, verbose=False):
-    """Compile the input file to CMA code and write to the output file"""
+# Only the standard library is imported up front: --help, argument errors and
+# cache hits never load the parser (PLY), the analyzer or the code generator.
+
+def compile_file(input_file, output_file=None, verbose=False, verify=True, emit='cma', source_map=False, cache=None, timer=None, optimizer=None):
+    """
+    Compile the input file to CMA code and write to the output file.
+
+    cache is a CompileCache; on a hit the stored output is written without
+    running any compiler pass. timer is a PassTimer that records every phase.
+    optimizer is a PassManager whose passes run on the AST and the code.
+    """
+    if timer is None:
+        from src.instrument import NULL_TIMER
+        timer = NULL_TIMER
     try:
         # Read the input file
-        with open(input_file, 'r') as f:
+        with timer.phase('read'), open(input_file, 'r') as f:
             source_code = f.read()
 
         if verbose:
@@ -24,37 +33,62 @@ def compile_file(input_file, output_file=None, verbose=False):
             print(source_code)
             print("\n📦 Starting parsing...")
         
-        # If no output file is specified, use the input filename with .cma extension
+        # If no output file is specified, use the input filename with .cma/.cmab extension
         if output_file is None:
-            output_file = os.path.splitext(input_file)[0] + '.cma'
+            extension = '.cmab' if emit == 'bytecode' else '.cma'
+            output_file = os.path.splitext(input_file)[0] + extension
         
-        # Lexical And Syntax Analysys
-        parser = CParser(verbose=verbose)
-        ast = parser.parse(source_code)
-        if verbose:
-            print(f"\n✅ Parsing successful.")
+        key = None
+        if cache is not None:
+            with timer.phase('cache'):
+                options = {'optimize': optimizer.signature()} if optimizer is not None else {}
+                key = cache.key(source_code, verify=verify, emit=emit, source_map=source_map, **options)
+                entry = cache.get(key)
+            if entry is not None:
+                if verbose:
+                    print(f"\n♻️ Cache hit ({key[:12]}), skipping compilation.")
+                with timer.phase('emit'):
+                    _write_output(output_file, entry['output'], emit)
+                    if source_map:
+                        from src.sourcemap import SourceMap
+                        cached_map = SourceMap.from_dict(entry['source_map'])
+                        cached_map.file = input_file
+                        cached_map.write(output_file + '.map')
+                print(f"\n✅ Compilation successful (cached). Output written to {output_file}")
+                return True
 
-        # Semantic Analysys 
-        analyzer = SemanticAnalyzer(verbose=verbose)
-        errors = analyzer.analyze(ast)
-        if errors:
-            raise Exception("Semantic errors:\n" + "\n".join(errors))
-        if verbose:
-            print(f"\n✅ Semantic Analysis successful.")
+        start = time.perf_counter()
+
+        with timer.phase('setup'):
+            from src.parser import CParser
+            from src.pipeline import compile_source
+            parser = CParser(verbose=verbose).build()
+        ast, code_generator = compile_source(parser, source_code, verify, optimizer, timer, verbose)
+        cma_code = '\n'.join(code_generator.code)
 
-        # Code Generation
-        code_generator = CodeGenerator(verbose=verbose)
-        cma_code = code_generator.generate(ast)
-        if verbose:
-            print(f"\n✅ Code Generation successful.")
-        
         if verbose:
             print("\n⚙️ CMA Code:")
             print(cma_code)
 
         # Write the output
-        with open(output_file, 'w') as f:
-            f.write(cma_code)
+        with timer.phase('emit'):
+            if emit == 'bytecode':
+                from src import bytecode
+                output = bytecode.assemble_text(cma_code)
+            else:
+                output = cma_code
+            _write_output(output_file, output, emit)
+
+            # Instruction → source position map, next to the output
+            generated_map = None
+            if source_map:
+                generated_map = code_generator.source_map(input_file)
+                generated_map.write(output_file + '.map')
+
+        if cache is not None:
+            with timer.phase('cache'):
+                cache.put(key, output, ast, generated_map.to_dict() if generated_map else None,
+                          time.perf_counter() - start)
         
         print(f"\n✅ Compilation successful. Output written to {output_file}")
         return True
@@ -66,17 +100,191 @@ def compile_file(input_file, output_file=None, verbose=False):
         print(f"💥 Compilation error: {e}")
         return False
 
+def _write_output(output_file, output, emit):
+    if emit == 'bytecode':
+        from src import bytecode
+        bytecode.write(output_file, output)
+    else:
+        with open(output_file, 'w') as f:
+            f.write(output)
+
+_parser = None  # Shared by compile_string and run_string, built on first use
+
+def _generate(source, verify=False, opt_level=0):
+    """Runs the pipeline on source text and returns the CodeGenerator holding the code."""
+    global _parser
+    import io
+    import contextlib
+    from src.parser import CParser
+    from src.pipeline import compile_source
+    optimizer = None
+    if opt_level:
+        from src.passes import PassManager
+        optimizer = PassManager(opt_level)
+    # The parser and analyzer also report on stdout; errors are raised
+    with contextlib.redirect_stdout(io.StringIO()):
+        if _parser is None:
+            _parser = CParser().build()
+        return compile_source(_parser, source, verify, optimizer)[1]
+
+def compile_string(source, verify=True, opt_level=0):
+    """
+    Compiles source text to the code generator's instruction stream, a list
+    of (opcode, operand) pairs, without writing or formatting a CMA file.
+    Raises on syntax and semantic errors.
+    """
+    return _generate(source, verify, opt_level).instructions()
+
+def run_string(source, verify=True, profile=False, memory_model='dense', opt_level=0):
+    """
+    Compiles source text and runs it in the VM straight from the instruction
+    stream. Returns (return value, CMaProfiler or None).
+    """
+    return _run(_generate(source, opt_level=opt_level), verify, profile, memory_model)
+
+def _run(generator, verify, profile, memory_model):
+    from src.vm.cma_instruction import CMaInstructionProcessor
+    vm = CMaInstructionProcessor(memory_model=memory_model)
+    vm.load_program(generator.instructions(), verify=verify)  # Verified once, by the VM
+    profiler = vm.enable_profiling() if profile else None
+    vm.run()
+    return vm.return_value, profiler
+
+def run_main(argv):
+    """`compiler.py run`: compiles and runs a program in memory; returns the exit status."""
+    import argparse
+    parser = argparse.ArgumentParser(prog='compiler.py run', description='Compile a C-like program and run it in the VM, without intermediate files')
+    parser.add_argument('input_file', help='The C-like source file to run')
+    parser.add_argument('--no-verify', action='store_true', help='Skip the stack depth verification before running')
+    parser.add_argument('--profile', action='store_true', help='Report execution counts per function, opcode and source line on stderr')
+    parser.add_argument('--memory-model', choices=['dense', 'paged'], default='dense', help='VM memory: preallocated list (default) or sparse pages')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0, help='Optimization level (default: 0)')
+    args = parser.parse_args(argv)
+    try:
+        with open(args.input_file, 'r') as f:
+            source = f.read()
+        generator = _generate(source, opt_level=args.opt_level)
+        value, profiler = _run(generator, not args.no_verify, args.profile, args.memory_model)
+    except FileNotFoundError:
+        print(f"❌ Error: Could not open input file {args.input_file}")
+        return 1
+    except Exception as e:
+        print(f"💥 Error: {e}")
+        return 1
+    print(f"✅ Program returned {value}")
+    if profiler is not None:
+        print(profiler.report(source_map=generator.source_map(args.input_file)), file=sys.stderr)
+    return 0
+
+def _process_start(pid='self'):
+    """Start of a process in seconds since boot (Linux /proc, 1/CLK_TCK resolution)."""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return int(fields[19]) / os.sysconf('SC_CLK_TCK')  # Field 22, starttime
+
+def startup_report(main_entered):
+    """
+    Time from process start to main(). In a PyInstaller one-file build the
+    bootloader parent unpacks the archive before starting this process, so
+    its start time splits off the unpack time.
+    """
+    try:
+        started = _process_start()
+        report = f"⏱️ Startup: {(main_entered - started) * 1e3:.0f}ms from process start to main()"
+        if getattr(sys, 'frozen', False) and os.path.realpath(f'/proc/{os.getppid()}/exe') == os.path.realpath(sys.executable):
+            unpack = started - _process_start(os.getppid())
+            report += f", after {unpack * 1e3:.0f}ms of one-file unpacking"
+        return report + f" (±{1e3 / os.sysconf('SC_CLK_TCK'):.0f}ms)"
+    except (OSError, ValueError, AttributeError, IndexError):
+        return "⏱️ Startup: unavailable (needs Linux /proc)"
+
 def main():
     """Main entry point"""
+    main_entered = time.clock_gettime(time.CLOCK_BOOTTIME) if hasattr(time, 'CLOCK_BOOTTIME') else None
+    if sys.argv[1:2] == ['run']:
+        sys.exit(run_main(sys.argv[2:]))
+    import argparse
     parser = argparse.ArgumentParser(description='Compile C-like language to CMA code')
-    parser.add_argument('input_file', help='The C-like source file to compile')
+    parser.add_argument('input_file', nargs='+', help='The C-like source file to compile; several files or directories start a parallel build')
     parser.add_argument('-o', '--output', help='Output file name (default: input file with .cma extension)')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose output')
+    parser.add_argument('--no-verify', action='store_true', help='Skip the stack depth verification of the generated code')
+    parser.add_argument('--emit', choices=['cma', 'bytecode'], default='cma', help='Output format: CMA text (default) or binary bytecode (.cmab)')
+    parser.add_argument('--source-map', action='store_true', help='Also write a source map (<output>.map) from instructions to source lines')
+    parser.add_argument('--no-cache', action='store_true', help='Always compile, bypassing the on-disk compilation cache (build mode: the up-to-date check)')
+    parser.add_argument('--cache-dir', help='Compilation cache directory (default: $CLIKE_CACHE_DIR or ~/.cache/clike-compiler)')
+    parser.add_argument('--time-passes', nargs='?', const='table', choices=['table', 'json'], help='Report wall and CPU time per compiler phase (as a table or JSON)')
+    parser.add_argument('--mem-report', action='store_true', help='With --time-passes: also report allocation peaks and object counts per phase (tracemalloc)')
+    parser.add_argument('-j', '--jobs', type=int, help='Build mode: worker processes (default: CPU count)')
+    parser.add_argument('--manifest', help='Build mode: up-to-date manifest (default: .clike-build.json)')
+    parser.add_argument('--summary', help='Build mode: write a JSON summary with per-file phase timings and errors')
+    parser.add_argument('--startup-time', action='store_true', help='Report the time from process start (and one-file unpacking) to main()')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0, help='Optimization level: 0 (default), 1 or 2')
+    parser.add_argument('--enable-pass', action='append', default=[], metavar='PASS', help='Run an optimization pass regardless of the level (repeatable)')
+    parser.add_argument('--disable-pass', action='append', default=[], metavar='PASS', help='Skip an optimization pass of the level (repeatable)')
+    parser.add_argument('--verify-passes', action='store_true', help='Check the AST and code after every optimization pass')
+    parser.add_argument('--pass-stats', action='store_true', help='Report changes and time per optimization pass')
     
     args = parser.parse_args()
-    
-    success = compile_file(args.input_file, args.output, verbose=args.verbose)
+    if args.startup_time:
+        print(startup_report(main_entered) if main_entered is not None else "⏱️ Startup: unavailable (needs Linux /proc)", file=sys.stderr)
+
+    optimizer = None
+    if args.opt_level or args.enable_pass or args.disable_pass or args.verify_passes or args.pass_stats:
+        from src.passes import PassManager
+        try:
+            optimizer = PassManager(args.opt_level, args.enable_pass, args.disable_pass, debug=args.verify_passes)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if len(args.input_file) > 1 or os.path.isdir(args.input_file[0]):
+        if args.output:
+            parser.error("-o/--output only applies to a single input file")
+        single = [flag for flag, value in (('--cache-dir', args.cache_dir), ('--time-passes', args.time_passes),
+                                           ('--mem-report', args.mem_report), ('--pass-stats', args.pass_stats)) if value]
+        if single:
+            parser.error(f"{', '.join(single)} only applies to a single input file (build mode reports phase times with --summary)")
+        sys.exit(build_files(args))
+
+    cache = None
+    if not args.no_cache:
+        from src.cache import CompileCache
+        cache = CompileCache(args.cache_dir)
+    timer = None
+    if args.time_passes or args.mem_report:
+        from src.instrument import PassTimer
+        timer = PassTimer(memory=args.mem_report)
+    success = compile_file(args.input_file[0], args.output, verbose=args.verbose, verify=not args.no_verify, emit=args.emit, source_map=args.source_map, cache=cache, timer=timer, optimizer=optimizer)
+    if args.pass_stats:
+        print(optimizer.report(), file=sys.stderr)
+    if timer is not None:
+        import json
+        timer.close()
+        # stderr, so the report never mixes with output piped from stdout
+        print(json.dumps(timer.to_dict(), indent=2) if args.time_passes == 'json' else timer.report(), file=sys.stderr)
     sys.exit(0 if success else 1)
 
+def build_files(args):
+    """Build mode: compiles many files in parallel; returns the exit status."""
+    from src.build import Builder, write_summary, DEFAULT_MANIFEST, COMPILED, UP_TO_DATE, ERROR
+    builder = Builder(jobs=args.jobs, manifest=args.manifest or DEFAULT_MANIFEST, verify=not args.no_verify,
+                      emit=args.emit, source_map=args.source_map, opt_level=args.opt_level,
+                      enable=args.enable_pass, disable=args.disable_pass, verify_passes=args.verify_passes,
+                      rebuild=args.no_cache)
+
+    def report(result):
+        if result['status'] == ERROR:
+            print(f"💥 {result['source']}: " + "; ".join(result['errors']))
+        elif args.verbose or result['status'] == COMPILED:
+            print(f"{'✅' if result['status'] == COMPILED else '⏭️'} {result['source']} → {result['output']}")
+
+    summary = builder.build(args.input_file, on_result=report)
+    if args.summary:
+        write_summary(args.summary, summary)
+    totals = summary['totals']
+    print(f"\n📦 Build finished in {summary['elapsed']:.2f}s with {summary['jobs']} jobs: "
+          f"{totals[COMPILED]} compiled, {totals[UP_TO_DATE]} up to date, {totals[ERROR]} failed")
+    return 1 if totals[ERROR] else 0
+
 if __name__ == "__main__":
     main()
@@ -6,14 +6,19 @@ setup(
     description="A simple C-like language compiler using PLY",
     author="Jose Aram Mendez Gomez",
     packages=find_packages(exclude=["tests*"]),
+    py_modules=["compiler"],
     install_requires=[
         "ply>=3.11",
     ],
     extras_require={
         "dev": [
             "pytest>=7.0.0",  # Only for development/testing
+            "pytest-xdist>=3.0",  # pytest -n auto
             "pyinstaller>=6.0.0",
         ],
+        "batch": [
+            "numpy>=1.20",  # Batched VM in src/vm/cma_batch.py
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Multi-file builds: compiles many sources in a process pool and skips the
+ones whose outputs are up to date.
+
+A manifest (JSON, default .clike-build.json in the current directory)
+records per source the mtime, size and sha256 it was compiled from, the
+output it produced and the build key (compiler version and options). A
+source is up to date when its output still exists, the build key matches,
+and either mtime and size are unchanged or, after a touch, its hash is.
+
+Results are streamed as files finish. The summary holds per file the
+status ('compiled', 'up-to-date' or 'error'), the errors and the time of
+each phase (read, parse, semantics, codegen, write).
+"""
+
+import io
+import os
+import json
+import time
+import hashlib
+import contextlib
+from multiprocessing import Pool
+
+from src.parser import CParser
+from src.pipeline import compile_source, SemanticErrors
+from src.passes import PassManager
+from src.cache import compiler_version
+from src import bytecode
+
+DEFAULT_MANIFEST = '.clike-build.json'
+MANIFEST_VERSION = 1
+
+COMPILED = 'compiled'
+UP_TO_DATE = 'up-to-date'
+ERROR = 'error'
+
+_parser = None  # Per worker process
+
+
+def collect_sources(paths):
+    """Expands directories to the .c files below them; keeps the given order otherwise."""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirs, files in os.walk(path):
+                subdirs.sort()
+                sources.extend(os.path.join(directory, name) for name in sorted(files) if name.endswith('.c'))
+        else:
+            sources.append(path)
+    return sources
+
+
+def output_path(source, emit):
+    return os.path.splitext(source)[0] + ('.cmab' if emit == 'bytecode' else '.cma')
+
+
+def build_key(verify, emit, source_map, optimize=''):
+    """optimize is the PassManager signature of the build's passes."""
+    return f"{compiler_version()}:verify={verify}:emit={emit}:source_map={source_map}:{optimize}"
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _warm_up():
+    global _parser
+    if _parser is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _parser = CParser().build()
+
+
+class _PhaseTimes:
+    """
+    Timer for compile_source that keeps to the summary's phases: optimization
+    passes and verification count as codegen, lexing as parse.
+    """
+
+    PHASES = ('read', 'parse', 'semantics', 'codegen', 'write')
+
+    def __init__(self, phases):
+        self.phases = phases
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            name = name if name in self.PHASES else 'codegen'
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def lexing(self, lexer):
+        return contextlib.nullcontext()
+
+
+def _optimizer(options):
+    if not (options['opt_level'] or options['enable'] or options['disable']):
+        return None
+    return PassManager(options['opt_level'], options['enable'], options['disable'], debug=options['verify_passes'])
+
+
+def compile_one(task):
+    """Compiles one source in a worker; returns a result dict with phase timings."""
+    source, options = task
+    result = {'source': source, 'output': output_path(source, options['emit']),
+              'status': ERROR, 'errors': [], 'phases': {}}
+    timer = _PhaseTimes(result['phases'])
+    try:
+        _warm_up()
+        with timer.phase('read'):
+            stat = os.stat(source)  # Before reading, so a concurrent edit looks stale next time
+            with open(source, 'rb') as f:
+                data = f.read()
+            result['stamp'] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': _sha256(data)}
+        with contextlib.redirect_stdout(io.StringIO()):  # Parser and analyzer also print
+            _, generator = compile_source(_parser, data.decode('utf-8'), options['verify'],
+                                          _optimizer(options), timer)
+        with timer.phase('write'):
+            code = '\n'.join(generator.code)
+            if options['emit'] == 'bytecode':
+                bytecode.write(result['output'], bytecode.assemble_text(code))
+            else:
+                with open(result['output'], 'w') as f:
+                    f.write(code)
+            if options['source_map']:
+                generator.source_map(source).write(result['output'] + '.map')
+        result['status'] = COMPILED
+    except SemanticErrors as e:
+        result['errors'] = e.errors
+    except Exception as e:
+        result['errors'] = [str(e)]
+    return result
+
+
+class Builder:
+    """
+    opt_level, enable, disable and verify_passes configure the optimization
+    passes like in compiler.py; rebuild compiles every source, up to date or not.
+    """
+
+    def __init__(self, jobs=None, manifest=DEFAULT_MANIFEST, verify=True, emit='cma', source_map=False, opt_level=0,
+                 enable=(), disable=(), verify_passes=False, rebuild=False):
+        self.jobs = jobs or os.cpu_count()
+        self.manifest_path = manifest
+        self.options = {'verify': verify, 'emit': emit, 'source_map': source_map, 'opt_level': opt_level,
+                        'enable': list(enable), 'disable': list(disable), 'verify_passes': verify_passes}
+        self.rebuild = rebuild
+        # Also rejects unknown passes before any worker starts
+        self.key = build_key(verify, emit, source_map, PassManager(opt_level, enable, disable).signature())
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}  # A broken manifest only costs a full rebuild
+        if data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save_manifest(self):
+        if not self.manifest_path:
+            return
+        temp = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(temp, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.manifest}, f, indent=1, sort_keys=True)
+        os.replace(temp, self.manifest_path)
+
+    def up_to_date(self, source):
+        entry = self.manifest.get(os.path.abspath(source))
+        if entry is None or entry.get('key') != self.key or not os.path.exists(entry['output']):
+            return False
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        if stat.st_mtime_ns == entry['mtime'] and stat.st_size == entry['size']:
+            return True
+        # Touched or rewritten: the content decides
+        with open(source, 'rb') as f:
+            if _sha256(f.read()) != entry['sha256']:
+                return False
+        entry['mtime'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        return True
+
+    def build(self, paths, on_result=None):
+        """
+        Builds every source under `paths`; on_result(result) is called as
+        each file finishes. Returns the summary dict.
+        """
+        start = time.perf_counter()
+        sources = collect_sources(paths)
+        results = []
+
+        def finish(result):
+            results.append(result)
+            if result['status'] == COMPILED:
+                self.manifest[os.path.abspath(result['source'])] = dict(
+                    result.pop('stamp'), output=os.path.abspath(result['output']), key=self.key)
+            elif result['status'] == ERROR:
+                result.pop('stamp', None)
+                self.manifest.pop(os.path.abspath(result['source']), None)
+            if on_result is not None:
+                on_result(result)
+
+        stale = []
+        for source in sources:
+            if not self.rebuild and self.up_to_date(source):
+                finish({'source': source, 'output': output_path(source, self.options['emit']),
+                        'status': UP_TO_DATE, 'errors': [], 'phases': {}})
+            else:
+                stale.append((source, self.options))
+
+        if self.jobs == 1 or len(stale) <= 1:
+            for task in stale:
+                finish(compile_one(task))
+        else:
+            chunksize = max(1, min(32, len(stale) // (self.jobs * 8)))
+            with Pool(self.jobs, initializer=_warm_up) as pool:
+                for result in pool.imap_unordered(compile_one, stale, chunksize):
+                    finish(result)
+
+        self.save_manifest()
+        return self.summary(results, time.perf_counter() - start)
+
+    def summary(self, results, elapsed):
+        totals = {COMPILED: 0, UP_TO_DATE: 0, ERROR: 0}
+        phases = {}
+        for result in results:
+            totals[result['status']] += 1
+            for name, seconds in result['phases'].items():
+                phases[name] = phases.get(name, 0.0) + seconds
+        return {
+            'jobs': self.jobs,
+            'elapsed': elapsed,
+            'totals': totals,
+            'phases': phases,
+            'files': sorted(results, key=lambda result: result['source']),
+        }
+
+
+def write_summary(path, summary):
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Binary CMA bytecode: a compact container for CMA programs that loads with
+mmap and no per-line parsing, and round-trips losslessly with the text format
+(comments and layout aside).
+
+File layout (little-endian, every section 8-byte aligned):
+    header        magic 'CMAB', version, flags, counts and section offsets
+    operands      int32 per instruction (inline int, string index or label index)
+    opcodes       uint16 per instruction, index into the string pool
+    kinds         uint8 per instruction, one of OPERAND_*
+    labels        (string index, instruction position) uint32 pairs
+    string pool   uint32 offsets (n + 1) followed by one UTF-8 blob;
+                  holds opcode names, label names, non-integer operands and
+                  integers that do not fit in int32
+    source map    optional uint32 source line per instruction (FLAG_SOURCE_MAP)
+
+Programs are handled as lists of (opcode, operand) pairs with labels as
+('label', name), the same shape the StackVerifier consumes.
+"""
+
+import os
+import mmap
+import re
+import struct
+import sys
+from array import array
+
+from src.verifier import split_line
+
+MAGIC = b'CMAB'
+VERSION = 1
+FLAG_SOURCE_MAP = 1
+
+HEADER = struct.Struct('<4sHHIIIIIIIIII')
+
+OPERAND_NONE = 0
+OPERAND_INT = 1
+OPERAND_STRING = 2
+OPERAND_LABEL = 3
+OPERAND_BIGINT = 4
+
+INT_PATTERN = re.compile(r'-?\d+\Z')
+INT32_MIN, INT32_MAX = -(1 << 31), (1 << 31) - 1
+
+
+class BytecodeError(Exception):
+    """Raised for malformed bytecode files."""
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def assemble(program, source_lines=None):
+    """Encodes (opcode, operand) pairs into bytecode and returns the bytes."""
+    strings = []
+    string_index = {}
+
+    def intern(text):
+        index = string_index.get(text)
+        if index is None:
+            index = string_index[text] = len(strings)
+            strings.append(text)
+        return index
+
+    opcodes = array('H')
+    kinds = array('B')
+    operands = array('i')
+    label_entries = array('I')
+    pending = []
+
+    for opcode, operand in program:
+        if opcode.lower() == 'label':
+            label_entries.append(intern(operand))
+            label_entries.append(len(opcodes))
+            continue
+        opcodes.append(intern(opcode.upper()))
+        if operand is None:
+            kinds.append(OPERAND_NONE)
+            operands.append(0)
+        elif isinstance(operand, int):
+            if INT32_MIN <= operand <= INT32_MAX:
+                kinds.append(OPERAND_INT)
+                operands.append(operand)
+            else:
+                kinds.append(OPERAND_BIGINT)
+                operands.append(intern(str(operand)))
+        else:
+            # Label references are resolved once all labels are known
+            pending.append((len(kinds), str(operand)))
+            kinds.append(OPERAND_STRING)
+            operands.append(0)
+
+    label_names = {strings[label_entries[i]]: i // 2 for i in range(0, len(label_entries), 2)}
+    for position, text in pending:
+        if text in label_names:
+            kinds[position] = OPERAND_LABEL
+            operands[position] = label_names[text]
+        else:
+            operands[position] = intern(text)
+
+    blob = bytearray()
+    offsets = array('I', [0])
+    for text in strings:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+
+    flags = 0
+    source_map = array('I')
+    if source_lines is not None:
+        if len(source_lines) != len(opcodes):
+            raise BytecodeError("Source map must have one line per instruction")
+        flags |= FLAG_SOURCE_MAP
+        source_map = array('I', source_lines)
+
+    sections = [operands, opcodes, kinds, label_entries, offsets, blob, source_map]
+    if sys.byteorder != 'little':
+        for section in sections:
+            if isinstance(section, array):
+                section.byteswap()
+
+    out = bytearray(HEADER.size)
+    section_offsets = []
+    for section in sections:
+        out += b'\0' * (_align(len(out)) - len(out))
+        section_offsets.append(len(out))
+        out += bytes(section)
+
+    HEADER.pack_into(out, 0, MAGIC, VERSION, flags, len(opcodes), len(strings),
+                     len(label_entries) // 2, *section_offsets)
+    return bytes(out)
+
+
+def assemble_text(text):
+    """Assembles CMA text; the source map records the text line of each instruction."""
+    program = []
+    lines = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        pair = split_line(line)
+        if pair is None:
+            continue
+        opcode, operand = pair
+        if operand is not None and INT_PATTERN.match(operand):
+            operand = int(operand)
+        if opcode != 'label':
+            lines.append(number)
+        program.append((opcode, operand))
+    return assemble(program, source_lines=lines)
+
+
+class BytecodeProgram:
+    """Read-only view over bytecode; arrays are memoryviews into the buffer."""
+
+    def __init__(self, buffer, owner=None):
+        self._owner = owner  # Keeps an mmap alive as long as the views are used
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise BytecodeError("File too short for a bytecode header")
+        (magic, version, self.flags, count, n_strings, n_labels,
+         operands_at, opcodes_at, kinds_at, labels_at, offsets_at, blob_at,
+         source_at) = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise BytecodeError("Not a CMA bytecode file (bad magic)")
+        if version != VERSION:
+            raise BytecodeError(f"Unsupported bytecode version {version}")
+
+        self.operands = self._section(view, operands_at, count, 'i')
+        self.opcodes = self._section(view, opcodes_at, count, 'H')
+        self.kinds = self._section(view, kinds_at, count, 'B')
+        label_entries = self._section(view, labels_at, 2 * n_labels, 'I')
+        offsets = self._section(view, offsets_at, n_strings + 1, 'I')
+        blob = self._section(view, blob_at, offsets[-1] if n_strings else 0, 'B')
+        try:
+            self.strings = [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(n_strings)]
+        except UnicodeDecodeError as e:
+            raise BytecodeError(f"Corrupt bytecode string pool: {e}") from None
+        self.source_lines = (self._section(view, source_at, count, 'I')
+                             if self.flags & FLAG_SOURCE_MAP else None)
+
+        # Label table in file order; several labels may share a position
+        try:
+            self.label_table = [(self.strings[label_entries[i]], label_entries[i + 1])
+                                for i in range(0, len(label_entries), 2)]
+        except IndexError:
+            raise BytecodeError("Corrupt bytecode label table") from None
+        self.labels = dict(self.label_table)
+
+    @staticmethod
+    def _section(view, offset, count, fmt):
+        size = array(fmt).itemsize * count
+        section = view[offset:offset + size]
+        if len(section) != size:
+            raise BytecodeError("Truncated bytecode section")
+        if sys.byteorder != 'little':
+            swapped = array(fmt, section.tobytes())
+            swapped.byteswap()
+            return swapped
+        return section.cast(fmt)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def opcode(self, index):
+        return self.strings[self.opcodes[index]]
+
+    def operand(self, index):
+        kind = self.kinds[index]
+        if kind == OPERAND_INT:
+            return self.operands[index]
+        if kind == OPERAND_STRING:
+            return self.strings[self.operands[index]]
+        if kind == OPERAND_LABEL:
+            return self.label_table[self.operands[index]][0]
+        if kind == OPERAND_BIGINT:
+            return int(self.strings[self.operands[index]])
+        return None
+
+    def instructions(self):
+        """Returns (opcode, operand) pairs with labels interleaved, as in the text."""
+        program = []
+        labels_at = {}
+        for name, position in self.label_table:
+            labels_at.setdefault(position, []).append(name)
+        for index in range(len(self)):
+            for name in labels_at.get(index, ()):
+                program.append(('label', name))
+            program.append((self.opcode(index), self.operand(index)))
+        for name in labels_at.get(len(self), ()):
+            program.append(('label', name))
+        return program
+
+    def close(self):
+        self.operands = self.opcodes = self.kinds = self.source_lines = None
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def disassemble(program):
+    """Formats a BytecodeProgram (or (opcode, operand) pairs) as CMA text."""
+    if isinstance(program, BytecodeProgram):
+        program = program.instructions()
+    lines = []
+    for opcode, operand in program:
+        if opcode == 'label':
+            lines.append(f"{operand}:")
+        elif operand is None:
+            lines.append(opcode.upper())
+        else:
+            lines.append(f"{opcode.upper()} {operand}")
+    return '\n'.join(lines)
+
+
+def load(path):
+    """Memory-maps a bytecode file; close() the program to release the mapping."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:  # mmap also rejects empty files
+            raise BytecodeError("File too short for a bytecode header")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return BytecodeProgram(mapped, owner=mapped)
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
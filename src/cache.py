@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+CompileCache: persistent, content-addressed cache of compilation results.
+
+An entry is keyed by the sha256 of the source text, the compiler version (a
+hash over the compiler's own modules, so any change to the compiler
+invalidates every entry) and the options that affect the output. It holds
+the output (CMA text or bytecode), the AST and the source map, so a hit
+skips lexing, parsing, semantic analysis and code generation entirely.
+
+Entries are single pickle files written atomically under the cache
+directory. A hit refreshes the entry's mtime; when the directory grows past
+max_bytes the least recently used entries are evicted.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+
+# Modules whose code determines the compiler's output
+COMPILER_MODULES = ('lexer.py', 'parser.py', 'semantics.py', 'codegen.py',
+                    'verifier.py', 'bytecode.py', 'sourcemap.py', 'passes.py',
+                    'ssa.py', 'pipeline.py')
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_compiler_version = None
+
+
+def default_directory():
+    """$CLIKE_CACHE_DIR, else ~/.cache/clike-compiler."""
+    return os.environ.get('CLIKE_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'clike-compiler')
+
+
+def compiler_version():
+    """sha256 over the compiler modules, computed once per process."""
+    global _compiler_version
+    if _compiler_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in COMPILER_MODULES:
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + b'\0' + f.read() + b'\0')
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+
+class CompileCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved = 0.0  # seconds of compilation skipped by hits
+        self._size = None  # bytes on disk, scanned on the first put
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(source, **options):
+        """Cache key of a source text under the given output options."""
+        digest = hashlib.sha256()
+        digest.update(compiler_version().encode('ascii') + b'\0')
+        for name, value in sorted(options.items()):
+            digest.update(f"{name}={value!r}\0".encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.entry')
+
+    def get(self, key):
+        """The entry dict for `key`, or None. Unreadable entries count as misses."""
+        path = self._path(key)
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # LRU order is mtime order
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved += max(0.0, entry.get('compile_time', 0.0) - (time.perf_counter() - start))
+        return entry
+
+    def put(self, key, output, ast=None, source_map=None, compile_time=0.0):
+        """
+        Stores a result. output is the CMA text or bytecode bytes, source_map
+        a SourceMap.to_dict() or None, compile_time the seconds it took.
+        """
+        entry = {'output': output, 'ast': ast, 'source_map': source_map,
+                 'compile_time': compile_time}
+        path = self._path(key)
+        temp = f"{path}.tmp{os.getpid()}"
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every entry, oldest first."""
+        result = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith('.entry'):
+                    try:
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        continue  # Evicted by another process
+                    result.append((stat.st_mtime, stat.st_size, item.path))
+        result.sort()
+        return result
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+        self._size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'saved_seconds': self.saved,
+        }
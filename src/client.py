@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Thin client for the compile server (src/server.py). It imports only the
+standard library, so a call costs interpreter startup plus one round trip.
+
+    client = CompileClient()
+    response = client.compile(input='prog.c')      # writes prog.cma
+    response = client.compile(source='int main() { return 1; }')
+    response['code']
+
+Usage (same flags as compiler.py):
+    python -m src.client your_source_file.c [-o out.cma] [--no-verify] [--emit bytecode]
+                                             [--source-map] [-O LEVEL] [--enable-pass PASS]
+                                             [--disable-pass PASS] [--socket PATH]
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import itertools
+
+
+def default_socket():
+    """$CLIKE_SERVER_SOCKET, else a per-user path in the temp directory."""
+    return os.environ.get('CLIKE_SERVER_SOCKET') or f"/tmp/clike-compiler-{os.getuid()}.sock"
+
+
+class CompileClient:
+    def __init__(self, path=None, timeout=None):
+        self.path = path or default_socket()
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(self.path)
+        self.reader = self.socket.makefile('r', encoding='utf-8')
+        self.ids = itertools.count(1)
+
+    def close(self):
+        self.reader.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, **request):
+        """Sends a request without waiting; returns its id."""
+        request.setdefault('id', next(self.ids))
+        self.socket.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        return request['id']
+
+    def receive(self):
+        """The next response, in completion order."""
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Compile server closed the connection")
+        return json.loads(line)
+
+    def compile(self, **request):
+        """Compiles one request and waits for its response (see src/server.py for the fields)."""
+        self.send(**request)
+        return self.receive()
+
+    def compile_many(self, requests):
+        """Pipelines requests; returns the responses in request order."""
+        ids = [self.send(**request) for request in requests]
+        responses = {}
+        while len(responses) < len(ids):
+            response = self.receive()
+            responses[response['id']] = response
+        return [responses[i] for i in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile C-like language to CMA code on a compile server')
+    parser.add_argument('input_file', help='The C-like source file to compile')
+    parser.add_argument('-o', '--output', help='Output file name (default: input file with .cma extension)')
+    parser.add_argument('--no-verify', action='store_true', help='Skip the stack depth verification of the generated code')
+    parser.add_argument('--emit', choices=['cma', 'bytecode'], default='cma', help='Output format: CMA text (default) or binary bytecode (.cmab)')
+    parser.add_argument('--source-map', action='store_true', help='Also write a source map (<output>.map)')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0, help='Optimization level: 0 (default), 1 or 2')
+    parser.add_argument('--enable-pass', action='append', default=[], metavar='PASS', help='Run an optimization pass regardless of the level (repeatable)')
+    parser.add_argument('--disable-pass', action='append', default=[], metavar='PASS', help='Skip an optimization pass of the level (repeatable)')
+    parser.add_argument('--socket', help='Server socket (default: $CLIKE_SERVER_SOCKET or /tmp/clike-compiler-<uid>.sock)')
+    args = parser.parse_args()
+
+    try:
+        with CompileClient(args.socket) as client:
+            response = client.compile(input=os.path.abspath(args.input_file),
+                                      output=os.path.abspath(args.output) if args.output else None,
+                                      verify=not args.no_verify, emit=args.emit, source_map=args.source_map,
+                                      opt_level=args.opt_level, enable=args.enable_pass, disable=args.disable_pass)
+    except OSError as e:
+        print(f"❌ Error: cannot reach the compile server ({e}); start it with python -m src.server")
+        sys.exit(2)
+
+    if response['ok']:
+        print(f"\n✅ Compilation successful. Output written to {response['output']}")
+        sys.exit(0)
+    print("💥 Compilation error: " + "\n".join(response['diagnostics']))
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,32 +2,120 @@
 """
 CodeGenerator: Converts an AST from a C-like language into CMA assembly code.
 Supports variables, arithmetic, return, control flow, and expressions.
+
+Calling convention (one activation record per call):
+    caller:  push arguments in reverse order, then CALL f
+    callee:  ENTER m (frame size), STORER 0..n-1 to pop the arguments into
+             the parameter slots, then the body; RETURN leaves the return
+             value (if any) on top of the stack.
+Parameters and locals are addressed relative to the frame pointer with
+LOADR/STORER/LOADRC. Every statement leaves the operand stack balanced.
+
+Every emitted line is attributed to the innermost positioned AST node that
+produced it; source_map() turns that into a SourceMap over instructions.
 """
 
+import re
+
+from src.verifier import StackVerifier, split_line
+from src.sourcemap import SourceMap
+
+# AST tags that are expressions and therefore leave a value on the stack
+EXPRESSION_TAGS = ('BINOP', 'UNARYOP', 'VARIABLE', 'ARRAY_ACCESS',
+                   'INTEGER', 'FLOAT', 'CHAR', 'STRING')
+
+# Operands read as integers, as by the CMA text parser
+INT_PATTERN = re.compile(r'[-+]?\d+\Z')
+
+
 class CodeGenerator:
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, verify=False):
         self.code = []
         self.variables = {}
         self.next_var_pos = 0
+        self.frame_size = 0
+        self.functions = {}
         self.label_counter = 0
         self.continue_labels = []
         self.break_labels = []
         self.verbose = verbose
+        self.verify = verify
+        self.stack_info = None
+        self.positions = {}  # code line index → (line, column, function)
+        self.current_function = None
 
     def generate(self, ast):
         """Generate code from the AST"""
+        # Reset all per-program state so the same AST always yields the same code
         self.code = []
         self.variables = {}
         self.next_var_pos = 0
+        self.frame_size = 0
+        self.label_counter = 0
+        self.continue_labels = []
+        self.break_labels = []
+        self.stack_info = None
+        self.positions = {}
+        self.current_function = None
 
         if not isinstance(ast, list):
             raise TypeError(f"Expected AST to be a list of functions, got: {type(ast)}")
 
+        # Return types are needed to know whether a call leaves a value
+        self.functions = {node[1]: node[2] for node in ast if node[0] == 'FUNCTION'}
+
+        # Program entry: call main and halt with its return value on the stack
+        if 'main' in self.functions:
+            self.code.append("CALL main    // Program entry")
+            self.code.append("HALT")
+
         for node in ast:
             self.visit(node)
 
+        if self.verify:
+            self.verify_code()
+
         return '\n'.join(self.code)
 
+    def verify_code(self):
+        """Checks stack depths over the CFG and records the max depth per function."""
+        self.stack_info = StackVerifier(verbose=self.verbose).verify_lines(self.code)
+        return self.stack_info
+
+    def instructions(self):
+        """
+        The last generated code as (opcode, operand) pairs with labels as
+        ('label', name) and integer operands as ints: the shape the VM, the
+        verifier and the bytecode assembler take, without joining or
+        re-parsing the text.
+        """
+        program = []
+        for line in self.code:
+            pair = split_line(line)
+            if pair is None:
+                continue
+            operand = pair[1]
+            if operand is not None and INT_PATTERN.match(operand):
+                pair = (pair[0], int(operand))
+            program.append(pair)
+        return program
+
+    def generate_function(self, node, functions):
+        """
+        Code lines of one FUNCTION node on its own, with generated labels
+        numbered from 0; functions maps every called name to its return type.
+        Returns (lines, number of generated labels). The incremental compiler
+        renumbers the labels when it links blocks together.
+        """
+        self.code = []
+        self.functions = functions
+        self.label_counter = 0
+        self.continue_labels = []
+        self.break_labels = []
+        self.positions = {}
+        self.visit(node)
+        return self.code, self.label_counter
+
     def visit(self, node):
         """Visit a node and dispatch to the appropriate method"""
         if not isinstance(node, tuple):
@@ -37,7 +125,24 @@ class CodeGenerator:
         visitor = getattr(self, method_name, self.generic_visit)
         if self.verbose:
             print(f"Visiting {tag} → {node}")
-        return visitor(node)
+        start = len(self.code)
+        result = visitor(node)
+        lineno = getattr(node, 'lineno', None)
+        if lineno is not None:
+            # Inner nodes finish first, so they keep the lines they emitted
+            position = (lineno, node.column, self.current_function)
+            for index in range(start, len(self.code)):
+                self.positions.setdefault(index, position)
+        return result
+
+    def source_map(self, file=None):
+        """SourceMap of the last generated code, indexed by instruction."""
+        entries = []
+        for index, line in enumerate(self.code):
+            pair = split_line(line)
+            if pair is not None and pair[0] != 'label':
+                entries.append(self.positions.get(index))
+        return SourceMap(entries, file)
 
     def generic_visit(self, node):
         raise Exception(f"No visit method for {node[0]}")
@@ -46,58 +151,73 @@ class CodeGenerator:
         _, name, return_type, params, statements = node
         self.variables = {}
         self.next_var_pos = 0
+        self.current_function = name
 
-        # self.code.append(f"{name}:")
+        self.code.append(f"{name}:")
 
-        # Regular functions (with ENTER and RETURN)
-        total_stack_space = len(params)
-        self.code.append(f"ENTER {total_stack_space}")
-
-        num_locals = self._count_locals(statements)
-        if num_locals > 0:
-            self.code.append(f"ALLOC {num_locals}")
+        # Frame size is only known after the body; patched below
+        enter_index = len(self.code)
+        self.code.append("ENTER 0")
 
+        # Arguments were pushed in reverse, so the first one is on top
         param_offset = 0
         for param in params:
             _, _, param_name = param
             self.variables[param_name] = param_offset
+            self.code.append(f"STORER {param_offset}    // Parameter '{param_name}'")
             param_offset += 1
 
         self.next_var_pos = len(params)
+        self.frame_size = self.next_var_pos
 
         for stmt in statements:
-            self.visit(stmt)
+            self.visit_statement(stmt)
+
+        self.code[enter_index] = f"ENTER {self.frame_size}    // Frame of '{name}'"
 
         # Ensure functions always end with RETURN
-        if return_type == 'void' and (not statements or statements[-1][0] != 'RETURN'):
+        if not statements or statements[-1][0] != 'RETURN':
+            if return_type != 'void':
+                self.code.append("LOADC 0    // Missing return value")
             self.code.append("RETURN")
 
+    def visit_statement(self, node):
+        """Visit a node in statement position, discarding any value it leaves."""
+        if isinstance(node, list):  # Multiple VAR_DECLs
+            for stmt in node:
+                self.visit_statement(stmt)
+            return
+        self.visit(node)
+        if node[0] in EXPRESSION_TAGS or (
+                node[0] == 'CALL' and self.functions.get(node[1]) != 'void'):
+            self.code.append("POP    // Discard unused value")
+
     def visit_VAR_DECL(self, node):
         _, t, name = node
-        self.variables[name] = self.next_var_pos
-        self.next_var_pos += 1
+        self.variables[name] = self._reserve(1)
 
     def visit_VAR_DECL_INIT(self, node):
         _, t, name, expr = node
-        self.variables[name] = self.next_var_pos
-        var_pos = self.next_var_pos
-        self.next_var_pos += 1
+        var_pos = self._reserve(1)
+        self.variables[name] = var_pos
         self.visit(expr)
-        self.code.append(f"STOREA {var_pos}    // Initialize variable '{name}'")
+        self.code.append(f"STORER {var_pos}    // Initialize variable '{name}'")
 
     def visit_ARRAY_DECL(self, node):
         _, t, name, size_expr = node
-        if size_expr[0] != 'INTEGER':
+        if isinstance(size_expr, int):  # The parser keeps the raw INTEGER token
+            size = size_expr
+        elif size_expr[0] == 'INTEGER':
+            size = size_expr[1]
+        else:
             raise Exception("Only constant-size arrays supported for now")
-        
-        size = size_expr[1]
-        base_addr = self.next_var_pos
+
+        base_addr = self._reserve(size)
         self.variables[name] = {
             "kind": "array",
             "base": base_addr,
             "size": size
         }
-        self.next_var_pos += size
 
     def visit_ARRAY_ACCESS(self, node):
         _, name, index_expr = node
@@ -106,10 +226,10 @@ class CodeGenerator:
         array_info = self.variables[name]
         base = array_info["base"]
 
-        self.visit(index_expr)             # Push index
-        self.code.append(f"LOADC {base}")  # Push base
-        self.code.append("ADD")            # Compute address
-        self.code.append("LOADA")          # Load from address
+        self.visit(index_expr)              # Push index
+        self.code.append(f"LOADRC {base}")  # Push base address
+        self.code.append("ADD")             # Compute address
+        self.code.append("LOAD")            # Load from address
 
     def visit_ARRAY_ASSIGN(self, node):
         _, name, index_expr, value_expr = node
@@ -118,11 +238,11 @@ class CodeGenerator:
         array_info = self.variables[name]
         base = array_info["base"]
 
+        self.visit(value_expr)              # Push value
         self.visit(index_expr)              # Push index
-        self.code.append(f"LOADC {base}")   # Push base
+        self.code.append(f"LOADRC {base}")  # Push base address
         self.code.append("ADD")             # Compute address
-        self.visit(value_expr)              # Push value
-        self.code.append("STOREA")
+        self.code.append("STORE")
 
     def visit_ASSIGN(self, node):
         _, name, expr = node
@@ -130,24 +250,17 @@ class CodeGenerator:
             raise Exception(f"Undefined variable: {name}")
         offset = self.variables[name]
         self.visit(expr)
-        self.code.append(f"STOREA {offset}    // Store result into variable '{name}'")
+        self.code.append(f"STORER {offset}    // Store result into variable '{name}'")
 
     def visit_CALL(self, node):
         _, func_name, args = node
-        return_label = self._new_label("return_addr")
-    
+
         # Push arguments in reverse order onto the stack
         for arg in reversed(args):
             self.visit(arg)
 
-        # Push return address onto the stack (simulated)
-        self.code.append(f"LOADC {return_label}")
-        
-        # Jump to function
-        self.code.append(f"JUMP {func_name}")
-        
-        # Place return label here
-        self.code.append(f"{return_label}:")
+        # CALL saves the return address and frame pointer in a new frame
+        self.code.append(f"CALL {func_name}")
 
     def visit_RETURN(self, node):
         _, expr = node
@@ -160,7 +273,7 @@ class CodeGenerator:
         else_label = self._new_label("else")
         self.visit(cond)
         self.code.append(f"JUMPZ {else_label}    // Jump if condition is false")
-        self.visit(then)
+        self.visit_statement(then)
         self.code.append(f"{else_label}:")
 
     def visit_IF_ELSE(self, node, end_label=None):
@@ -176,7 +289,7 @@ class CodeGenerator:
         self.code.append(f"JUMPZ {else_label}    // Jump to else")
 
         # Then-block
-        self.visit(then)
+        self.visit_statement(then)
         self.code.append(f"JUMP {end_label}    // Skip else")
 
         # Else-block
@@ -186,7 +299,7 @@ class CodeGenerator:
         if otherwise[0] == 'IF_ELSE':
             self.visit_IF_ELSE(otherwise, end_label)
         else:
-            self.visit(otherwise)
+            self.visit_statement(otherwise)
 
         # Only place end_label if it's the outermost IF_ELSE
         if end_label not in self.code[-1]:
@@ -204,7 +317,7 @@ class CodeGenerator:
         self.code.append(f"{start_label}:")
         self.visit(cond)
         self.code.append(f"JUMPZ {end_label}    // Exit loop if condition is false")
-        self.visit(body)
+        self.visit_statement(body)
         self.code.append(f"JUMP {start_label}")
         self.code.append(f"{end_label}:")
 
@@ -214,7 +327,7 @@ class CodeGenerator:
 
     def visit_FOR(self, node):
         _, init, cond, update, body = node
-        self.visit(init)
+        self.visit_statement(init)
         start_label = self._new_label("for_start")
         end_label = self._new_label("for_end")
         continue_label = self._new_label("for_continue")
@@ -223,11 +336,12 @@ class CodeGenerator:
         self.break_labels.append(end_label)
 
         self.code.append(f"{start_label}:")
-        self.visit(cond)
-        self.code.append(f"JUMPZ {end_label}")
-        self.visit(body)
+        if cond[0] != 'EMPTY':  # for (;;) only ends by break or return
+            self.visit(cond)
+            self.code.append(f"JUMPZ {end_label}")
+        self.visit_statement(body)
         self.code.append(f"{continue_label}:")
-        self.visit(update)
+        self.visit_statement(update)
         self.code.append(f"JUMP {start_label}")
         self.code.append(f"{end_label}:")
 
@@ -248,7 +362,10 @@ class CodeGenerator:
     def visit_BLOCK(self, node):
         _, stmts = node
         for stmt in stmts:
-            self.visit(stmt)
+            self.visit_statement(stmt)
+
+    def visit_EMPTY(self, node):
+        pass
 
     def visit_BINOP(self, node):
         _, op, left, right = node
@@ -311,31 +428,14 @@ class CodeGenerator:
             else:
                 raise Exception(f"Unsupported variable structure for '{name}'")
 
-        self.code.append(f"LOADA {entry}    // Load variable '{name}'")
-
-    def _count_locals(self, statements):
-        """Counts VAR_DECL and VAR_DECL_INIT nodes in the given statements."""
-        count = 0
-
-        def recurse(stmts):
-            nonlocal count
-            for stmt in stmts:
-                tag = stmt[0]
-                if tag in ('VAR_DECL', 'VAR_DECL_INIT'):
-                    count += 1
-                elif tag == 'BLOCK':
-                    recurse(stmt[1])  # recurse into nested blocks
-                elif tag in ('IF', 'IF_ELSE', 'WHILE', 'FOR'):
-                    # recurse into potential nested statement(s)
-                    for sub_stmt in stmt[1:]:
-                        if isinstance(sub_stmt, tuple) and sub_stmt[0] in ('BLOCK', 'IF', 'IF_ELSE', 'WHILE', 'FOR'):
-                            recurse([sub_stmt])
-                        elif isinstance(sub_stmt, list):
-                            recurse(sub_stmt)
-
-        recurse(statements)
-        return count
+        self.code.append(f"LOADR {entry}    // Load variable '{name}'")
 
+    def _reserve(self, size):
+        """Reserves `size` frame cells and returns the relative address of the first."""
+        pos = self.next_var_pos
+        self.next_var_pos += size
+        self.frame_size = max(self.frame_size, self.next_var_pos)
+        return pos
 
     def _new_label(self, base):
         label = f"{base}_{self.label_counter}"
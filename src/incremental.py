@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+IncrementalCompiler: recompiles only the functions that changed between two
+versions of a program, for long-lived processes (editors, watch mode, the
+compile server).
+
+The source is split into top-level functions by a brace scanner that skips
+comments, strings and character literals. For every function the compiler
+keeps, keyed by its text:
+    the AST and the names it refers to (calls, variables, arrays)
+and, keyed by its text and the signatures of those names:
+    its semantic errors and its generated code block.
+A function is only re-parsed when its text changed, and only re-analyzed and
+re-generated when its text or the signature of something it refers to
+changed. The blocks are then linked: generated labels are numbered from 0 in
+every block and shifted by the labels of the blocks before it, which gives
+exactly the output of a full CodeGenerator run.
+
+AST positions are relative to the first line of each function, since a
+cached function may have moved. Sources that do not split cleanly are
+compiled as a whole.
+"""
+
+import re
+
+from src.parser import CParser
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.verifier import StackVerifier, split_line
+from src.pipeline import SemanticErrors
+
+# AST tags whose second element is a name looked up in the symbol table
+NAME_TAGS = ('CALL', 'VARIABLE', 'ASSIGN', 'ARRAY_ACCESS', 'ARRAY_ASSIGN')
+
+# Characters the function splitter has to look at; everything else is skipped
+_SPLIT_TOKENS = re.compile(r'//|/\*|[#"\'{}]')
+
+
+def split_functions(source):
+    """
+    Splits source text at the closing brace of every top-level function.
+    Returns the list of function texts (stripped), or None if the braces do
+    not balance.
+    """
+    chunks = []
+    depth = 0
+    start = 0
+    i = 0
+    search = _SPLIT_TOKENS.search
+    while True:
+        match = search(source, i)
+        if match is None:
+            break
+        token = match.group()
+        i = match.end()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                chunks.append(source[start:i].strip())
+                start = i
+        elif token == '/*':
+            end = source.find('*/', i)
+            if end < 0:
+                return None
+            i = end + 2
+        elif token == '"' or token == "'":
+            while i < len(source) and source[i] != token:
+                i += 2 if source[i] == '\\' else 1
+            i += 1
+        else:  # Line comment or preprocessor line
+            end = source.find('\n', i)
+            i = len(source) if end < 0 else end
+    if depth != 0 or source[start:].strip():
+        return None
+    return chunks
+
+
+def referenced_names(node, names=None):
+    """Every name a FUNCTION body looks up (variables, arrays and callees)."""
+    if names is None:
+        names = set()
+    if isinstance(node, list):
+        for item in node:
+            referenced_names(item, names)
+    elif isinstance(node, tuple) and node and isinstance(node[0], str):
+        if node[0] in NAME_TAGS:
+            names.add(node[1])
+        for item in node[1:]:
+            if isinstance(item, (tuple, list)):
+                referenced_names(item, names)
+    return names
+
+
+class _Block:
+    """Generated code of one function, with the positions of its label uses."""
+
+    __slots__ = ('errors', 'lines', 'label_count', 'label_lines', 'linked')
+
+    def __init__(self, errors, lines, label_count):
+        self.errors = errors
+        self.lines = lines
+        self.label_count = label_count
+        # Line 0 is the function's own label; every other label definition
+        # and every jump target is a generated label
+        self.label_lines = []
+        for index, line in enumerate(lines[1:], start=1):
+            pair = split_line(line)
+            if pair is not None and pair[0] in ('label', 'jump', 'jumpz'):
+                self.label_lines.append(index)
+        self.linked = (0, lines)  # (label offset, lines) of the last link
+
+    def link(self, offset):
+        """The lines with generated labels shifted by `offset`."""
+        if self.linked[0] == offset:
+            return self.linked[1]
+        lines = list(self.lines)
+        for index in self.label_lines:
+            lines[index] = _shift_label(lines[index], offset)
+        self.linked = (offset, lines)
+        return lines
+
+
+def _shift_label(line, offset):
+    stripped = line.lstrip()
+    indent = line[:len(line) - len(stripped)]
+    head, sep, rest = stripped.partition(' ')
+    if head.endswith(':'):  # Definition: "while_start_3:"
+        base, _, number = head[:-1].rpartition('_')
+        return f"{indent}{base}_{int(number) + offset}:{sep}{rest}"
+    target, sep2, comment = rest.partition(' ')  # Jump: "JUMPZ else_3    // ..."
+    base, _, number = target.rpartition('_')
+    return f"{indent}{head} {base}_{int(number) + offset}{sep2}{comment}"
+
+
+class IncrementalCompiler:
+    def __init__(self, verify=False):
+        self.verify = verify
+        self.parser = CParser()
+        self.asts = {}    # function text → (AST node, referenced names, header)
+        self.blocks = {}  # (function text, signatures it depends on) → _Block
+        # Result of the signature pass, valid while the headers are unchanged
+        self.headers = None
+        self.header_errors = []
+        self.signatures = {}
+        self.dependencies = {}  # function text → signatures it depends on
+        self.stack_info = None
+        self.stats = {}
+
+    def compile(self, source):
+        """Compiles a whole program to CMA text, reusing unchanged functions."""
+        chunks = split_functions(source)
+        nodes = self._parse(chunks) if chunks else None
+        if nodes is None:
+            return self._compile_whole(source)
+
+        # Signatures only change when a function header does
+        headers = [self.asts[chunk][2] for chunk in chunks]
+        if headers != self.headers:
+            analyzer = SemanticAnalyzer()
+            analyzer.declare_functions(nodes)
+            self.headers = headers
+            self.header_errors = analyzer.errors
+            self.signatures = analyzer.signatures()
+            self.dependencies = {}
+        signatures = self.signatures
+        errors = list(self.header_errors)
+
+        blocks = {}
+        linked = []
+        offset = 0
+        generated = 0
+        for chunk, node in zip(chunks, nodes):
+            dependencies = self.dependencies.get(chunk)
+            if dependencies is None:
+                names = self.asts[chunk][1]
+                dependencies = self.dependencies[chunk] = tuple(sorted(
+                    (name, signatures[name]) for name in names if name in signatures))
+            key = (chunk, dependencies)
+            block = self.blocks.get(key)
+            if block is None:
+                block = self._generate(node, dict(dependencies))
+                generated += 1
+            blocks[key] = block
+            errors.extend(block.errors)
+            linked.extend(block.link(offset))
+            offset += block.label_count
+
+        # Only what this version uses is kept
+        self.asts = {chunk: self.asts[chunk] for chunk in chunks}
+        self.blocks = blocks
+        if len(self.dependencies) > len(chunks):
+            self.dependencies = {chunk: self.dependencies[chunk] for chunk in chunks}
+        self.stats['functions'] = len(chunks)
+        self.stats['generated'] = generated
+        self.stats['reused'] = len(chunks) - generated
+
+        if errors:
+            raise SemanticErrors(errors)
+        code = (["CALL main    // Program entry", "HALT"] if 'main' in signatures else []) + linked
+        if self.verify:
+            self.stack_info = StackVerifier().verify_lines(code)
+        return '\n'.join(code)
+
+    def _parse(self, chunks):
+        """FUNCTION nodes of all chunks, parsing only new texts; None if a chunk is not one function."""
+        nodes = []
+        parsed = 0
+        for chunk in chunks:
+            entry = self.asts.get(chunk)
+            if entry is None:
+                ast = self.parser.parse(chunk)
+                if len(ast) != 1 or ast[0][0] != 'FUNCTION':
+                    return None
+                node = ast[0]
+                entry = self.asts[chunk] = (node, frozenset(referenced_names(node[4])),
+                                            (node[1], node[2], tuple(node[3])))
+                parsed += 1
+            nodes.append(entry[0])
+        self.stats['parsed'] = parsed
+        return nodes
+
+    def _generate(self, node, signatures):
+        errors = SemanticAnalyzer().analyze_function(node, signatures)
+        if errors:
+            return _Block(errors, [], 0)
+        return_types = {name: signature[0] for name, signature in signatures.items()}
+        lines, label_count = CodeGenerator().generate_function(node, return_types)
+        return _Block([], lines, label_count)
+
+    def _compile_whole(self, source):
+        ast = self.parser.parse(source)
+        errors = SemanticAnalyzer().analyze(ast)
+        if errors:
+            raise SemanticErrors(errors)
+        generator = CodeGenerator(verify=self.verify)
+        code = generator.generate(ast)
+        self.stack_info = generator.stack_info
+        self.asts = {}
+        self.blocks = {}
+        self.headers = None
+        self.stats = {'functions': len(ast), 'parsed': len(ast), 'generated': len(ast), 'reused': 0}
+        return code
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+PassTimer: per-phase instrumentation of the compiler (--time-passes,
+--mem-report).
+
+Every phase records wall time and CPU time; with memory=True also the
+allocation peak and the memory still held at its end (tracemalloc), and the
+change in the number of live objects tracked by the garbage collector.
+Phases may nest; time spent in a nested phase is not counted twice.
+Lexing runs interleaved with parsing, so it is timed per token through a
+wrapper on the lexer and split out of the parse phase.
+
+When instrumentation is off, compile_file uses NULL_TIMER, whose phase()
+returns one shared no-op context manager.
+"""
+
+import gc
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullTimer:
+    """Instrumentation switched off."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def lexing(self, lexer):
+        return _NULL_CONTEXT
+
+
+NULL_TIMER = NullTimer()
+
+
+class PassTimer:
+    enabled = True
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}  # name → totals, in first-seen order
+        self._stack = []
+        self._started_tracing = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def close(self):
+        """Stops tracemalloc if this timer started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _record(self, name, wall, cpu, peak=None, retained=None, objects=None):
+        entry = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'runs': 0})
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        entry['runs'] += 1
+        if peak is not None:
+            entry['peak'] = max(entry.get('peak', 0), peak)
+            entry['retained'] = entry.get('retained', 0) + retained
+            entry['objects'] = entry.get('objects', 0) + objects
+        if self._stack:
+            # The enclosing phase does not count this time again
+            self._stack[-1][0] += wall
+            self._stack[-1][1] += cpu
+
+    @contextmanager
+    def phase(self, name):
+        frame = [0.0, 0.0, 0]  # Wall and CPU time of nested phases, highest traced peak
+        if self.memory:
+            objects = len(gc.get_objects())
+            current = tracemalloc.get_traced_memory()[0]
+            if self._stack:
+                # reset_peak() below would lose the enclosing phase's peak so far
+                self._stack[-1][2] = max(self._stack[-1][2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._stack.pop()
+            if self.memory:
+                end, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame[2])
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+                self._record(name, wall - frame[0], cpu - frame[1],
+                             peak - current, end - current, len(gc.get_objects()) - objects)
+            else:
+                self._record(name, wall - frame[0], cpu - frame[1])
+
+    @contextmanager
+    def lexing(self, lexer):
+        """Times every token() call of a PLY lexer while the block runs, as phase 'lex'."""
+        token = lexer.token
+        totals = [0.0, 0.0, 0]
+        perf_counter = time.perf_counter
+        process_time = time.process_time
+
+        def timed_token():
+            wall = perf_counter()
+            cpu = process_time()
+            tok = token()
+            totals[0] += perf_counter() - wall
+            totals[1] += process_time() - cpu
+            totals[2] += 1
+            return tok
+
+        lexer.token = timed_token  # Instance attribute; yacc looks it up per parse
+        try:
+            yield
+        finally:
+            del lexer.token
+            self._record('lex', totals[0], totals[1])
+            self.phases['lex']['tokens'] = self.phases['lex'].get('tokens', 0) + totals[2]
+
+    def total(self):
+        return sum(entry['wall'] for entry in self.phases.values())
+
+    def to_dict(self):
+        return {'total_wall': self.total(),
+                'total_cpu': sum(entry['cpu'] for entry in self.phases.values()),
+                'phases': {name: dict(entry) for name, entry in self.phases.items()}}
+
+    def report(self):
+        """Human-readable table, one row per phase."""
+        total = self.total() or 1.0
+        header = f"{'Phase':<12} {'Wall ms':>9} {'CPU ms':>9} {'%':>6}"
+        if self.memory:
+            header += f" {'Peak KiB':>10} {'Held KiB':>10} {'Objects':>9}"
+        lines = ["===-- Compiler phases --===", header]
+        for name, entry in self.phases.items():
+            line = (f"{name:<12} {entry['wall'] * 1e3:>9.2f} {entry['cpu'] * 1e3:>9.2f} "
+                    f"{entry['wall'] / total * 100:>5.1f}%")
+            if self.memory:
+                if 'peak' in entry:
+                    line += (f" {entry['peak'] / 1024:>10.1f} {entry['retained'] / 1024:>10.1f}"
+                             f" {entry['objects']:>9}")
+                else:
+                    line += f" {'-':>10} {'-':>10} {'-':>9}"
+            lines.append(line)
+        lines.append(f"{'total':<12} {self.total() * 1e3:>9.2f} "
+                     f"{sum(e['cpu'] for e in self.phases.values()) * 1e3:>9.2f}")
+        return '\n'.join(lines)
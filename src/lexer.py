@@ -9,8 +9,6 @@ string and character literals, as well as C-style constructs such as pointers,
 arrays, and struct access.
 """
 
-import ply.lex as lex
-
 
 class CLexer:
     # === List of Token Names ===
@@ -117,6 +115,7 @@ class CLexer:
         Builds the lexer using PLY's lex() function.
         Call this before using tokenize() or test().
         """
+        import ply.lex as lex  # Deferred until a lexer is actually needed
         self.lexer = lex.lex(module=self, **kwargs)
         return self.lexer
 
@@ -4,8 +4,6 @@ CParser: A PLY-based parser for a C-like language.
 Generates an Abstract Syntax Tree (AST) from source code.
 """
 
-import pprint
-import ply.yacc as yacc
 from src.lexer import CLexer
 
 # ============================================
@@ -31,6 +29,25 @@ from src.lexer import CLexer
 # ('INTEGER', value) / ('FLOAT', value) / ('CHAR', value) / ('STRING', value)
 # ('VARIABLE', name)
 # ('EMPTY',)
+#
+# Nodes are Node tuples: they compare and unpack like plain tuples and also
+# carry the source position of their first token as .lineno and .column.
+
+
+class Node(tuple):
+    """AST tuple with a source position (1-based line and column)."""
+
+    lineno = None
+    column = None
+
+    @property
+    def position(self):
+        return (self.lineno, self.column)
+
+
+def _column(text, lexpos):
+    """1-based column of an absolute offset into the source text."""
+    return lexpos - text.rfind('\n', 0, lexpos)
 
 
 class CParser:
@@ -40,19 +57,38 @@ class CParser:
         self.verbose = verbose
         self.lexer = CLexer()
         self.tokens = self.lexer.tokens
-        self.lexer.build()
-        self.parser = yacc.yacc(module=self, debug=verbose)
+        self.parser = None  # Built on first use, see build()
+
+    def build(self):
+        """Builds the lexer and loads the parse tables; parse() does this on first use."""
+        if self.parser is None:
+            import ply.yacc as yacc  # Deferred: importing and loading tables dominates startup
+            self.lexer.build()
+            self.parser = yacc.yacc(module=self, debug=self.verbose)
+        return self
 
     def parse(self, text):
+        self.build()
         if self.verbose:
             print("\n📥 Parsing input:")
             print(text)
-        result = self.parser.parse(text, lexer=self.lexer.lexer)
+        self.lexer.lexer.lineno = 1
+        # tracking=True gives nonterminals the position of their first token
+        result = self.parser.parse(text, lexer=self.lexer.lexer, tracking=True)
         if self.verbose:
+            import pprint
             print("\n✅ Parse result:")
             pprint.pprint(result)
         return result
 
+    def _node(self, p, *items):
+        """Builds an AST node positioned at the first symbol of the production."""
+        node = Node(items)
+        lexpos = p.lexpos(1) if len(p) > 1 else p.lexer.lexpos
+        node.lineno = p.lineno(1) if len(p) > 1 else p.lexer.lineno
+        node.column = _column(p.lexer.lexdata, lexpos)
+        return node
+
     precedence = (
         ('left', 'OR'),
         ('left', 'AND'),
@@ -72,7 +108,7 @@ class CParser:
 
     def p_function(self, p):
         'function : TYPE IDENTIFIER LPAREN parameters RPAREN LBRACE statements RBRACE'
-        p[0] = ('FUNCTION', p[2], p[1], p[4], p[7])
+        p[0] = self._node(p, 'FUNCTION', p[2], p[1], p[4], p[7])
         if self.verbose:
             print(f"Reduced: function → {p[1]} {p[2]}({p[4]}) {{...}}")
 
@@ -91,7 +127,7 @@ class CParser:
 
     def p_parameter(self, p):
         'parameter : TYPE IDENTIFIER'
-        p[0] = ('PARAM', p[1], p[2])
+        p[0] = self._node(p, 'PARAM', p[1], p[2])
         if self.verbose:
             print("Reduced: parameter →", p[0])
 
@@ -131,7 +167,7 @@ class CParser:
                      | expression SEMICOLON
                      | SEMICOLON'''
         if p.slice[1].type == 'SEMICOLON':
-            p[0] = ('EMPTY',)
+            p[0] = self._node(p, 'EMPTY')
         elif len(p) == 3 and p.slice[1].type not in ('TYPE',):  # expression SEMICOLON
             p[0] = p[1]
         elif isinstance(p[1], list):  # Multiple VAR_DECLs
@@ -143,13 +179,13 @@ class CParser:
 
     def p_block_statement(self, p):
         'block_statement : LBRACE statements RBRACE'
-        p[0] = ('BLOCK', p[2])
+        p[0] = self._node(p, 'BLOCK', p[2])
         if self.verbose:
             print("Reduced: block_statement →", p[0])
 
     def p_for_statement(self, p):
         'for_statement : FOR LPAREN optional_expression SEMICOLON optional_expression SEMICOLON optional_expression RPAREN statement'
-        p[0] = ('FOR', p[3], p[5], p[7], p[9])
+        p[0] = self._node(p, 'FOR', p[3], p[5], p[7], p[9])
         if self.verbose:
             print("Reduced: for_statement →", p[0])
 
@@ -160,15 +196,15 @@ class CParser:
                                  | TYPE MUL IDENTIFIER ASSIGN expression SEMICOLON
                                  | TYPE IDENTIFIER LBRACKET INTEGER RBRACKET SEMICOLON'''
         if len(p) == 4:
-            p[0] = [('VAR_DECL', p[1], name) for name in p[2]]
+            p[0] = [self._node(p, 'VAR_DECL', p[1], name) for name in p[2]]
         elif len(p) == 5 and p.slice[2].type == 'MUL':
-            p[0] = ('VAR_DECL', p[1] + '*', p[3]) 
+            p[0] = self._node(p, 'VAR_DECL', p[1] + '*', p[3])
         elif len(p) == 6:
-            p[0] = ('VAR_DECL_INIT', p[1], p[2], p[4])
+            p[0] = self._node(p, 'VAR_DECL_INIT', p[1], p[2], p[4])
         elif len(p) == 7 and p.slice[2].type == 'MUL':
-            p[0] = ('VAR_DECL_INIT', p[1] + '*', p[3], p[5])
+            p[0] = self._node(p, 'VAR_DECL_INIT', p[1] + '*', p[3], p[5])
         elif len(p) == 7:
-            p[0] = ('ARRAY_DECL', p[1], p[2], p[4])
+            p[0] = self._node(p, 'ARRAY_DECL', p[1], p[2], p[4])
         if self.verbose:
             print("Reduced: variable_declaration →", p[0])
 
@@ -182,23 +218,23 @@ class CParser:
 
     def p_assignment_statement(self, p):
         'assignment_statement : IDENTIFIER ASSIGN expression SEMICOLON'
-        p[0] = ('ASSIGN', p[1], p[3])
+        p[0] = self._node(p, 'ASSIGN', p[1], p[3])
         if self.verbose:
             print("Reduced: assignment_statement →", p[0])
     
     def p_array_assignment_statement(self, p):
         'assignment_statement : IDENTIFIER LBRACKET expression RBRACKET ASSIGN expression SEMICOLON'
-        p[0] = ('ARRAY_ASSIGN', p[1], p[3], p[6])
+        p[0] = self._node(p, 'ARRAY_ASSIGN', p[1], p[3], p[6])
 
     def p_return_statement(self, p):
         'return_statement : RETURN expression SEMICOLON'
-        p[0] = ('RETURN', p[2])
+        p[0] = self._node(p, 'RETURN', p[2])
         if self.verbose:
             print("Reduced: return_statement →", p[0])
 
     def p_return_void(self, p):
         'return_statement : RETURN SEMICOLON'
-        p[0] = ('RETURN', None)
+        p[0] = self._node(p, 'RETURN', None)
         if self.verbose:
             print("Reduced: return_statement → ('RETURN', None)")
 
@@ -206,27 +242,27 @@ class CParser:
         '''if_statement : IF LPAREN expression RPAREN statement
                         | IF LPAREN expression RPAREN statement ELSE statement'''
         if len(p) == 6:
-            p[0] = ('IF', p[3], p[5])
+            p[0] = self._node(p, 'IF', p[3], p[5])
         else:
-            p[0] = ('IF_ELSE', p[3], p[5], p[7])
+            p[0] = self._node(p, 'IF_ELSE', p[3], p[5], p[7])
         if self.verbose:
             print("Reduced: if_statement →", p[0])
 
     def p_while_statement(self, p):
         'while_statement : WHILE LPAREN expression RPAREN statement'
-        p[0] = ('WHILE', p[3], p[5])
+        p[0] = self._node(p, 'WHILE', p[3], p[5])
         if self.verbose:
             print("Reduced: while_statement →", p[0])
 
     def p_break_statement(self, p):
         'break_statement : BREAK SEMICOLON'
-        p[0] = ('BREAK',)
+        p[0] = self._node(p, 'BREAK')
         if self.verbose:
             print("Reduced: break_statement → BREAK")
 
     def p_continue_statement(self, p):
         'continue_statement : CONTINUE SEMICOLON'
-        p[0] = ('CONTINUE',)
+        p[0] = self._node(p, 'CONTINUE')
         if self.verbose:
             print("Reduced: continue_statement → CONTINUE")
 
@@ -271,42 +307,43 @@ class CParser:
         token_type = p.slice[1].type
         if len(p) == 2:
             if token_type == 'INTEGER':
-                p[0] = ('INTEGER', p[1])
+                p[0] = self._node(p, 'INTEGER', p[1])
             elif token_type == 'FLOAT':
-                p[0] = ('FLOAT', p[1])
+                p[0] = self._node(p, 'FLOAT', p[1])
             elif token_type == 'CHAR':
-                p[0] = ('CHAR', p[1])
+                p[0] = self._node(p, 'CHAR', p[1])
             elif token_type == 'STRING':
-                p[0] = ('STRING', p[1])
+                p[0] = self._node(p, 'STRING', p[1])
             else:
-                p[0] = ('VARIABLE', p[1])
+                p[0] = self._node(p, 'VARIABLE', p[1])
         elif len(p) == 3:
             if token_type == 'MINUS':
-                p[0] = ('UNARYOP', '-', p[2])
+                p[0] = self._node(p, 'UNARYOP', '-', p[2])
             elif token_type == 'NOT':
-                p[0] = ('UNARYOP', '!', p[2])
+                p[0] = self._node(p, 'UNARYOP', '!', p[2])
         elif len(p) == 4 and p[1] == '(':
             p[0] = p[2]
         elif len(p) == 4 and p.slice[2].type == 'ASSIGN':
-            p[0] = ('ASSIGN', p[1], p[3])
+            p[0] = self._node(p, 'ASSIGN', p[1], p[3])
         elif len(p) == 5 and p.slice[2].type == 'LPAREN':
-            p[0] = ('CALL', p[1], p[3])
+            p[0] = self._node(p, 'CALL', p[1], p[3])
         elif len(p) == 5 and p.slice[2].type == 'LBRACKET':
-            p[0] = ('ARRAY_ACCESS', p[1], p[3])
+            p[0] = self._node(p, 'ARRAY_ACCESS', p[1], p[3])
         else:
-            p[0] = ('BINOP', p[2], p[1], p[3])
+            p[0] = self._node(p, 'BINOP', p[2], p[1], p[3])
         if self.verbose:
             print("Reduced: expression →", p[0])
     
     def p_optional_expression(self, p):
         '''optional_expression : expression
                                | empty'''
-        p[0] = p[1] if p[1] is not None else ('EMPTY',)
+        p[0] = p[1] if p[1] is not None else self._node(p, 'EMPTY')
 
     def p_error(self, p):
         if p:
-            print(f"❌ Syntax error at token '{p.type}' (value: '{p.value}') at line {p.lineno}, column {p.lexpos}")
-            raise SyntaxError(f"Syntax error at token '{p.type}' (value: '{p.value}') at line {p.lineno}, column {p.lexpos}")
+            column = _column(self.lexer.lexer.lexdata, p.lexpos)
+            print(f"❌ Syntax error at token '{p.type}' (value: '{p.value}') at line {p.lineno}, column {column}")
+            raise SyntaxError(f"Syntax error at token '{p.type}' (value: '{p.value}') at line {p.lineno}, column {column}")
 
         else:
             print("❌ Syntax error at EOF")
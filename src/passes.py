@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+PassManager: optimization levels and the passes they run.
+
+Passes work on one of three IRs:
+    ast    the checked AST (Node tuples); a pass returns a new tree
+    ssa    the SSA Module of src/ssa.py; when any SSA pass is enabled, code
+           is generated through it instead of CodeGenerator.generate
+    code   the generated CMA lines together with the source position of
+           each line (Code), rewritten in place
+Every pass reports how many changes it made. The registry below fixes the
+order; a level runs every pass registered at or below it, and single passes
+can be enabled or disabled on top of that:
+
+    -O0  nothing
+    -O1  fold (constant folding), unreachable (code after JUMP/RETURN/HALT),
+         peephole (jumps to the next line, pushes that are popped, x+0, x*1,
+         branches on constants)
+    -O2  also cse (common subexpressions), dce (dead SSA values),
+         jump-thread (jumps to jumps) and labels (unused labels)
+
+With debug=True the IR is verified after every pass: the AST must still pass
+semantic analysis, the SSA form ssa.verify and the code the StackVerifier.
+Each pass is timed into the PassTimer given to run_ast / generate / run_code
+(so --time-passes shows them) and into the manager's own stats.
+"""
+
+import io
+import time
+import contextlib
+
+from src.parser import Node
+from src.verifier import StackVerifier, VerificationError, split_line
+from src.instrument import NULL_TIMER
+from src import ssa
+
+AST = 'ast'
+SSA = 'ssa'
+CODE = 'code'
+
+MAX_LEVEL = 2
+
+
+class PassError(Exception):
+    """A pass left the IR in an invalid state (debug mode)."""
+
+
+class Pass:
+    name = None
+    kind = None
+    level = 1
+    description = ''
+
+    def run(self, ir):
+        """Returns (ir, number of changes)."""
+        raise NotImplementedError
+
+
+class Code:
+    """Generated CMA lines and the source position (or None) of each line."""
+
+    def __init__(self, lines, positions):
+        self.lines = lines
+        self.positions = positions
+
+    @classmethod
+    def from_generator(cls, generator):
+        return cls(list(generator.code), [generator.positions.get(i) for i in range(len(generator.code))])
+
+    def to_generator(self, generator):
+        generator.code = self.lines
+        generator.positions = {i: p for i, p in enumerate(self.positions) if p is not None}
+
+    def pairs(self):
+        return [split_line(line) for line in self.lines]
+
+
+def _with_operand(line, operand):
+    """The instruction line with its operand replaced, keeping indentation and comment."""
+    code, sep, comment = line.partition('//')
+    stripped = code.strip()
+    indent = code[:len(code) - len(code.lstrip())]
+    head = stripped.split()[0]
+    return f"{indent}{head} {operand}" + (f"    //{comment}" if sep else "")
+
+
+def _int_operand(pair):
+    try:
+        return int(pair[1])
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================
+# AST passes
+# ============================================
+
+def _fold_binop(op, a, b):
+    """C semantics on ints; None where folding could change behavior."""
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op in ('/', '%'):
+        if a < 0 or b <= 0:
+            return None  # The VM floors, C truncates; division by zero is left alone
+        return a // b if op == '/' else a % b
+    comparisons = {'==': a == b, '!=': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b,
+                   '&&': bool(a) and bool(b), '||': bool(a) or bool(b)}
+    if op in comparisons:
+        return int(comparisons[op])
+    return None
+
+
+class ConstantFolding(Pass):
+    name = 'fold'
+    kind = AST
+    level = 1
+    description = 'Evaluate operators on integer literals'
+
+    def run(self, ast):
+        self.changes = 0
+        return [self._fold(node) for node in ast], self.changes
+
+    def _fold(self, node):
+        if isinstance(node, list):
+            return [self._fold(item) for item in node]
+        if not (isinstance(node, tuple) and node and isinstance(node[0], str)):
+            return node
+        items = [self._fold(item) if isinstance(item, (tuple, list)) else item for item in node[1:]]
+        tag = node[0]
+        value = None
+        if tag == 'BINOP' and items[1][0] == 'INTEGER' and items[2][0] == 'INTEGER':
+            value = _fold_binop(items[0], items[1][1], items[2][1])
+        elif tag == 'UNARYOP' and items[1][0] == 'INTEGER':
+            value = -items[1][1] if items[0] == '-' else int(items[1][1] == 0)
+        if value is not None:
+            self.changes += 1
+            return _positioned(('INTEGER', value), node)
+        if all(new is old for new, old in zip(items, node[1:])):
+            return node
+        return _positioned((tag, *items), node)
+
+
+def _positioned(items, like):
+    node = Node(items)
+    node.lineno = getattr(like, 'lineno', None)
+    node.column = getattr(like, 'column', None)
+    return node
+
+
+# ============================================
+# SSA passes
+# ============================================
+
+class CommonSubexpressions(Pass):
+    name = 'cse'
+    kind = SSA
+    level = 2
+    description = 'Reuse pure expressions computed in a dominating position'
+
+    def run(self, module):
+        return module, sum(ssa.eliminate_common_subexpressions(function) for function in module.functions)
+
+
+class DeadCodeElimination(Pass):
+    name = 'dce'
+    kind = SSA
+    level = 2
+    description = 'Remove SSA values whose results are never used'
+
+    def run(self, module):
+        return module, sum(ssa.eliminate_dead_code(function) for function in module.functions)
+
+
+# ============================================
+# Code passes
+# ============================================
+
+class UnreachableCode(Pass):
+    name = 'unreachable'
+    kind = CODE
+    level = 1
+    description = 'Remove instructions after JUMP, RETURN or HALT up to the next label'
+
+    def run(self, code):
+        lines, positions = [], []
+        reachable = True
+        changes = 0
+        for line, position, pair in zip(code.lines, code.positions, code.pairs()):
+            if pair is not None and pair[0] == 'label':
+                reachable = True
+            elif not reachable:
+                changes += pair is not None
+                continue
+            lines.append(line)
+            positions.append(position)
+            if pair is not None and pair[0] in ('jump', 'return', 'halt'):
+                reachable = False
+        code.lines, code.positions = lines, positions
+        return code, changes
+
+
+class Peephole(Pass):
+    name = 'peephole'
+    kind = CODE
+    level = 1
+    description = 'Local rewrites of adjacent instructions'
+
+    def run(self, code):
+        total = 0
+        while True:
+            changes = self._once(code)
+            if not changes:
+                return code, total
+            total += changes
+
+    def _once(self, code):
+        lines, positions = [], []
+        pairs = code.pairs()
+        changes = 0
+        i = 0
+        n = len(pairs)
+        while i < n:
+            pair = pairs[i]
+            following = pairs[i + 1] if i + 1 < n else None
+            if pair is not None and following is not None:
+                opcode, next_opcode = pair[0], following[0]
+                if opcode == 'jump' and following == ('label', pair[1]):
+                    changes += 1  # Jump to the next line
+                    i += 1
+                    continue
+                if opcode in ('loadc', 'loadr', 'loadrc') and next_opcode == 'pop':
+                    changes += 1  # Value pushed only to be discarded
+                    i += 2
+                    continue
+                constant = _int_operand(pair) if opcode == 'loadc' else None
+                if (constant == 0 and next_opcode in ('add', 'sub')) or (constant == 1 and next_opcode in ('mul', 'div')):
+                    changes += 1  # Identity operation
+                    i += 2
+                    continue
+                if constant is not None and next_opcode == 'jumpz':
+                    changes += 1  # Branch on a constant
+                    if constant == 0:
+                        lines.append(_with_operand(code.lines[i + 1].replace('JUMPZ', 'JUMP', 1), following[1]))
+                        positions.append(code.positions[i + 1])
+                    i += 2
+                    continue
+            lines.append(code.lines[i])
+            positions.append(code.positions[i])
+            i += 1
+        code.lines, code.positions = lines, positions
+        return changes
+
+
+class JumpThreading(Pass):
+    name = 'jump-thread'
+    kind = CODE
+    level = 2
+    description = 'Retarget jumps whose target is an unconditional jump'
+
+    def run(self, code):
+        pairs = code.pairs()
+        # Label → the instruction it labels
+        labelled = {}
+        waiting = []
+        for pair in pairs:
+            if pair is None:
+                continue
+            if pair[0] == 'label':
+                waiting.append(pair[1])
+            else:
+                for label in waiting:
+                    labelled[label] = pair
+                waiting = []
+
+        def final_target(label):
+            seen = {label}
+            while True:
+                pair = labelled.get(label)
+                if pair is None or pair[0] != 'jump' or pair[1] in seen:
+                    return label
+                label = pair[1]
+                seen.add(label)
+
+        changes = 0
+        for index, pair in enumerate(pairs):
+            if pair is not None and pair[0] in ('jump', 'jumpz'):
+                target = final_target(pair[1])
+                if target != pair[1]:
+                    code.lines[index] = _with_operand(code.lines[index], target)
+                    changes += 1
+        return code, changes
+
+
+class UnusedLabels(Pass):
+    name = 'labels'
+    kind = CODE
+    level = 2
+    description = 'Remove labels that nothing refers to (function labels are kept)'
+
+    def run(self, code):
+        pairs = code.pairs()
+        used = {pair[1] for pair in pairs if pair is not None and pair[0] != 'label' and pair[1] is not None}
+        lines, positions = [], []
+        changes = 0
+        for index, pair in enumerate(pairs):
+            if pair is not None and pair[0] == 'label' and pair[1] not in used:
+                following = next((p for p in pairs[index + 1:] if p is not None and p[0] != 'label'), None)
+                if following is None or following[0] != 'enter':
+                    changes += 1
+                    continue
+            lines.append(code.lines[index])
+            positions.append(code.positions[index])
+        code.lines, code.positions = lines, positions
+        return code, changes
+
+
+# Pipeline order; a level runs every pass registered at or below it
+PASSES = [ConstantFolding(), CommonSubexpressions(), DeadCodeElimination(), UnreachableCode(), JumpThreading(), Peephole(), UnusedLabels()]
+
+
+def pass_names():
+    return [p.name for p in PASSES]
+
+
+class PassManager:
+    def __init__(self, opt_level=0, enable=(), disable=(), debug=False):
+        if not 0 <= opt_level <= MAX_LEVEL:
+            raise ValueError(f"Unknown optimization level -O{opt_level} (expected 0 to {MAX_LEVEL})")
+        unknown = (set(enable) | set(disable)) - set(pass_names())
+        if unknown:
+            raise ValueError(f"Unknown pass(es): {', '.join(sorted(unknown))} (available: {', '.join(pass_names())})")
+        self.opt_level = opt_level
+        self.enable = frozenset(enable)
+        self.disable = frozenset(disable)
+        self.debug = debug
+        self.passes = [p for p in PASSES
+                       if (p.level <= opt_level or p.name in self.enable) and p.name not in self.disable]
+        self.stats = {}  # pass name → seconds, changes, runs
+
+    def signature(self):
+        """Identifies the output-relevant configuration (for cache keys)."""
+        return f"O{self.opt_level}:" + ','.join(p.name for p in self.passes)
+
+    def _run(self, kind, ir, timer, verify):
+        for p in self.passes:
+            if p.kind != kind:
+                continue
+            start = time.perf_counter()
+            with timer.phase(p.name):
+                ir, changes = p.run(ir)
+            entry = self.stats.setdefault(p.name, {'seconds': 0.0, 'changes': 0, 'runs': 0})
+            entry['seconds'] += time.perf_counter() - start
+            entry['changes'] += changes
+            entry['runs'] += 1
+            if self.debug:
+                try:
+                    verify(ir)
+                except (VerificationError, PassError) as e:
+                    raise PassError(f"Invalid {kind} IR after pass '{p.name}': {e}") from e
+        return ir
+
+    def run_ast(self, ast, timer=NULL_TIMER):
+        """Runs the AST passes; returns the new AST."""
+        return self._run(AST, ast, timer, _verify_ast)
+
+    def generate(self, generator, ast, timer=NULL_TIMER):
+        """
+        Generates code for a checked AST into the CodeGenerator, through the
+        SSA IR when SSA passes are enabled, then runs the code passes.
+        """
+        if any(p.kind == SSA for p in self.passes):
+            with timer.phase('ssa'):
+                module = ssa.build(ast)
+            if self.debug:
+                _verify_ssa(module)
+            module = self._run(SSA, module, timer, _verify_ssa)
+            with timer.phase('codegen'):
+                generator.code, generator.positions = ssa.lower(module)
+        else:
+            with timer.phase('codegen'):
+                generator.generate(ast)
+        self.run_code(generator, timer)
+
+    def run_code(self, generator, timer=NULL_TIMER):
+        """Runs the code passes over a CodeGenerator's code and source positions, in place."""
+        if not any(p.kind == CODE for p in self.passes):
+            return
+        code = self._run(CODE, Code.from_generator(generator), timer, _verify_code)
+        code.to_generator(generator)
+
+    def report(self):
+        lines = [f"===-- Optimization passes (-O{self.opt_level}) --===",
+                 f"{'Pass':<12} {'Changes':>8} {'ms':>9}"]
+        for p in self.passes:
+            entry = self.stats.get(p.name, {'seconds': 0.0, 'changes': 0})
+            lines.append(f"{p.name:<12} {entry['changes']:>8} {entry['seconds'] * 1e3:>9.2f}")
+        return '\n'.join(lines)
+
+
+def _verify_ast(ast):
+    from src.semantics import SemanticAnalyzer
+    with contextlib.redirect_stdout(io.StringIO()):  # The analyzer prints debug output
+        errors = SemanticAnalyzer().analyze(ast)
+    if errors:
+        raise PassError('; '.join(errors))
+
+
+def _verify_ssa(module):
+    try:
+        ssa.verify(module)
+    except ssa.SSAError as e:
+        raise PassError(str(e)) from e
+
+
+def _verify_code(code):
+    StackVerifier().verify_lines(code.lines)
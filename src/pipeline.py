@@ -0,0 +1,54 @@
+"""
+The compiler pipeline on one source text: parsing, semantic analysis, the
+optimization passes, code generation and stack verification. compiler.py,
+build mode (src/build.py) and the compile server (src/server.py) all compile
+through compile_source, so their output is the same for the same options.
+"""
+
+from src.semantics import SemanticAnalyzer
+from src.codegen import CodeGenerator
+from src.instrument import NULL_TIMER
+
+
+class SemanticErrors(Exception):
+    """The semantic analyzer's errors, one message each in `errors`."""
+
+    def __init__(self, errors):
+        super().__init__("Semantic errors:\n" + "\n".join(errors))
+        self.errors = errors
+
+
+def compile_source(parser, source, verify=True, optimizer=None, timer=NULL_TIMER, verbose=False):
+    """
+    Compiles source text with a built CParser and returns (ast, generator),
+    the CodeGenerator holding the code and its source positions.
+
+    optimizer is a PassManager whose passes run on the AST and the code;
+    timer records the phases. Raises on syntax errors, SemanticErrors and
+    VerificationError.
+    """
+    with timer.phase('parse'), timer.lexing(parser.lexer.lexer):
+        ast = parser.parse(source)
+    if verbose:
+        print(f"\n✅ Parsing successful.")
+
+    with timer.phase('semantics'):
+        errors = SemanticAnalyzer(verbose=verbose).analyze(ast)
+    if errors:
+        raise SemanticErrors(errors)
+    if verbose:
+        print(f"\n✅ Semantic Analysis successful.")
+
+    generator = CodeGenerator(verbose=verbose)
+    if optimizer is not None:
+        ast = optimizer.run_ast(ast, timer)
+        optimizer.generate(generator, ast, timer)
+    else:
+        with timer.phase('codegen'):
+            generator.generate(ast)
+    if verify:
+        with timer.phase('verify'):
+            generator.verify_code()
+    if verbose:
+        print(f"\n✅ Code Generation successful.")
+    return ast, generator
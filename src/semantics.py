@@ -21,6 +21,16 @@ class SemanticAnalyzer:
             ast = [ast]
         
         # First pass: declare all functions
+        self.declare_functions(ast)
+   
+        # Second pass: full semantic analysis
+        for node in ast:
+            self.visit(node)
+
+        return self.errors
+
+    def declare_functions(self, ast):
+        """Declares the signature of every FUNCTION node in the global scope."""
         for node in ast:
             if node[0] == 'FUNCTION':
                 _, name, return_type, params, _ = node
@@ -32,11 +42,21 @@ class SemanticAnalyzer:
                     self.error(f"Function '{name}' already declared")
                 else:
                     self.symbols.declare(name, return_type, 'func', extra={'params': param_types})
-   
-        # Second pass: full semantic analysis
-        for node in ast:
-            self.visit(node)
 
+    def signatures(self):
+        """name → (return type, parameter types) of the declared functions."""
+        return {name: (info.type, tuple(info.extra.get('params', [])))
+                for name, info in self.symbols.scopes[0].items() if info.kind == 'func'}
+
+    def analyze_function(self, node, signatures):
+        """
+        Analyzes one FUNCTION node with only `signatures` declared globally;
+        gives the same errors as analyze() when they cover every name the
+        function refers to. Used by the incremental compiler.
+        """
+        for name, (return_type, param_types) in signatures.items():
+            self.symbols.declare(name, return_type, 'func', extra={'params': list(param_types)})
+        self.visit(node)
         return self.errors
 
     def error(self, message):
@@ -93,6 +113,8 @@ class SemanticAnalyzer:
         if name in self.symbols.scopes[-1]:  # Only check current scope
             self.error(f"Array '{name}' already declared")
         else:
+            if isinstance(size_expr, int):  # The parser keeps the raw INTEGER token
+                size_expr = ('INTEGER', size_expr)
             size_type = self.visit(size_expr)
             if size_type != 'int':
                 self.error(f"Array size must be an integer, got '{size_type}'")
@@ -202,6 +224,22 @@ class SemanticAnalyzer:
     
         return info.type
 
+    def visit_array_assign(self, node):
+        _, name, index_expr, value_expr = node
+        info = self.symbols.lookup(name)
+        if not info or info.kind != 'array':
+            self.error(f"Assignment to undeclared or non-array variable '{name}'")
+            return None
+
+        index_type = self.visit(index_expr)
+        if index_type != 'int':
+            self.error(f"Array index must be of type 'int', got '{index_type}'")
+
+        value_type = self.visit(value_expr)
+        if value_type and value_type != info.type:
+            self.error(f"Type mismatch in assignment to '{name}[]': {info.type} = {value_type}")
+        return value_type
+
     def visit_binop(self, node):
         _, op, left, right = node
         left_type = self.visit(left)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Compile server: keeps warm compiler pipelines resident and compiles on
+request, so a build pays Python startup, imports and the PLY table
+construction in CParser.__init__ once instead of once per file.
+
+Requests and responses are JSON lines, over a Unix socket (one connection
+can pipeline many requests) or over stdin/stdout:
+
+    request   {"id": 1, "input": "prog.c", "output": "prog.cma",
+               "verify": true, "emit": "cma", "source_map": false,
+               "opt_level": 0, "enable": [], "disable": []}
+              "source": "<text>" instead of "input" compiles text; without
+              "output" the code comes back inline (bytecode base64-encoded);
+              opt_level, enable and disable select the optimization passes
+              like -O, --enable-pass and --disable-pass of compiler.py
+    response  {"id": 1, "ok": true, "output": "prog.cma", "diagnostics": [],
+               "elapsed": 0.004}
+              on failure "ok" is false and "diagnostics" holds the syntax or
+              semantic errors
+
+Requests are processed concurrently by a pool of worker processes, each with
+its own warm CParser; responses carry the request id and may arrive out of
+order. With --workers 0 requests are compiled in the server process.
+
+Usage:
+    python -m src.server [--socket PATH | --stdio] [--workers N]
+"""
+
+import io
+import os
+import sys
+import json
+import stat
+import time
+import base64
+import argparse
+import threading
+import contextlib
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+
+from src.parser import CParser
+from src.pipeline import compile_source, SemanticErrors
+from src.passes import PassManager
+from src import bytecode
+
+_parser = None  # Per worker process, built once
+
+
+def default_socket():
+    """$CLIKE_SERVER_SOCKET, else a per-user path in the temp directory."""
+    return os.environ.get('CLIKE_SERVER_SOCKET') or f"/tmp/clike-compiler-{os.getuid()}.sock"
+
+
+def _warm_up():
+    global _parser
+    if _parser is None:
+        # yacc prints table warnings; keep them off a stdio protocol stream
+        with contextlib.redirect_stdout(io.StringIO()):
+            _parser = CParser().build()
+
+
+def compile_request(request):
+    """Compiles one request dict and returns the response dict."""
+    start = time.perf_counter()
+    response = {'id': request.get('id'), 'ok': False, 'diagnostics': []}
+    try:
+        _warm_up()
+        input_file = request.get('input')
+        if input_file is not None:
+            with open(input_file, 'r') as f:
+                source = f.read()
+        else:
+            source = request['source']
+        emit = request.get('emit', 'cma')
+        optimizer = None
+        if request.get('opt_level') or request.get('enable') or request.get('disable'):
+            optimizer = PassManager(request.get('opt_level', 0), request.get('enable', ()), request.get('disable', ()))
+
+        # The parser and analyzer report on stdout as well as raising
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, generator = compile_source(_parser, source, request.get('verify', True), optimizer)
+        code = '\n'.join(generator.code)
+
+        output = bytecode.assemble_text(code) if emit == 'bytecode' else code
+        output_file = request.get('output')
+        if output_file is None and input_file is not None:
+            output_file = os.path.splitext(input_file)[0] + ('.cmab' if emit == 'bytecode' else '.cma')
+        if output_file is None:
+            response['code'] = base64.b64encode(output).decode('ascii') if emit == 'bytecode' else output
+            if request.get('source_map'):
+                response['source_map'] = generator.source_map().to_dict()
+        else:
+            if emit == 'bytecode':
+                bytecode.write(output_file, output)
+            else:
+                with open(output_file, 'w') as f:
+                    f.write(output)
+            if request.get('source_map'):
+                generator.source_map(input_file).write(output_file + '.map')
+            response['output'] = output_file
+        response['ok'] = True
+    except FileNotFoundError as e:
+        response['diagnostics'] = [f"Could not open input file {e.filename}"]
+    except SemanticErrors as e:
+        response['diagnostics'] = e.errors
+    except Exception as e:
+        response['diagnostics'] = [str(e)]
+    finally:
+        response['elapsed'] = time.perf_counter() - start
+    return response
+
+
+class CompileServer:
+    def __init__(self, workers=None):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.pool = None
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.unix_server = None
+        if self.workers > 0:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_warm_up)
+        else:
+            _warm_up()
+
+    def submit(self, line, reply):
+        """Handles one request line; reply(response) is called when it is done."""
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            reply({'id': None, 'ok': False, 'diagnostics': [f"Malformed request: {e}"]})
+            return
+        if self.pool is None:
+            with self.lock:  # One warm parser, not reentrant
+                reply(compile_request(request))
+            return
+        future = self.pool.submit(compile_request, request)
+        future.add_done_callback(lambda f: reply(_result(f, request)))
+
+    def serve_stream(self, lines, write):
+        """Serves JSON lines from an iterable; write(text) must be thread-safe."""
+        pending = threading.Semaphore(0)
+        count = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            count += 1
+
+            def reply(response):
+                write(json.dumps(response) + '\n')
+                pending.release()
+            self.submit(line, reply)
+        for _ in range(count):
+            pending.acquire()  # Answer everything before the stream closes
+
+    def serve_stdio(self, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        lock = threading.Lock()
+
+        def write(text):
+            with lock:
+                stdout.write(text)
+                stdout.flush()
+        self.serve_stream(stdin, write)
+
+    def serve_unix(self, path):
+        """Serves connections on a Unix socket until interrupted."""
+        if os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                raise FileExistsError(f"{path} exists and is not a socket")
+            os.remove(path)  # Stale socket of a previous server
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lock = threading.Lock()
+
+                def write(text):
+                    with lock:
+                        try:
+                            self.wfile.write(text.encode('utf-8'))
+                            self.wfile.flush()
+                        except OSError:
+                            pass  # Client went away
+                server.serve_stream((line.decode('utf-8') for line in self.rfile), write)
+
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+            self.unix_server = unix_server
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.remove(path)
+
+    def shutdown(self):
+        if self.unix_server is not None:
+            self.unix_server.shutdown()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _result(future, request):
+    try:
+        return future.result()
+    except Exception as e:  # Worker died
+        return {'id': request.get('id'), 'ok': False, 'diagnostics': [f"Worker failed: {e}"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile server with warm compiler state')
+    parser.add_argument('--socket', help='Unix socket path (default: $CLIKE_SERVER_SOCKET or /tmp/clike-compiler-<uid>.sock)')
+    parser.add_argument('--stdio', action='store_true', help='Serve JSON lines on stdin/stdout instead of a socket')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count; 0 compiles in the server process)')
+    args = parser.parse_args()
+
+    server = CompileServer(args.workers)
+    try:
+        if args.stdio:
+            server.serve_stdio()
+        else:
+            path = args.socket or default_socket()
+            print(f"Compile server listening on {path} with {server.workers} workers", file=sys.stderr)
+            server.serve_unix(path)
+    except KeyboardInterrupt:
+        pass
+    except FileExistsError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+SourceMap: maps CMA instruction indices back to C-like source positions.
+
+Instruction indices count executable instructions only (labels excluded),
+the same numbering the VM uses for its pc. Every instruction maps to the
+(line, column) of the innermost AST node that emitted it and to the function
+it belongs to; compiler-generated code without a node (the program entry)
+maps to no position.
+
+JSON format (written next to the .cma file as <output>.map):
+    {"version": 1, "file": "prog.c", "functions": ["main", ...],
+     "instructions": [[line, column, function index] or null, ...]}
+"""
+
+import json
+
+VERSION = 1
+
+
+class SourceMap:
+    def __init__(self, entries, file=None):
+        self.entries = entries  # per instruction: (line, column, function) or None
+        self.file = file
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, index):
+        """(line, column, function) of an instruction, or None."""
+        if 0 <= index < len(self.entries):
+            return self.entries[index]
+        return None
+
+    def location(self, index):
+        entry = self.lookup(index)
+        if entry is None:
+            return None
+        line, column, _ = entry
+        return f"{self.file or '<source>'}:{line}:{column}"
+
+    def to_dict(self):
+        functions = []
+        function_index = {}
+        instructions = []
+        for entry in self.entries:
+            if entry is None:
+                instructions.append(None)
+                continue
+            line, column, function = entry
+            if function not in function_index:
+                function_index[function] = len(functions)
+                functions.append(function)
+            instructions.append([line, column, function_index[function]])
+        return {'version': VERSION, 'file': self.file, 'functions': functions,
+                'instructions': instructions}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != VERSION:
+            raise ValueError(f"Unsupported source map version {data.get('version')}")
+        functions = data['functions']
+        entries = [None if entry is None else (entry[0], entry[1], functions[entry[2]])
+                   for entry in data['instructions']]
+        return cls(entries, data.get('file'))
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,1280 @@
+#!/usr/bin/env python3
+"""
+SSA middle end: lowers the checked AST to a control-flow graph of basic
+blocks in SSA form, and lowers that back to CMa stack code.
+
+IR (per Function):
+    Block   phis, instrs (in order) and a terminator; preds, succs
+    Value   op, attr, args (its definitions) and users (its uses), so
+            use-def and def-use chains are always at hand
+Ops:
+    const   attr is the LOADC operand; constants float, outside any block
+    param   attr is the parameter index
+    binop   attr is the C operator; args left, right
+    unop    attr is '-' or '!'; args operand
+    load    attr is the Array; args index
+    store   attr is the Array; args index, value (no result)
+    call    attr is the function name; args in declaration order
+    phi     args line up with block.preds
+    jump, branch, return
+            terminators; attr is the list of successor blocks, branch
+            takes the condition (true target first), return its value
+
+Construction follows Braun et al., "Simple and Efficient Construction of
+Static Single Assignment Form" (CC 2013): variables are read and written per
+block while the AST is walked, loop headers stay unsealed until their back
+edges are known, and trivial phis are removed on the fly. Variables are keyed
+by declaration, like the frame cells of the direct code generator, so a
+declaration without initializer inside a loop keeps the value of the
+previous iteration; everything starts at 0 (ENTER clears the frame). Arrays
+stay in memory: loads and stores are ordered instructions.
+
+Lowering (out of SSA) decides per value whether it is a tree (evaluated at
+its single use in the same block), a constant (rematerialized) or gets a
+frame slot. Only a load is pinned, by a store that follows it: functions see
+nothing but their arguments (no globals, no pointers), so calls commute with
+each other and with stores, and are moved but never dropped or repeated;
+stores to other arrays, or to an index at another constant offset from the
+same value, do not pin a load either (may_alias). Slots are assigned by
+greedy coloring of the interference graph in dominance order, preferring
+the slot of related phi operands so most phi copies vanish; the remaining
+copies are parallel (all values pushed, then stored). On a critical edge
+they go before the branch when the other edge does not read the slots they
+write, else into a stub block; blocks left empty are jumped over. Operands
+of commutative and mirrored operators are evaluated deeper-first
+(Sethi-Ullman), which keeps the operand stack shallow.
+"""
+
+from src.codegen import EXPRESSION_TAGS
+
+EFFECT_OPS = ('store', 'call')
+TERMINATORS = ('jump', 'branch', 'return')
+
+COMMUTATIVE = ('+', '*', '==', '!=', '&&', '||')
+MIRRORED = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+# Same instruction selection as CodeGenerator.visit_BINOP
+BINARY_OPCODES = {
+    '+': ('ADD',), '-': ('SUB',), '*': ('MUL',), '/': ('DIV',), '%': ('MOD',),
+    '==': ('EQ',), '<': ('LE',), '>': ('GE',), '&&': ('AND',), '||': ('OR',),
+    '!=': ('EQ', 'NOT'), '<=': ('GE', 'NOT'), '>=': ('LE', 'NOT'),
+}
+UNARY_OPCODES = {'-': 'NEG', '!': 'NOT'}
+
+
+class SSAError(Exception):
+    """Unsupported input or malformed IR."""
+
+
+class Value:
+    __slots__ = ('id', 'op', 'attr', 'args', 'users', 'block', 'position', 'name', 'forward')
+
+    def __init__(self, id, op, attr=None, args=(), block=None, position=None, name=None):
+        self.id = id
+        self.op = op
+        self.attr = attr
+        self.args = []
+        self.users = []
+        self.block = block
+        self.position = position
+        self.name = name        # Source variable, for comments
+        self.forward = None     # Replacement of a removed phi
+        for arg in args:
+            self.add_arg(arg)
+
+    def add_arg(self, value):
+        self.args.append(value)
+        value.users.append(self)
+
+    def drop_args(self):
+        for arg in self.args:
+            arg.users.remove(self)
+        self.args = []
+
+    def replace_uses_with(self, value):
+        for user in self.users:
+            user.args = [value if arg is self else arg for arg in user.args]
+            value.users.append(user)
+        self.users = []
+
+    def __repr__(self):
+        return f"v{self.id}"
+
+
+class Block:
+    __slots__ = ('id', 'hint', 'phis', 'instrs', 'terminator', 'preds')
+
+    def __init__(self, id, hint):
+        self.id = id
+        self.hint = hint    # Label prefix
+        self.phis = []
+        self.instrs = []
+        self.terminator = None
+        self.preds = []
+
+    @property
+    def succs(self):
+        return self.terminator.attr if self.terminator is not None else []
+
+    def __repr__(self):
+        return f"{self.hint}{self.id}"
+
+
+class Array:
+    __slots__ = ('name', 'size')
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __repr__(self):
+        return f"{self.name}[{self.size}]"
+
+
+class Variable:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Function:
+    def __init__(self, name, return_type, position=None):
+        self.name = name
+        self.return_type = return_type
+        self.position = position
+        self.blocks = []    # In layout order
+        self.params = []
+        self.arrays = []
+        self._ids = 0
+
+    def new_block(self, hint):
+        self._ids += 1
+        return Block(self._ids, hint)
+
+    def new_value(self, op, attr=None, args=(), block=None, position=None, name=None):
+        self._ids += 1
+        value = Value(self._ids, op, attr, args, block, position, name)
+        if block is not None:
+            (block.phis if op == 'phi' else block.instrs).append(value)
+        return value
+
+    def const(self, operand, position=None):
+        return self.new_value('const', operand, position=position)
+
+    def values(self):
+        for block in self.blocks:
+            yield from block.phis
+            yield from block.instrs
+
+    def reverse_postorder(self):
+        if not self.blocks:
+            return []
+        order, seen = [], {self.blocks[0]}
+        stack = [(self.blocks[0], iter(self.blocks[0].succs))]
+        while stack:
+            block, succs = stack[-1]
+            for succ in succs:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append((succ, iter(succ.succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+    def simplify_phi(self, phi):
+        """Replaces a phi whose operands are all one value (or itself); returns what stands for it."""
+        same = None
+        for arg in phi.args:
+            if arg is same or arg is phi:
+                continue
+            if same is not None:
+                return phi
+            same = arg
+        if same is None:
+            same = self.const(0, phi.position)  # Only reachable through itself
+        users = [user for user in phi.users if user is not phi]
+        phi.replace_uses_with(same)
+        phi.drop_args()
+        phi.block.phis.remove(phi)
+        phi.forward = same
+        for user in users:
+            if user.op == 'phi' and user.forward is None:
+                self.simplify_phi(user)
+        return same
+
+    def remove_unreachable(self):
+        """Drops blocks not reachable from the entry; returns how many."""
+        reachable = set(self.reverse_postorder())
+        dead = [block for block in self.blocks if block not in reachable]
+        for block in dead:
+            for succ in block.succs:
+                if succ in reachable:
+                    index = succ.preds.index(block)
+                    del succ.preds[index]
+                    for phi in succ.phis:
+                        phi.args.pop(index).users.remove(phi)
+        for block in dead:
+            for value in block.phis + block.instrs + ([block.terminator] if block.terminator else []):
+                value.drop_args()
+        if dead:
+            self.blocks = [block for block in self.blocks if block in reachable]
+            for block in self.blocks:
+                for phi in list(block.phis):
+                    if phi.forward is None:
+                        self.simplify_phi(phi)
+        return len(dead)
+
+    def __str__(self):
+        lines = [f"function {self.name}({', '.join(f'{p!r}:{p.name}' for p in self.params)})"]
+        for block in self.blocks:
+            lines.append(f"  {block!r}:    ; preds {', '.join(map(repr, block.preds))}")
+            for value in block.phis + block.instrs + [block.terminator]:
+                lines.append(f"    {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+def _format_value(value):
+    operands = ', '.join(repr(arg) if arg.op != 'const' else str(arg.attr) for arg in value.args)
+    if value.op in TERMINATORS:
+        targets = ' '.join(map(repr, value.attr))
+        return f"{value.op} {operands} {targets}".replace('  ', ' ').strip()
+    attr = '' if value.attr is None else f" {value.attr}"
+    return f"{value!r} = {value.op}{attr} {operands}".rstrip()
+
+
+class Module:
+    def __init__(self, functions, returns):
+        self.functions = functions
+        self.returns = returns  # Function name → return type
+
+    def __str__(self):
+        return '\n\n'.join(str(function) for function in self.functions)
+
+
+class DominatorTree:
+    """Immediate dominators (Cooper, Harvey and Kennedy) with O(1) dominance queries."""
+
+    def __init__(self, function):
+        self.order = function.reverse_postorder()
+        index = {block: i for i, block in enumerate(self.order)}
+        entry = self.order[0]
+        idom = {entry: entry}
+
+        def intersect(a, b):
+            while a is not b:
+                while index[a] > index[b]:
+                    a = idom[a]
+                while index[b] > index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block in self.order[1:]:
+                new = None
+                for pred in block.preds:
+                    if pred in idom:
+                        new = pred if new is None else intersect(pred, new)
+                if idom.get(block) is not new:
+                    idom[block] = new
+                    changed = True
+
+        self.idom = {block: (None if block is entry else parent) for block, parent in idom.items()}
+        self.children = {block: [] for block in self.order}
+        for block in self.order[1:]:
+            self.children[self.idom[block]].append(block)
+
+        # Pre/post numbers of a depth-first walk: a dominates b iff b's interval nests in a's
+        self._pre, self._post = {}, {}
+        counter = 0
+        stack = [(entry, False)]
+        while stack:
+            block, done = stack.pop()
+            if done:
+                self._post[block] = counter
+            else:
+                self._pre[block] = counter
+                stack.append((block, True))
+                stack.extend((child, False) for child in reversed(self.children[block]))
+            counter += 1
+
+    def dominates(self, a, b):
+        return self._pre[a] <= self._pre[b] and self._post[b] <= self._post[a]
+
+    def preorder(self):
+        return sorted(self.order, key=self._pre.__getitem__)
+
+
+# ============================================
+# Construction
+# ============================================
+
+def _position(node):
+    lineno = getattr(node, 'lineno', None)
+    return (lineno, node.column) if lineno is not None else None
+
+
+class SSABuilder:
+    def build(self, ast):
+        if not isinstance(ast, list):
+            raise TypeError(f"Expected AST to be a list of functions, got: {type(ast)}")
+        returns = {node[1]: node[2] for node in ast if node[0] == 'FUNCTION'}
+        return Module([self.function(node) for node in ast if node[0] == 'FUNCTION'], returns)
+
+    def function(self, node):
+        _, name, return_type, params, statements = node
+        self.fn = Function(name, return_type, _position(node))
+        self.definitions = {}   # Variable → {block: value}
+        self.incomplete = {}    # Unsealed block → {Variable: phi}
+        self.sealed = set()
+        self.scope = {}         # Name → Variable or Array
+        self.loops = []         # (continue target, break target)
+        self.position = self.fn.position
+
+        entry = self.fn.new_block('entry')
+        self.start(entry)
+        for index, param in enumerate(params):
+            variable = self.scope[param[2]] = Variable(param[2])
+            value = self.fn.new_value('param', index, (), entry, _position(param) or self.position, param[2])
+            self.fn.params.append(value)
+            self.write(variable, entry, value)
+
+        for stmt in statements:
+            self.statement(stmt)
+        # Falling off the end returns 0, like the direct code generator
+        self.terminate('return', [self.fn.const(0, self.position)] if return_type != 'void' else [])
+        self.fn.remove_unreachable()
+        return self.fn
+
+    # --- Blocks ---
+
+    def start(self, block, seal=True):
+        self.block = block
+        self.fn.blocks.append(block)
+        if seal:
+            self.seal(block)
+
+    def start_dead(self):
+        """Code after return, break or continue goes to a block nothing jumps to."""
+        self.start(self.fn.new_block('dead'))
+
+    def terminate(self, op, args=(), targets=()):
+        self.block.terminator = self.fn.new_value(op, list(targets), args, None, self.position)
+        self.block.terminator.block = self.block
+        for target in targets:
+            target.preds.append(self.block)
+
+    def jump(self, target):
+        self.terminate('jump', (), [target])
+
+    def branch(self, cond, then, otherwise):
+        self.terminate('branch', [cond], [then, otherwise])
+
+    def seal(self, block):
+        for variable, phi in self.incomplete.pop(block, {}).items():
+            self.add_phi_operands(variable, phi)
+        self.sealed.add(block)
+
+    # --- Variables (Braun et al.) ---
+
+    def write(self, variable, block, value):
+        self.definitions.setdefault(variable, {})[block] = value
+        if value.name is None and value.op != 'const':
+            value.name = variable.name
+
+    def read(self, variable, block):
+        value = self.definitions.get(variable, {}).get(block)
+        if value is None:
+            return self.read_recursive(variable, block)
+        while value.forward is not None:
+            value = value.forward
+        return value
+
+    def read_recursive(self, variable, block):
+        if block not in self.sealed:
+            value = self.fn.new_value('phi', None, (), block, self.position, variable.name)
+            self.incomplete.setdefault(block, {})[variable] = value
+        elif len(block.preds) == 1:
+            value = self.read(variable, block.preds[0])
+        elif not block.preds:
+            value = self.fn.const(0, self.position)  # Frames start zeroed
+        else:
+            phi = self.fn.new_value('phi', None, (), block, self.position, variable.name)
+            self.write(variable, block, phi)
+            value = self.add_phi_operands(variable, phi)
+        self.write(variable, block, value)
+        return value
+
+    def add_phi_operands(self, variable, phi):
+        for pred in phi.block.preds:
+            phi.add_arg(self.read(variable, pred))
+        return self.fn.simplify_phi(phi)
+
+    def lookup(self, name, kind):
+        entry = self.scope.get(name)
+        if not isinstance(entry, kind):
+            raise SSAError(f"Undefined {'array' if kind is Array else 'variable'}: {name}")
+        return entry
+
+    # --- Statements ---
+
+    def statement(self, node):
+        if isinstance(node, list):  # Multiple VAR_DECLs
+            for stmt in node:
+                self.statement(stmt)
+            return
+        previous = self.position
+        self.position = _position(node) or previous
+        try:
+            method = getattr(self, f'statement_{node[0]}', None)
+            if method is not None:
+                method(node)
+            elif node[0] in EXPRESSION_TAGS or node[0] == 'CALL':
+                self.expression(node)  # Value discarded; calls keep their effect
+            else:
+                raise SSAError(f"Unsupported statement: {node[0]}")
+        finally:
+            self.position = previous
+
+    def statement_VAR_DECL(self, node):
+        self.scope[node[2]] = Variable(node[2])
+
+    def statement_VAR_DECL_INIT(self, node):
+        _, _, name, expr = node
+        variable = self.scope[name] = Variable(name)
+        self.write(variable, self.block, self.expression(expr))
+
+    def statement_ARRAY_DECL(self, node):
+        _, _, name, size = node
+        if not isinstance(size, int):  # The parser keeps the raw INTEGER token
+            if size[0] != 'INTEGER':
+                raise SSAError("Only constant-size arrays supported for now")
+            size = size[1]
+        array = self.scope[name] = Array(name, size)
+        self.fn.arrays.append(array)
+
+    def statement_ASSIGN(self, node):
+        _, name, expr = node
+        variable = self.lookup(name, Variable)
+        self.write(variable, self.block, self.expression(expr))
+
+    def statement_ARRAY_ASSIGN(self, node):
+        _, name, index_expr, value_expr = node
+        array = self.lookup(name, Array)
+        value = self.expression(value_expr)  # Value first, like the direct code generator
+        index = self.expression(index_expr)
+        self.fn.new_value('store', array, [index, value], self.block, self.position)
+
+    def statement_RETURN(self, node):
+        self.terminate('return', [self.expression(node[1])] if node[1] is not None else [])
+        self.start_dead()
+
+    def statement_IF(self, node):
+        _, cond, then = node
+        cond = self.expression(cond)
+        then_block, end = self.fn.new_block('then'), self.fn.new_block('endif')
+        self.branch(cond, then_block, end)
+        self.start(then_block)
+        self.statement(then)
+        self.jump(end)
+        self.start(end)
+
+    def statement_IF_ELSE(self, node):
+        _, cond, then, otherwise = node
+        cond = self.expression(cond)
+        then_block, else_block, end = self.fn.new_block('then'), self.fn.new_block('else'), self.fn.new_block('endif')
+        self.branch(cond, then_block, else_block)
+        self.start(then_block)
+        self.statement(then)
+        self.jump(end)
+        self.start(else_block)
+        self.statement(otherwise)
+        self.jump(end)
+        self.start(end)
+
+    def statement_WHILE(self, node):
+        _, cond, body = node
+        header = self.fn.new_block('while_start')
+        self.jump(header)
+        self.start(header, seal=False)
+        body_block, end = self.fn.new_block('while_body'), self.fn.new_block('while_end')
+        self.branch(self.expression(cond), body_block, end)
+        self.loop(body, body_block, header, end)
+        self.jump(header)
+        self.seal(header)
+        self.start(end)
+
+    def statement_FOR(self, node):
+        _, init, cond, update, body = node
+        self.statement(init)
+        header = self.fn.new_block('for_start')
+        self.jump(header)
+        self.start(header, seal=False)
+        body_block, step, end = (self.fn.new_block('for_body'), self.fn.new_block('for_continue'),
+                                 self.fn.new_block('for_end'))
+        if cond[0] == 'EMPTY':
+            self.jump(body_block)
+        else:
+            self.branch(self.expression(cond), body_block, end)
+        self.loop(body, body_block, step, end)
+        self.jump(step)
+        self.start(step)
+        self.statement(update)
+        self.jump(header)
+        self.seal(header)
+        self.start(end)
+
+    def loop(self, body, body_block, continue_target, break_target):
+        self.start(body_block)
+        self.loops.append((continue_target, break_target))
+        self.statement(body)
+        self.loops.pop()
+
+    def statement_BREAK(self, node):
+        if not self.loops:
+            raise SSAError("BREAK used outside of loop")
+        self.jump(self.loops[-1][1])
+        self.start_dead()
+
+    def statement_CONTINUE(self, node):
+        if not self.loops:
+            raise SSAError("CONTINUE used outside of loop")
+        self.jump(self.loops[-1][0])
+        self.start_dead()
+
+    def statement_BLOCK(self, node):
+        for stmt in node[1]:
+            self.statement(stmt)
+
+    def statement_EMPTY(self, node):
+        pass
+
+    # --- Expressions ---
+
+    def expression(self, node):
+        previous = self.position
+        self.position = _position(node) or previous
+        try:
+            return self._expression(node)
+        finally:
+            self.position = previous
+
+    def _expression(self, node):
+        tag = node[0]
+        if tag == 'INTEGER' or tag == 'FLOAT':
+            return self.fn.const(node[1], self.position)
+        if tag == 'CHAR':
+            return self.fn.const(f"'{node[1]}'", self.position)
+        if tag == 'STRING':
+            return self.fn.const(f"\"{node[1]}\"", self.position)
+        if tag == 'VARIABLE':
+            return self.read(self.lookup(node[1], Variable), self.block)
+        if tag == 'BINOP':
+            left = self.expression(node[2])
+            right = self.expression(node[3])
+            if node[1] not in BINARY_OPCODES:
+                raise SSAError(f"Unsupported binary operator: {node[1]}")
+            return self.fn.new_value('binop', node[1], [left, right], self.block, self.position)
+        if tag == 'UNARYOP':
+            if node[1] not in UNARY_OPCODES:
+                raise SSAError(f"Unsupported unary operator: {node[1]}")
+            return self.fn.new_value('unop', node[1], [self.expression(node[2])], self.block, self.position)
+        if tag == 'ARRAY_ACCESS':
+            array = self.lookup(node[1], Array)
+            return self.fn.new_value('load', array, [self.expression(node[2])], self.block, self.position)
+        if tag == 'CALL':
+            # Arguments are evaluated last to first, as they are pushed
+            args = [self.expression(arg) for arg in reversed(node[2])]
+            return self.fn.new_value('call', node[1], args[::-1], self.block, self.position)
+        raise SSAError(f"Unsupported expression: {tag}")
+
+
+def build(ast):
+    """Module in SSA form of a checked AST."""
+    return SSABuilder().build(ast)
+
+
+# ============================================
+# Checks and cleanups
+# ============================================
+
+def verify_function(function):
+    """Raises SSAError unless the CFG, the use-def chains and dominance are consistent."""
+    def fail(message):
+        raise SSAError(f"{function.name}: {message}")
+
+    present = set()
+    for block in function.blocks:
+        if block.terminator is None:
+            fail(f"block {block!r} has no terminator")
+        for succ in block.succs:
+            if block not in succ.preds:
+                fail(f"{block!r} → {succ!r} is missing from the predecessors")
+        for pred in block.preds:
+            if block not in pred.succs:
+                fail(f"predecessor {pred!r} of {block!r} does not branch to it")
+        for phi in block.phis:
+            if len(phi.args) != len(block.preds):
+                fail(f"{phi!r} has {len(phi.args)} operands for {len(block.preds)} predecessors")
+        present.update(block.phis, block.instrs, [block.terminator])
+
+    tree = DominatorTree(function)
+    if set(tree.order) != set(function.blocks):
+        fail("unreachable blocks")
+    for block in function.blocks:
+        position = {value: i for i, value in enumerate(block.instrs)}
+        for value in block.phis + block.instrs + [block.terminator]:
+            for arg in value.args:
+                if value not in arg.users or arg.users.count(value) != value.args.count(arg):
+                    fail(f"use of {arg!r} by {value!r} missing from its users")
+                if arg.op == 'const':
+                    continue
+                if arg not in present:
+                    fail(f"{value!r} uses {arg!r}, which is not in the function")
+            for i, arg in enumerate(value.args):
+                if arg.op == 'const':
+                    continue
+                if value.op == 'phi':
+                    if not tree.dominates(arg.block, block.preds[i]):
+                        fail(f"{arg!r} does not dominate the edge {block.preds[i]!r} → {block!r} of {value!r}")
+                elif arg.block is block:
+                    if arg.op != 'phi' and position.get(arg, -1) >= position.get(value, len(block.instrs)):
+                        fail(f"{arg!r} is used by {value!r} before it is defined")
+                elif not tree.dominates(arg.block, block):
+                    fail(f"{arg!r} does not dominate its use by {value!r}")
+            for user in value.users:
+                if value not in user.args:
+                    fail(f"{user!r} is listed as a user of {value!r} but does not use it")
+
+
+def verify(module):
+    for function in module.functions:
+        verify_function(function)
+
+
+def eliminate_dead_code(function):
+    """Removes values nothing observable depends on (dead phi cycles too); returns how many."""
+    live = set()
+    work = []
+    for block in function.blocks:
+        roots = [value for value in block.instrs if value.op in EFFECT_OPS or value.op == 'param']
+        work.extend(roots + [block.terminator])
+    while work:
+        value = work.pop()
+        if value in live:
+            continue
+        live.add(value)
+        work.extend(arg for arg in value.args if arg.op != 'const')
+    removed = 0
+    for block in function.blocks:
+        for values in (block.phis, block.instrs):
+            dead = [value for value in values if value not in live]
+            for value in dead:
+                value.drop_args()
+            values[:] = [value for value in values if value in live]
+            removed += len(dead)
+    return removed
+
+
+def _operand_key(value, number):
+    value = number.get(value, value)
+    return (0, value.attr) if value.op == 'const' else (1, value.id)
+
+
+def _expression_key(value, memory, number):
+    """Hash key of a pure value, or None for values that must not be merged."""
+    op = value.op
+    args = [_operand_key(arg, number) for arg in value.args]
+    if op == 'binop':
+        operator = value.attr
+        if operator in COMMUTATIVE:
+            args.sort()
+        elif operator in ('>', '>='):
+            operator = MIRRORED[operator]
+            args.reverse()
+        return ('binop', operator, *args)
+    if op == 'unop':
+        return ('unop', value.attr, *args)
+    if op == 'load':
+        return ('load', value.attr, *_memory_version(value, memory), *args)
+    if op == 'phi':
+        return ('phi', value.block.id, *args)
+    return None
+
+
+def _index_offset(index):
+    """(base value or None, constant offset) of an index expression."""
+    if index.op == 'const':
+        return None, index.attr
+    if index.op == 'binop' and index.attr in ('+', '-'):
+        left, right = index.args
+        if right.op == 'const' and left.op != 'const':
+            return left, right.attr if index.attr == '+' else -right.attr
+        if left.op == 'const' and right.op != 'const' and index.attr == '+':
+            return right, left.attr
+    return index, 0
+
+
+def may_alias(first, second):
+    """Whether two loads or stores may access the same array cell."""
+    if first.attr is not second.attr:
+        return False
+    (base, offset), (other_base, other_offset) = _index_offset(first.args[0]), _index_offset(second.args[0])
+    return base is not other_base or offset == other_offset
+
+
+def _memory_version(access, memory):
+    """
+    Version of the memory a load or store reads or writes. Every store
+    changes the version of its array; a constant index has a version of its
+    own that only stores to it and stores to variable indices change.
+    """
+    array, index = access.attr, access.args[0]
+    if index.op == 'const':
+        return (memory.get((array, 'variable')), memory.get((array, index.attr)))
+    return (memory.get(array),)
+
+
+def _new_memory_version(store, memory):
+    array, index = store.attr, store.args[0]
+    memory[array] = object()
+    memory[(array, index.attr) if index.op == 'const' else (array, 'variable')] = object()
+
+
+def _recompute_cost(value):
+    """Instructions that evaluating `value` again would take in the lowered code."""
+    cost = 0
+    for arg in value.args:
+        pure = arg.op in ('binop', 'unop', 'load') and len(arg.users) == 1 and arg.block is value.block
+        cost += _recompute_cost(arg) if pure else 1  # Else LOADC, or LOADR of a slot
+    if value.op == 'binop':
+        return cost + len(BINARY_OPCODES[value.attr])
+    return cost + (1 if value.op == 'unop' else 3)
+
+
+def _stored_arrays(block, stop, stores):
+    """Arrays stored to on some path from `stop` (excluded) to the entry of `block`."""
+    arrays = set()
+    seen = {stop}
+    work = list(block.preds)
+    while work:
+        pred = work.pop()
+        if pred in seen:
+            continue
+        seen.add(pred)
+        arrays |= stores[pred]
+        work.extend(pred.preds)
+    return arrays
+
+
+def eliminate_common_subexpressions(function):
+    """
+    Dominator-based value numbering: a pure value (binop, unop, load, phi)
+    equal to one in a dominating position is replaced by it; returns how
+    many were replaced. Calls are never merged.
+
+    On the stack machine a reused value costs a STORER and a LOADR per use
+    instead of being evaluated in place, so when both have a single use the
+    copy is only replaced if it takes more than three instructions; it is
+    still numbered like the original, so larger expressions built on either
+    match. Loads are keyed by the memory version they read (_memory_version),
+    and a store makes its value the result of a load from the same index at
+    the version it creates. At a join, an array keeps the versions of the
+    immediate dominator unless a block in between stores to it.
+    """
+    tree = DominatorTree(function)
+    stores = {block: {value.attr for value in block.instrs if value.op == 'store'} for block in tree.order}
+    table = {}          # Key → (value, block it is available from)
+    number = {}         # Value → the equal value it was numbered like
+    exit_memory = {}    # Block → array → version at its end
+    removed = 0
+    for block in tree.preorder():
+        parent = tree.idom[block]
+        if parent is None:
+            memory = {}
+        else:
+            memory = dict(exit_memory[parent])
+            if len(block.preds) > 1:
+                stored = _stored_arrays(block, parent, stores)
+                for key in list(memory):
+                    if (key[0] if isinstance(key, tuple) else key) in stored:
+                        del memory[key]
+                for array in stored:
+                    memory[array] = memory[(array, 'variable')] = object()
+
+        def lookup(value):
+            key = _expression_key(value, memory, number)
+            if key is None:
+                return None
+            known = table.get(key)
+            if known is None or not tree.dominates(known[1], block):
+                table[key] = (value, block)
+                return None
+            same = known[0]
+            if value.op == 'phi' or len(same.users) != 1 or len(value.users) != 1 or _recompute_cost(value) > 3:
+                return same
+            # Kept, but expressions using it still match those using `same`
+            number[value] = number.get(same, same)
+            return None
+
+        for values in (block.phis, block.instrs):
+            kept = []
+            for value in values:
+                if value.op == 'store':
+                    index, stored = value.args
+                    _new_memory_version(value, memory)
+                    key = ('load', value.attr, *_memory_version(value, memory), _operand_key(index, number))
+                    table[key] = (stored, block)
+                same = lookup(value)
+                if same is None:
+                    kept.append(value)
+                    continue
+                value.replace_uses_with(same)
+                value.drop_args()
+                removed += 1
+            values[:] = kept
+        exit_memory[block] = memory
+    return removed
+
+
+# ============================================
+# Lowering
+# ============================================
+
+class _Stub:
+    """Copies on a critical edge, placed right before the target block."""
+    __slots__ = ('pred', 'target', 'copies', 'hint')
+
+    def __init__(self, pred, target, copies):
+        self.pred = pred
+        self.target = target
+        self.copies = copies
+        self.hint = 'edge'
+
+
+class _Label:
+    __slots__ = ('entry',)
+
+    def __init__(self, entry):
+        self.entry = entry
+
+
+class SSALowering:
+    def __init__(self, module):
+        self.module = module
+
+    def lower(self):
+        """(code lines, {line index: (line, column, function)}) like a CodeGenerator's code and positions."""
+        self.out = []  # (text or _Label, position)
+        self.targets = set()
+        if 'main' in self.module.returns:
+            self.out.append(("CALL main    // Program entry", None))
+            self.out.append(("HALT", None))
+        for function in self.module.functions:
+            self.function(function)
+        return self.render()
+
+    def render(self):
+        names = {}
+        lines, positions = [], {}
+        counter = 0
+        for text, position in self.out:
+            if isinstance(text, _Label):
+                if text.entry not in self.targets:
+                    continue
+                names[text.entry] = f"{text.entry.hint}_{counter}"
+                counter += 1
+                text = f"{names[text.entry]}:"
+            if position is not None:
+                positions[len(lines)] = position
+            lines.append(text)
+        # Labels are numbered in order of appearance, so jumps are patched afterwards
+        for index, line in enumerate(lines):
+            if isinstance(line, tuple):
+                opcode, entry, comment = line
+                lines[index] = f"{opcode} {names[entry]}{comment}"
+        return lines, positions
+
+    # --- Planning ---
+
+    def function(self, function):
+        self.fn = function
+        self.blocks = function.blocks  # Construction order: structured, dominators first
+        self.modes = {}
+        self.need_memo = {}
+        self.plan()
+        self.allocate()
+        self.emit_function()
+
+    def mode(self, value):
+        return 'const' if value.op == 'const' else self.modes[value]
+
+    def plan(self):
+        """Decides, per value, between 'tree', 'slot', 'effect' (no result kept) and 'dead'."""
+        modes = self.modes
+        for block in self.blocks:
+            instrs = block.instrs
+            n = len(instrs)
+            stores = [0]
+            for value in instrs:
+                stores.append(stores[-1] + (value.op == 'store'))
+            root_at = {}
+            single = block.terminator.op == 'jump'
+            for phi in block.phis:
+                modes[phi] = 'slot'
+            for i in reversed(range(n)):
+                value = instrs[i]
+                root_at[value] = i
+                if value.op == 'param':
+                    modes[value] = 'slot'
+                    continue
+                if value.op == 'store':
+                    modes[value] = 'effect'
+                    continue
+                live_users = [user for user in value.users if modes.get(user) != 'dead']
+                if not live_users:
+                    modes[value] = 'effect' if value.op == 'call' else 'dead'
+                    continue
+                modes[value] = 'slot'
+                if len(live_users) != 1:
+                    continue
+                user = live_users[0]
+                if user.op == 'phi':
+                    if not single:
+                        continue
+                    if user.block.preds[user.args.index(value)] is not block:
+                        continue
+                    root = n
+                elif user is block.terminator:
+                    root = n
+                elif user.block is block and user in root_at:
+                    root = root_at[user]
+                else:
+                    continue
+                # Deferring moves the evaluation to `root`, which must not pass a load over a store
+                if value.op == 'load' and stores[root] != stores[i + 1] and any(
+                        may_alias(value, store) for store in instrs[i + 1:root] if store.op == 'store'):
+                    continue
+                modes[value] = 'tree'
+                root_at[value] = root
+
+    def leaves(self, value, into):
+        """Slot values read when `value` is pushed."""
+        mode = self.mode(value)
+        if mode == 'slot':
+            into.add(value)
+        elif mode == 'tree':
+            for arg in value.args:
+                self.leaves(arg, into)
+        return into
+
+    def operand_leaves(self, value):
+        into = set()
+        for arg in value.args:
+            self.leaves(arg, into)
+        return into
+
+    def edge_copies(self, pred, block):
+        index = block.preds.index(pred)
+        return [(phi, phi.args[index]) for phi in block.phis]
+
+    def allocate(self):
+        """Frame slots by greedy coloring of the interference graph in dominance order."""
+        roots = {}
+        gen, kill, edge_uses = {}, {}, {}
+        for block in self.blocks:
+            block_roots = []
+            for value in block.instrs:
+                mode = self.modes[value]
+                if mode in ('slot', 'effect') and value.op != 'param':
+                    block_roots.append((value if mode == 'slot' else None, self.operand_leaves(value)))
+            block_roots.append((None, self.operand_leaves(block.terminator)))
+            roots[block] = block_roots
+            defined = set(block.phis)
+            if block is self.blocks[0]:
+                defined.update(self.fn.params)
+            used = set()
+            for definition, uses in block_roots:
+                used |= uses - defined
+                if definition is not None:
+                    defined.add(definition)
+            gen[block], kill[block] = used, defined
+            for succ in block.succs:
+                edge_uses[block, succ] = set()
+                for _, arg in self.edge_copies(block, succ):
+                    self.leaves(arg, edge_uses[block, succ])
+
+        live_in = {block: set() for block in self.blocks}
+        self.live_in, self.edge_uses = live_in, edge_uses
+
+        def live_out(block):
+            out = set()
+            for succ in block.succs:
+                out |= live_in[succ] | edge_uses[block, succ]
+            return out
+
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(self.blocks):
+                new = gen[block] | (live_out(block) - kill[block])
+                if new != live_in[block]:
+                    live_in[block] = new
+                    changed = True
+
+        adjacent = {}
+
+        def interfere(a, b):
+            adjacent.setdefault(a, set()).add(b)
+            adjacent.setdefault(b, set()).add(a)
+
+        for block in self.blocks:
+            live = live_out(block)
+            for definition, uses in reversed(roots[block]):
+                if definition is not None:
+                    for other in live:
+                        if other is not definition:
+                            interfere(definition, other)
+                    live.discard(definition)
+                live |= uses
+            tops = list(block.phis) + (self.fn.params if block is self.blocks[0] else [])
+            for top in tops:
+                adjacent.setdefault(top, set())
+                for other in live | set(tops):
+                    if other is not top:
+                        interfere(top, other)
+
+        colors = {param: param.attr for param in self.fn.params}
+
+        def choose(value, preferred_only=False):
+            forbidden = {colors[other] for other in adjacent.get(value, ()) if other in colors}
+            color = next((c for c in self.preferences(value, colors) if c not in forbidden), None)
+            if color is None and not preferred_only:
+                color = 0
+                while color in forbidden:
+                    color += 1
+            return color
+
+        for block in self.blocks:
+            # Phis that can have their preferred slot go first, so the others cannot take it
+            phis = sorted(block.phis, key=lambda phi: choose(phi, preferred_only=True) is None)
+            for value in phis + block.instrs:
+                if self.modes.get(value) == 'slot' and value not in colors:
+                    colors[value] = choose(value)
+        self.colors = colors
+        self.slots = max(list(colors.values()) + [len(self.fn.params) - 1], default=-1) + 1
+
+    def preferences(self, value, colors):
+        """Colors that would make a phi copy a no-op."""
+        if value.op == 'phi':
+            yield from (colors[arg] for arg in value.args if arg in colors)
+        for user in value.users:
+            if user.op == 'phi':
+                if user in colors:
+                    yield colors[user]
+                yield from (colors[arg] for arg in user.args if arg in colors and arg is not value)
+
+    # --- Emission ---
+
+    def emit(self, text, value=None):
+        position = value.position if value is not None and value.position is not None else self.fn.position
+        self.out.append((text, (position[0], position[1], self.fn.name) if position is not None else None))
+
+    def jump(self, opcode, entry, value=None, comment=''):
+        self.targets.add(entry)
+        self.emit((opcode, entry, comment), value)
+
+    def emit_function(self):
+        fn = self.fn
+        base = self.slots
+        self.bases = {}
+        for array in fn.arrays:
+            self.bases[array] = base
+            base += array.size
+
+        self.emit(f"{fn.name}:")
+        self.emit(f"ENTER {base}    // Frame of '{fn.name}'")
+        for param in fn.params:
+            self.emit(f"STORER {param.attr}    // Parameter '{param.name}'", param)
+
+        # Critical edges that still need copies get them before the branch if
+        # no slot they write is read afterwards on the other edge, else a stub
+        # right before their target
+        stubs = {}
+        self.hoisted = {}
+        for block in self.blocks:
+            if block.terminator.op == 'branch':
+                for succ in block.succs:
+                    copies = self.real_copies(block, succ)
+                    if not copies:
+                        continue
+                    if block not in self.hoisted and self.hoistable(block, succ, copies):
+                        self.hoisted[block] = copies
+                    else:
+                        stubs[block, succ] = _Stub(block, succ, copies)
+        # Empty blocks that only jump on are not emitted; jumps go past them
+        # (their phis are still written by the copies of the incoming edges)
+        skipped = {block for block in self.blocks[1:]
+                   if block.terminator.op == 'jump'
+                   and all(self.modes[value] in ('tree', 'dead') for value in block.instrs)
+                   and not self.real_copies(block, block.terminator.attr[0])}
+        self.skipped = set()
+        for block in skipped:
+            chain = [block]
+            while chain[-1] in skipped and chain[-1].terminator.attr[0] not in chain:
+                chain.append(chain[-1].terminator.attr[0])
+            if chain[-1] not in skipped:  # Not an empty endless loop
+                self.skipped.add(block)
+        layout = []
+        for block in self.blocks:
+            layout.extend(stub for (_, succ), stub in stubs.items() if succ is block)
+            if block not in self.skipped:
+                layout.append(block)
+
+        for k, entry in enumerate(layout):
+            following = layout[k + 1] if k + 1 < len(layout) else None
+            if k > 0:
+                self.out.append((_Label(entry), None))
+            if isinstance(entry, _Stub):
+                self.copy(entry.copies)
+                target = self.target(entry.target)
+                if following is not target:
+                    self.jump("JUMP", target, entry.copies[0][0])
+                continue
+            self.emit_block(entry, following, stubs)
+
+    def target(self, block):
+        """The block control really continues at, past skipped empty blocks."""
+        while block in self.skipped:
+            block = block.terminator.attr[0]
+        return block
+
+    def hoistable(self, block, succ, copies):
+        then, otherwise = block.succs
+        if then is otherwise:
+            return False
+        other = otherwise if succ is then else then
+        read = self.live_in[other] | self.edge_uses[block, other] | self.operand_leaves(block.terminator)
+        return not {self.colors[phi] for phi, _ in copies} & {self.colors[value] for value in read}
+
+    def real_copies(self, pred, block):
+        return [(phi, arg) for phi, arg in self.edge_copies(pred, block)
+                if not (self.mode(arg) == 'slot' and self.colors[arg] == self.colors[phi])]
+
+    def copy(self, copies):
+        # Parallel copy: every value is pushed before any slot is written
+        for phi, arg in copies:
+            self.push(arg)
+        for phi, arg in reversed(copies):
+            self.emit(f"STORER {self.colors[phi]}    // {phi.name or repr(phi)}", arg)
+
+    def emit_block(self, block, following, stubs):
+        for value in block.instrs:
+            mode = self.modes[value]
+            if value.op == 'param' or mode in ('tree', 'dead'):
+                continue
+            if value.op == 'store':
+                index, stored = value.args
+                self.push(stored)
+                self.push(index)
+                self.emit(f"LOADRC {self.bases[value.attr]}    // Array '{value.attr.name}'", value)
+                self.emit("ADD", value)
+                self.emit("STORE", value)
+                continue
+            self.compute(value)
+            if mode == 'slot':
+                self.emit(f"STORER {self.colors[value]}    // {value.name or repr(value)}", value)
+            elif self.module.returns.get(value.attr) != 'void':
+                self.emit("POP    // Discard unused value", value)
+
+        terminator = block.terminator
+        if terminator.op == 'return':
+            if terminator.args:
+                self.push(terminator.args[0])
+            self.emit("RETURN", terminator)
+        elif terminator.op == 'jump':
+            self.copy(self.real_copies(block, terminator.attr[0]))
+            target = self.target(terminator.attr[0])
+            if following is not target:
+                self.jump("JUMP", target, terminator)
+        else:
+            self.copy(self.hoisted.get(block, []))
+            self.push(terminator.args[0])
+            then, otherwise = (stubs.get((block, succ)) or self.target(succ) for succ in terminator.attr)
+            self.jump("JUMPZ", otherwise, terminator)
+            if following is not then:
+                self.jump("JUMP", then, terminator)
+
+    def push(self, value):
+        mode = self.mode(value)
+        if mode == 'const':
+            self.emit(f"LOADC {value.attr}", value)
+        elif mode == 'slot':
+            self.emit(f"LOADR {self.colors[value]}    // {value.name or repr(value)}", value)
+        else:
+            self.compute(value)
+
+    def compute(self, value):
+        op = value.op
+        if op == 'binop':
+            left, right = value.args
+            operator = value.attr
+            if self.swapped(value):
+                left, right = right, left
+                operator = MIRRORED.get(operator, operator)
+            self.push(left)
+            self.push(right)
+            for opcode in BINARY_OPCODES[operator]:
+                self.emit(opcode, value)
+        elif op == 'unop':
+            self.push(value.args[0])
+            self.emit(UNARY_OPCODES[value.attr], value)
+        elif op == 'load':
+            self.push(value.args[0])
+            self.emit(f"LOADRC {self.bases[value.attr]}    // Array '{value.attr.name}'", value)
+            self.emit("ADD", value)
+            self.emit("LOAD", value)
+        elif op == 'call':
+            for arg in reversed(value.args):
+                self.push(arg)
+            self.emit(f"CALL {value.attr}", value)
+        else:
+            raise SSAError(f"Cannot compute {op} {value!r}")
+
+    def swapped(self, value):
+        """Whether to evaluate the right operand first (it needs more stack)."""
+        left, right = value.args
+        if value.attr not in COMMUTATIVE and value.attr not in MIRRORED:
+            return False
+        return self.need(right) > self.need(left)
+
+    def need(self, value):
+        """Operand stack cells needed to push `value` (Sethi-Ullman number)."""
+        if self.mode(value) != 'tree':
+            return 1
+        if value in self.need_memo:
+            return self.need_memo[value]
+        op = value.op
+        if op == 'binop':
+            first, second = value.args
+            if self.swapped(value):
+                first, second = second, first
+            need = max(self.need(first), self.need(second) + 1)
+        elif op == 'unop':
+            need = self.need(value.args[0])
+        elif op == 'load':
+            need = max(self.need(value.args[0]), 2)
+        else:
+            need = max([self.need(arg) + k for k, arg in enumerate(reversed(value.args))] + [1])
+        self.need_memo[value] = need
+        return need
+
+
+def lower(module):
+    """CMa code lines and their source positions for an SSA module."""
+    return SSALowering(module).lower()
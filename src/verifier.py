@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+StackVerifier: Static stack-depth analysis for CMA code.
+
+Walks the control-flow graph of every function (the code at index 0 and every
+CALL target), computes the operand stack depth before each instruction relative
+to the function entry, rejects code whose depths disagree at join points or
+underflow at the top level, and records the maximum depth per function.
+
+CALL is summarized by the callee: a callee pops its arguments with STORER, so
+its lowest depth below the entry is the number of cells it consumes from the
+caller, and the depth at its RETURNs is its net effect on the caller's stack.
+Recursive functions are resolved by iterating until the summaries are stable.
+
+Input is a list of (opcode, operand) pairs; labels use the opcode 'label'.
+"""
+
+# opcode → (cells popped, cells pushed)
+STACK_EFFECTS = {
+    'loadc': (0, 1), 'loada': (0, 1), 'storea': (1, 0),
+    'load': (1, 1), 'store': (2, 0),
+    'loadr': (0, 1), 'storer': (1, 0), 'loadrc': (0, 1),
+    'add': (2, 1), 'sub': (2, 1), 'mul': (2, 1), 'div': (2, 1), 'mod': (2, 1),
+    'eq': (2, 1), 'ge': (2, 1), 'le': (2, 1), 'and': (2, 1), 'or': (2, 1),
+    'neg': (1, 1), 'not': (1, 1),
+    'dup': (1, 2), 'pop': (1, 0),
+    'alloc': (0, 0),  # pushes its operand, see _effect()
+    'enter': (0, 0),
+    'jump': (0, 0), 'jumpz': (1, 0),
+    'call': (0, 0),   # summarized by the callee
+    'return': (0, 0), 'halt': (0, 0),
+}
+
+TERMINATORS = ('jump', 'return', 'halt')
+
+
+class VerificationError(Exception):
+    """Raised when CMA code has an inconsistent or invalid stack layout."""
+
+
+class FunctionInfo:
+    """Stack summary of one function (or of the top-level code)."""
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.entry = entry
+        self.min_depth = 0          # lowest depth relative to entry (−params)
+        self.return_depth = None    # depth at RETURN relative to entry
+        self.max_depth = 0          # own operand stack high-water mark
+        self.calls = {}             # callee → deepest depth at a call site
+
+    @property
+    def params(self):
+        return -self.min_depth
+
+    def __repr__(self):
+        return (f"<function {self.name}@{self.entry} params={self.params} "
+                f"return_depth={self.return_depth} max_depth={self.max_depth}>")
+
+
+class StackInfo:
+    """Result of a successful verification."""
+
+    def __init__(self, depths, functions, max_depth):
+        self.depths = depths          # depth before each instruction (None if unreachable)
+        self.functions = functions    # name → FunctionInfo
+        self.max_depth = max_depth    # whole-program bound, None if recursion makes it unbounded
+
+
+def split_line(line):
+    """Splits a CMA text line into (opcode, operand), or None for blank/comment lines."""
+    line = line.split("//", 1)[0].strip()
+    if not line:
+        return None
+    if line.endswith(":"):
+        return ('label', line[:-1])
+    parts = line.split(None, 1)
+    operand = None
+    if len(parts) > 1:
+        # A quoted literal stays whole, spaces included
+        operand = parts[1] if parts[1][0] in "'\"" else parts[1].split()[0]
+    return (parts[0].lower(), operand)
+
+
+class StackVerifier:
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def verify_lines(self, lines):
+        """Verifies CMA text lines (e.g. CodeGenerator.code)."""
+        return self.verify([pair for pair in map(split_line, lines) if pair is not None])
+
+    def verify(self, program, entries=()):
+        """
+        Verifies (opcode, operand) pairs from the top-level code; `entries`
+        are function labels that are also analyzed as if they were called.
+        """
+        code = []
+        labels = {}
+        for opcode, operand in program:
+            opcode = opcode.lower()
+            if opcode == 'label':
+                labels[operand] = len(code)
+            else:
+                if opcode not in STACK_EFFECTS:
+                    raise VerificationError(f"Unknown instruction: {opcode.upper()}")
+                code.append((opcode, operand))
+
+        for index, (opcode, operand) in enumerate(code):
+            if opcode in ('jump', 'jumpz', 'call') and operand not in labels:
+                raise VerificationError(f"Undefined label '{operand}' at instruction {index}")
+
+        functions = {'<top>': FunctionInfo('<top>', 0)}
+        for name in entries:
+            if name not in labels:
+                raise VerificationError(f"Undefined entry label '{name}'")
+            functions[name] = FunctionInfo(name, labels[name])
+        for opcode, operand in code:
+            if opcode == 'call' and operand not in functions:
+                functions[operand] = FunctionInfo(operand, labels[operand])
+
+        # Worklist over functions: paths through calls to functions without a
+        # summary yet are not followed, and a changed summary re-queues callers.
+        depths = {}
+        callers = {}
+        pending = list(functions)
+        queued = set(pending)
+        while pending:
+            name = pending.pop()
+            queued.discard(name)
+            info = functions[name]
+            before = (info.min_depth, info.return_depth)
+            depths[name] = self._analyze(info, code, labels, functions)
+            for callee in info.calls:
+                callers.setdefault(callee, set()).add(name)
+            if (info.min_depth, info.return_depth) != before:
+                for caller in callers.get(name, ()):
+                    if caller not in queued:
+                        pending.append(caller)
+                        queued.add(caller)
+
+        top = functions['<top>']
+        if top.min_depth < 0:
+            raise VerificationError(f"Stack underflow in top-level code (depth {top.min_depth})")
+
+        merged = [None] * len(code)
+        for name, function_depths in depths.items():
+            for index, depth in function_depths.items():
+                if index < len(code) and merged[index] is None:
+                    merged[index] = depth
+
+        if self.verbose:
+            for info in functions.values():
+                print(f"🔎 {info}")
+
+        return StackInfo(merged, functions, self._total_depth(top, functions))
+
+    def _analyze(self, info, code, labels, functions):
+        depth_at = {info.entry: 0}
+        worklist = [info.entry]
+        min_depth = 0
+        max_depth = 0
+        return_depth = None
+        calls = {}
+
+        while worklist:
+            index = worklist.pop()
+            depth = depth_at[index]
+            if index >= len(code):
+                continue  # Falling off the end stops the machine
+            opcode, operand = code[index]
+
+            if opcode == 'call':
+                callee = functions[operand]
+                calls[operand] = max(calls.get(operand, depth), depth)
+                if callee.return_depth is None:
+                    continue  # Not summarized yet
+                min_depth = min(min_depth, depth + callee.min_depth)
+                after = depth + callee.return_depth
+            else:
+                pops, pushes = self._effect(opcode, operand)
+                min_depth = min(min_depth, depth - pops)
+                after = depth - pops + pushes
+            max_depth = max(max_depth, after)
+
+            if opcode == 'return':
+                if return_depth is not None and return_depth != depth:
+                    raise VerificationError(
+                        f"Inconsistent return depth in '{info.name}': {return_depth} vs {depth} "
+                        f"at instruction {index}")
+                return_depth = depth
+                continue
+            if opcode == 'halt':
+                continue
+
+            successors = []
+            if opcode in ('jump', 'jumpz'):
+                successors.append(labels[operand])
+            if opcode not in TERMINATORS:
+                successors.append(index + 1)
+
+            for successor in successors:
+                known = depth_at.get(successor)
+                if known is None:
+                    depth_at[successor] = after
+                    worklist.append(successor)
+                elif known != after:
+                    raise VerificationError(
+                        f"Inconsistent stack depth at instruction {successor} in '{info.name}': "
+                        f"{known} vs {after}")
+
+        info.min_depth = min_depth
+        info.max_depth = max_depth
+        info.return_depth = return_depth
+        info.calls = calls
+        return depth_at
+
+    def _effect(self, opcode, operand):
+        if opcode == 'alloc':
+            return (0, int(operand))
+        return STACK_EFFECTS[opcode]
+
+    def _total_depth(self, top, functions):
+        """Own max depth plus the deepest callee chain; None for recursive programs.
+
+        Iterative post-order walk of the call graph with memoized totals.
+        """
+        totals = {}
+        on_path = set()
+        stack = [(top.name, False)]
+        while stack:
+            name, expanded = stack.pop()
+            info = functions[name]
+            if expanded:
+                on_path.discard(name)
+                total = info.max_depth
+                for callee, call_depth in info.calls.items():
+                    nested = totals[callee]
+                    if nested is None:
+                        total = None
+                        break
+                    # The callee starts with its arguments still on the caller's stack
+                    total = max(total, call_depth + nested)
+                totals[name] = total
+                continue
+            if name in totals:
+                continue
+            on_path.add(name)
+            stack.append((name, True))
+            for callee in info.calls:
+                if callee in on_path:
+                    return None  # Recursion: no static bound
+                if callee not in totals:
+                    stack.append((callee, False))
+        return totals[top.name]
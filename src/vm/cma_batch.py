@@ -0,0 +1,402 @@
+"""
+Batched CMA execution: one program over many inputs at once.
+
+Every input is a lane. The operand stack and the memory are NumPy arrays with
+one column per lane, and each instruction is applied to all active lanes with
+one vectorized operation. This works because verified CMA code has a static
+stack depth at every instruction, and lanes that run in lockstep share the
+same frame layout; so sp, fp and the call stack are scalars and only values
+are per lane. sp is taken from the verifier's static depth of each
+instruction, relative to the stack base of the current call.
+
+When the lanes disagree at a JUMPZ, the taken and the fall-through lanes run
+one after the other under an active-lane mask and reconverge at the branch's
+immediate post-dominator (or at the function exit, for branches that only
+meet again at RETURN), using a stack of (pc, reconvergence pc, mask) entries.
+"""
+
+from src.verifier import StackVerifier
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency of the batched VM
+    np = None
+
+
+RESULT_DTYPE = None if np is None else np.int64
+
+
+def post_dominators(successors):
+    """Immediate post-dominator of every node; node len(successors) is the exit."""
+    exit_node = len(successors)
+    predecessors = [[] for _ in range(exit_node + 1)]
+    for node, targets in enumerate(successors):
+        for target in targets:
+            predecessors[target].append(node)
+
+    # Postorder of the reverse CFG, walked from the exit
+    order = []
+    visited = [False] * (exit_node + 1)
+    visited[exit_node] = True
+    stack = [(exit_node, iter(predecessors[exit_node]))]
+    while stack:
+        node, pending = stack[-1]
+        for predecessor in pending:
+            if not visited[predecessor]:
+                visited[predecessor] = True
+                stack.append((predecessor, iter(predecessors[predecessor])))
+                break
+        else:
+            stack.pop()
+            order.append(node)
+    number = {node: index for index, node in enumerate(order)}
+
+    ipdom = [None] * (exit_node + 1)
+    ipdom[exit_node] = exit_node
+
+    def intersect(a, b):
+        while a != b:
+            while number[a] < number[b]:
+                a = ipdom[a]
+            while number[b] < number[a]:
+                b = ipdom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(order):
+            if node == exit_node:
+                continue
+            new = None
+            for target in successors[node]:
+                if ipdom[target] is not None:
+                    new = target if new is None else intersect(target, new)
+            if new != ipdom[node]:
+                ipdom[node] = new
+                changed = True
+
+    # Nodes that never reach the exit (infinite loops) reconverge at the exit
+    return [exit_node if d is None else d for d in ipdom[:exit_node]]
+
+
+class CMaBatchProcessor:
+    """Runs one CMA program over many lanes; see the module docstring."""
+
+    def __init__(self, memory_size=1000, dtype=RESULT_DTYPE, max_steps=None):
+        if np is None:
+            raise ImportError("The batched CMA VM requires numpy (pip install numpy)")
+        self.memory_size = memory_size
+        self.dtype = dtype
+        self.max_steps = max_steps
+        self.code = []
+        self.labels = {}
+        self.ipdom = []
+        self.depths = []
+        self.steps = 0
+
+    def load_instructions(self, instruction_list):
+        program = [(instr.opcode, instr.operand) for instr in instruction_list]
+        # Lockstep execution needs a static stack depth at every instruction
+        self.depths = StackVerifier().verify(program).depths
+        self.program = program
+
+        for opcode, operand in program:
+            if opcode == 'label':
+                self.labels[operand] = len(self.code)
+            else:
+                self.code.append([opcode, operand])
+
+        exit_node = len(self.code)
+        successors = []
+        for index, (opcode, operand) in enumerate(self.code):
+            if opcode in ('jump', 'jumpz', 'call'):
+                self.code[index][1] = self.labels[operand]
+            elif opcode == 'loadc':
+                self.code[index][1] = self._constant(operand)
+            elif operand is not None:
+                self.code[index][1] = int(operand)
+
+            if opcode == 'jump':
+                successors.append([self.labels[operand]])
+            elif opcode == 'jumpz':
+                successors.append([self.labels[operand], index + 1])
+            elif opcode in ('return', 'halt'):
+                successors.append([exit_node])
+            else:
+                successors.append([index + 1])
+        self.ipdom = post_dominators(successors)
+
+    def _constant(self, value):
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and len(value) == 3 and value[0] == value[-1] == "'":
+            return ord(value[1])
+        if isinstance(value, str) and value in self.labels:
+            return self.labels[value]
+        if np.issubdtype(self.dtype, np.floating):
+            return float(value)
+        raise ValueError(f"Invalid LOADC operand for {np.dtype(self.dtype).name} lanes: '{value}'")
+
+    def run(self, lanes=None, memory=None, entry=None, args=None):
+        """
+        Runs all lanes to completion and returns one return value per lane.
+
+        lanes:  number of lanes (inferred from memory or args if omitted)
+        memory: optional initial memory image per lane, shape (lanes, cells)
+        entry:  optional function label to call instead of starting at pc 0
+        args:   arguments for `entry`, shape (lanes, params)
+        """
+        if args is not None:
+            args = np.asarray(args, dtype=self.dtype)
+            if args.ndim == 1:
+                args = args[:, None]
+            lanes = args.shape[0]
+        if memory is not None:
+            memory = np.asarray(memory, dtype=self.dtype)
+            lanes = memory.shape[0]
+        if lanes is None:
+            raise ValueError("Number of lanes is unknown: pass lanes, memory or args")
+
+        cells = self.memory_size if memory is None else max(self.memory_size, memory.shape[1])
+        self.memory = np.zeros((cells, lanes), dtype=self.dtype)
+        if memory is not None:
+            self.memory[:memory.shape[1]] = memory.T
+        self.stack = np.zeros((64, lanes), dtype=self.dtype)
+        self.sp = 0
+        self.base = 0  # sp at the entry of the current call
+        self.fp = 0
+        self.frame_top = 0
+        self.frames = []
+        self.halted = np.zeros(lanes, dtype=bool)
+        self.return_values = np.zeros(lanes, dtype=self.dtype)
+        self.steps = 0
+
+        all_lanes = np.ones(lanes, dtype=bool)
+        pc = 0
+        if entry is not None:
+            if entry not in self.labels:
+                raise ValueError(f"Unknown entry function '{entry}'")
+            if self.depths[self.labels[entry]] is None:
+                # Not called from the top-level code: verify it as a root of its own
+                self.depths = StackVerifier().verify(self.program, entries=[entry]).depths
+            # Arguments are pushed in reverse, as a CALL site would, and the
+            # entry function returns past the end of the code, which halts
+            for column in reversed(range(args.shape[1] if args is not None else 0)):
+                self._push(args[:, column], all_lanes, True)
+            self.frames.append((len(self.code), self.fp, self.frame_top, self.base))
+            self.base = self.sp
+            self.fp = self.frame_top + 2
+            self.frame_top = self.fp
+            pc = self.labels[entry]
+
+        # SIMT stack of [pc, reconvergence pc, mask, all lanes active]
+        self.simt = [[pc, None, all_lanes, True]]
+        self._execute()
+        return self.return_values
+
+    # === Execution ===
+
+    def _exit_token(self):
+        """Reconvergence point 'function exit' of the current call level."""
+        return -1 - len(self.frames)
+
+    def _execute(self):
+        code = self.code
+        depths = self.depths
+        n = len(code)
+        simt = self.simt
+        while simt:
+            entry = simt[-1]
+            pc, rpc, mask, full = entry
+            if pc == rpc:
+                simt.pop()  # These lanes reached the reconvergence point
+                continue
+            if pc < 0:
+                self._return(entry)  # Reconverged at the function exit
+                continue
+            if pc >= n:
+                self._halt(entry)
+                continue
+
+            self.steps += 1
+            if self.max_steps is not None and self.steps > self.max_steps:
+                raise RuntimeError(f"Step budget of {self.max_steps} exceeded")
+            opcode, operand = code[pc]
+            # Restores sp when switching between divergent paths
+            self.sp = self.base + depths[pc]
+            entry[0] = pc + 1
+            self._dispatch(opcode, operand, entry, pc)
+
+    def _dispatch(self, opcode, operand, entry, pc):
+        mask, full = entry[2], entry[3]
+        stack = self.stack
+
+        if opcode in BINARY:
+            self.sp -= 1
+            a, b = stack[self.sp - 1], stack[self.sp]
+            self._write(self.sp - 1, BINARY[opcode](a, b), mask, full)
+        elif opcode == 'loadc':
+            self._push(operand, mask, full)
+        elif opcode == 'loadr':
+            self._push(self.memory[self.fp + operand], mask, full)
+        elif opcode == 'storer':
+            self.sp -= 1
+            self._store(self.fp + operand, stack[self.sp], mask, full)
+        elif opcode == 'loadrc':
+            self._push(self.fp + operand, mask, full)
+        elif opcode == 'jumpz':
+            self.sp -= 1
+            zero = stack[self.sp] == 0
+            self._branch(entry, pc, operand, zero if full else zero & mask)
+        elif opcode == 'jump':
+            entry[0] = operand
+        elif opcode == 'load':
+            addresses = stack[self.sp - 1].astype(np.intp)
+            self._write(self.sp - 1, self._gather(addresses), mask, full)
+        elif opcode == 'store':
+            self.sp -= 2
+            addresses = stack[self.sp + 1].astype(np.intp)
+            self._scatter(addresses, stack[self.sp], mask)
+        elif opcode == 'loada':
+            self._push(self.memory[operand], mask, full)
+        elif opcode == 'storea':
+            self.sp -= 1
+            self._store(operand, stack[self.sp], mask, full)
+        elif opcode == 'neg':
+            self._write(self.sp - 1, -stack[self.sp - 1], mask, full)
+        elif opcode == 'not':
+            self._write(self.sp - 1, (stack[self.sp - 1] == 0).astype(self.dtype), mask, full)
+        elif opcode == 'dup':
+            self._push(stack[self.sp - 1], mask, full)
+        elif opcode == 'pop':
+            self.sp -= 1
+        elif opcode == 'alloc':
+            for _ in range(operand):
+                self._push(0, mask, full)
+        elif opcode == 'call':
+            self.frames.append((entry[0], self.fp, self.frame_top, self.base))
+            self.base = self.sp
+            self.fp = self.frame_top + 2
+            self.frame_top = self.fp
+            entry[0] = operand
+        elif opcode == 'enter':
+            end = self.fp + operand
+            self._ensure_memory(end)
+            if full:
+                self.memory[self.fp:end] = 0
+            else:
+                self.memory[self.fp:end, mask] = 0
+            self.frame_top = end
+        elif opcode == 'return':
+            if entry[1] == self._exit_token():
+                entry[0] = entry[1]  # Wait at the function exit for the other lanes
+            else:
+                self._return(entry)
+        elif opcode == 'halt':
+            self._halt(entry)
+        else:
+            raise Exception(f"Unknown instruction: {opcode.upper()}")
+
+    def _branch(self, entry, pc, target, taken):
+        mask = entry[2]
+        count = int(np.count_nonzero(taken))
+        active = int(np.count_nonzero(mask)) if not entry[3] else len(mask)
+        if count == 0:
+            return  # Everyone falls through
+        if count == active:
+            entry[0] = target
+            return
+
+        # Divergence: both sides run under masks and meet at the post-dominator
+        reconverge = self.ipdom[pc]
+        if reconverge == len(self.code):
+            reconverge = self._exit_token()
+        sides = [(pc + 1, mask & ~taken), (target, taken)]
+        if reconverge == entry[1]:
+            self.simt.pop()  # The enclosing entry already waits there
+        else:
+            entry[0] = reconverge
+        for side_pc, side_mask in sides:
+            if side_pc != reconverge:
+                self.simt.append([side_pc, reconverge, side_mask, False])
+
+    def _return(self, entry):
+        if not self.frames:
+            self._halt(entry)  # Returning from the outermost code stops these lanes
+            return
+        entry[0], self.fp, self.frame_top, self.base = self.frames.pop()
+
+    def _halt(self, entry):
+        mask = entry[2] & ~self.halted
+        if self.sp > 0:
+            self.return_values[mask] = self.stack[self.sp - 1][mask]
+        self.halted |= mask
+        self.simt.pop()
+        for waiting in self.simt:
+            waiting[2] = waiting[2] & ~self.halted
+            waiting[3] = False
+
+    # === Helpers ===
+
+    def _push(self, values, mask, full):
+        if self.sp == len(self.stack):
+            self.stack = np.concatenate([self.stack, np.zeros_like(self.stack)])
+        self._write(self.sp, values, mask, full)
+        self.sp += 1
+
+    def _write(self, row, values, mask, full):
+        if full:
+            self.stack[row] = values
+        else:
+            np.copyto(self.stack[row], values, where=mask)
+
+    def _store(self, address, values, mask, full):
+        self._ensure_memory(address + 1)
+        if full:
+            self.memory[address] = values
+        else:
+            np.copyto(self.memory[address], values, where=mask)
+
+    def _gather(self, addresses):
+        self._ensure_memory(int(addresses.max()) + 1)
+        return self.memory[addresses, np.arange(len(addresses))]
+
+    def _scatter(self, addresses, values, mask):
+        lanes = np.nonzero(mask)[0]
+        addresses = addresses[lanes]
+        self._ensure_memory(int(addresses.max()) + 1 if len(lanes) else 0)
+        self.memory[addresses, lanes] = values[lanes]
+
+    def _ensure_memory(self, size):
+        if size > len(self.memory):
+            grow = max(size, 2 * len(self.memory)) - len(self.memory)
+            self.memory = np.concatenate([self.memory, np.zeros((grow, self.memory.shape[1]), dtype=self.dtype)])
+
+
+def _floor_divide(a, b):
+    safe = np.where(b == 0, 1, b)
+    return np.where(b == 0, 0, a // safe)
+
+
+def _mod(a, b):
+    safe = np.where(b == 0, 1, b)
+    return np.where(b == 0, 0, a % safe)
+
+
+def _flag(values):
+    return values.astype(RESULT_DTYPE)
+
+
+BINARY = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'mul': lambda a, b: a * b,
+    'div': _floor_divide,
+    'mod': _mod,
+    'eq': lambda a, b: _flag(a == b),
+    'ge': lambda a, b: _flag(a > b),
+    'le': lambda a, b: _flag(a < b),
+    'and': lambda a, b: _flag((a != 0) & (b != 0)),
+    'or': lambda a, b: _flag((a != 0) | (b != 0)),
+}
@@ -0,0 +1,349 @@
+import sys
+import types
+from src.verifier import StackVerifier, STACK_EFFECTS
+from src.vm import cma_memory
+
+
+# Raw opcode spelling → interned lowercase opcode, shared by all instructions
+_OPCODES = {}
+
+
+def intern_opcode(opcode):
+    interned = _OPCODES.get(opcode)
+    if interned is None:
+        interned = _OPCODES[opcode] = sys.intern(opcode.lower())
+    return interned
+
+
+class CMaInstruction:
+    __slots__ = ('opcode', 'operand')
+
+    def __init__(self, opcode, operand=None):
+        self.opcode = intern_opcode(opcode)
+        self.operand = operand
+
+# Organizational cells stored below the frame pointer of every call frame:
+#   memory[fp - 2] = return address, memory[fp - 1] = caller's frame pointer
+FRAME_HEADER = 2
+
+
+class CMaInstructionProcessor:
+    def __init__(self, verbose = False, memory_size=1000, max_memory=1 << 22, memory_model='dense'):
+        self.stack = []
+        self.max_memory = max_memory
+        self.memory_model = memory_model
+        if memory_model == 'dense':
+            # Frames are carved out of this preallocated memory and reused across calls
+            self.memory = [0] * memory_size
+        elif memory_model == 'paged':
+            # The whole address space up front; pages are allocated on first write
+            self.memory = cma_memory.PagedMemory(max_memory)
+            for name, op in cma_memory.PAGED_OPS.items():
+                setattr(self, name, types.MethodType(op, self))
+        else:
+            raise ValueError(f"Unknown memory model: {memory_model!r} (expected 'dense' or 'paged')")
+        self.fp = 0         # frame pointer: relative address 0 of the current frame
+        self.frame_top = 0  # first cell past the current frame
+        self.call_depth = 0
+        self.pc = 0
+        self.instructions = []
+        self.labels = {}
+        self.return_value = None
+        self.running = False
+        self.finished = False  # Stopped for good (HALT, outermost RETURN or end of code)
+        self.executed = 0      # Instructions executed by resume()
+        self.verbose = verbose
+        # Set by a verified load: underflow is impossible, so no runtime checks
+        self.verified = False
+        self.stack_info = None
+        self.max_stack_depth = None
+        self.profiler = None
+
+    def load_instructions(self, instruction_list, verify=False):
+        if verify:
+            self._verify([(instr.opcode, instr.operand) for instr in instruction_list])
+
+        raw_index = 0
+        for instr in instruction_list:
+            if instr.opcode == "label":
+                self.labels[instr.operand] = raw_index
+            else:
+                self.instructions.append(instr)
+                raw_index += 1
+
+    def load_program(self, program, verify=False):
+        """
+        Loads (opcode, operand) pairs with labels as ('label', name), e.g.
+        CodeGenerator.instructions(), without going through CMA text.
+        """
+        if verify:
+            self._verify(program)
+
+        shared = {}  # Identical instructions share one object, as in CMaProgramParser
+        for pair in program:
+            if pair[0] == "label":
+                self.labels[pair[1]] = len(self.instructions)
+                continue
+            instr = shared.get(pair)
+            if instr is None:
+                instr = shared[pair] = CMaInstruction(*pair)
+            self.instructions.append(instr)
+
+    def load_bytecode(self, program, verify=False):
+        """Loads a src.bytecode.BytecodeProgram; its label table is already resolved."""
+        if verify:
+            self._verify(program.instructions())
+
+        opcode = program.opcode
+        operand = program.operand
+        self.instructions = [CMaInstruction(opcode(i), operand(i)) for i in range(len(program))]
+        self.labels.update(program.labels)
+
+    def enable_profiling(self):
+        """
+        Counts executions from now on; call after loading. Only this instance
+        gets the counting step, so unprofiled VMs pay nothing.
+        """
+        from src.vm.cma_profiler import CMaProfiler
+        self.profiler = CMaProfiler(self)
+        return self.profiler
+
+    def snapshot(self, compress=False):
+        """Machine state as compact bytes; see src/vm/cma_snapshot.py."""
+        from src.vm import cma_snapshot
+        return cma_snapshot.snapshot(self, compress)
+
+    def restore(self, data):
+        """Restores a snapshot taken from a VM with the same program loaded."""
+        from src.vm import cma_snapshot
+        return cma_snapshot.restore(self, data)
+
+    def _verify(self, program):
+        # Raises VerificationError before anything is loaded
+        self.stack_info = StackVerifier().verify(program)
+        self.max_stack_depth = self.stack_info.max_depth
+        self.verified = True
+
+    def step(self):
+        if (self.pc >= len(self.instructions)):
+            self.running = False
+            return
+        
+        instruction = self.instructions[self.pc]
+        self.pc += 1
+
+        if self.verbose:
+            print(f"[PC={self.pc-1}] {instruction.opcode.upper()} {instruction.operand if instruction.operand is not None else ''}")
+            print(f"    Stack: {self.stack}")
+            print(f"    Memory (first 10): {self.memory[:10]}")
+
+        if not self.verified:
+            effect = STACK_EFFECTS.get(instruction.opcode)
+            if effect is not None and len(self.stack) < effect[0]:
+                raise RuntimeError(f"Stack underflow on {instruction.opcode.upper()}")
+
+        # Dispatch based on opcode
+        method = getattr(self, f"op_{instruction.opcode.lower()}", None)
+        if method:
+            method(instruction.operand)
+        else:
+            raise Exception(f"Unknown instruction: {instruction.opcode.upper()}")
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.step()
+        self.finished = True
+
+    def resume(self, quantum):
+        """
+        Executes at most `quantum` instructions and returns True while the
+        program can continue. All state stays in the VM, so runs of many VMs
+        can be interleaved one quantum at a time.
+        """
+        if self.finished:
+            return False
+        self.running = True
+        step = self.step
+        executed = 0
+        try:
+            for executed in range(1, quantum + 1):
+                step()
+                if not self.running:
+                    self.finished = True
+                    break
+        finally:
+            self.executed += executed
+        return not self.finished
+
+    # === Instruction Implementations ===
+
+    def op_alloc(self, size):
+        size = int(size)
+        for _ in range(size):
+            self.stack.append(0)
+    
+    def op_loadc(self, value):
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            self.stack.append(int(value))
+        elif isinstance(value, str):
+            # Character literal check
+            if len(value) == 3 and value.startswith("'") and value.endswith("'"):
+                self.stack.append(ord(value[1]))
+            else:
+                try:
+                    # Try to parse as float
+                    self.stack.append(float(value))
+                except ValueError:
+                    if value in self.labels:
+                        self.stack.append(self.labels[value])
+                    else:
+                        raise ValueError(f"Invalid LOADC operand: '{value}'")
+        elif isinstance(value, float):
+            self.stack.append(value)
+        else:
+            raise ValueError(f"Invalid LOADC operand: '{value}'")
+
+    def op_call(self, function_name):
+        if function_name not in self.labels:
+            raise RuntimeError(f"Unknown function: {function_name}")
+
+        # New frame starts right after the caller's frame
+        fp = self.frame_top + FRAME_HEADER
+        self._ensure_memory(fp)
+        self.memory[fp - 2] = self.pc  # Save where to return to
+        self.memory[fp - 1] = self.fp  # Save caller's frame pointer
+        self.fp = fp
+        self.frame_top = fp
+        self.call_depth += 1
+        self.pc = self.labels[function_name]
+
+    def op_enter(self, size):
+        size = int(size)
+        end = self.fp + size
+        # Ensure memory is large enough, then clear the reused frame cells
+        self._ensure_memory(end)
+        self.memory[self.fp:end] = [0] * size
+        self.frame_top = end
+
+    def op_return(self, _=None):
+        if self.call_depth == 0:
+            # Returning from the outermost code stops the machine
+            self.running = False
+            self.return_value = self.stack[-1] if self.stack else 0
+            return
+
+        # The return value (if any) stays on top of the stack
+        fp = self.fp
+        self.pc = self.memory[fp - 2]
+        self.fp = self.memory[fp - 1]
+        self.frame_top = fp - FRAME_HEADER
+        self.call_depth -= 1
+
+    def op_halt(self, _=None):
+        self.running = False
+        self.return_value = self.stack[-1] if self.stack else 0
+
+    def op_loadr(self, offset):
+        self.stack.append(self.memory[self.fp + int(offset)])
+
+    def op_storer(self, offset):
+        self.memory[self.fp + int(offset)] = self.stack.pop()
+
+    def op_loadrc(self, offset):
+        self.stack.append(self.fp + int(offset))
+
+    def op_load(self, _=None):
+        address = self.stack.pop()
+        self._check_memory_bounds(address)
+        self.stack.append(self.memory[address])
+
+    def op_store(self, _=None):
+        address = self.stack.pop()
+        self._check_memory_bounds(address)
+        self.memory[address] = self.stack.pop()
+
+    def op_pop(self, _=None):
+        self.stack.pop()
+
+    def op_dup(self, _=None):
+        self.stack.append(self.stack[-1])
+
+    def op_loada(self, address):
+        address = int(address)
+        self.stack.append(self.memory[address])
+    
+    def op_storea(self, address):
+        address = int(address)
+        self.memory[address] = self.stack.pop()
+
+    def op_add(self, _=None):
+        self._binary_op(lambda a, b: a + b)
+
+    def op_sub(self, _=None):
+        self._binary_op(lambda a, b: a - b)
+
+    def op_mul(self, _=None):
+        self._binary_op(lambda a, b: a * b)
+
+    def op_div(self, _=None):
+        self._binary_op(lambda a, b: a // b if b != 0 else 0)
+
+    def op_mod(self, _=None):
+        self._binary_op(lambda a, b: a % b if b != 0 else 0)
+
+    def op_eq(self, _=None):
+        self._binary_op(lambda a, b: 1 if a == b else 0)
+    
+    def op_neg(self, _=None):
+        value = self.stack.pop()
+        self.stack.append(-value)
+    
+    def op_and(self, _=None):
+        self._binary_op(lambda a, b: 1 if a and b else 0)
+
+    def op_or(self, _=None):
+        self._binary_op(lambda a, b: 1 if a or b else 0)
+
+    def op_not(self, _=None):
+        value = self.stack.pop()
+        self.stack.append(1 if value == 0 else 0)
+    
+    def op_ge(self, _=None):
+        self._binary_op(lambda a, b: 1 if a > b else 0)
+    
+    def op_le(self, _=None):
+        self._binary_op(lambda a, b: 1 if a < b else 0)
+
+    def op_jump(self, label):
+        if label not in self.labels:
+            raise Exception(f"Undefined label: {label}")
+        self.pc = self.labels[label]
+
+    def op_jumpz(self, label):
+        if label not in self.labels:
+            raise Exception(f"Undefined label: {label}")
+        condition = self.stack.pop()
+        if condition == 0:
+            self.pc = self.labels[label]
+
+    # === Helpers ===
+
+    def _binary_op(self, func):
+        b = self.stack.pop()
+        a = self.stack.pop()
+        result = func(a, b)
+        self.stack.append(result)
+
+    def _ensure_memory(self, size):
+        """Grows memory geometrically so deep recursion reallocates rarely."""
+        if size <= len(self.memory):
+            return
+        if size > self.max_memory:
+            raise RuntimeError(f"Stack overflow: frame memory exceeds {self.max_memory} cells")
+        new_size = min(max(size, 2 * len(self.memory)), self.max_memory)
+        self.memory.extend([0] * (new_size - len(self.memory)))
+
+    def _check_memory_bounds(self, index):
+        if not (0 <= index < len(self.memory)):
+            raise IndexError(f"Memory access out of bounds at index {index}")
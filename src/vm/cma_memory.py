@@ -0,0 +1,176 @@
+"""
+Paged sparse memory for the CMA VM.
+
+The address space is split into fixed-size pages. Every page starts as the
+shared, immutable ZERO_PAGE and gets its own list on the first write, so a
+huge array or a store to a high address costs one page, not every cell below
+it. Clearing a range (ENTER) hands whole pages back to the zero page.
+
+PagedMemory supports the list operations the rest of the tooling uses
+(indexing, slices, len, iteration). The VM does not go through them on its
+hot path: CMaInstructionProcessor(memory_model='paged') installs the op_* methods
+below, which index the page table directly.
+"""
+
+from itertools import chain, islice
+
+PAGE_SHIFT = 10
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+
+# Shared by all unwritten pages; a tuple, so a stray write fails loudly
+ZERO_PAGE = (0,) * PAGE_SIZE
+
+
+class PagedMemory:
+    def __init__(self, size):
+        self.size = size
+        self.pages = [ZERO_PAGE] * (-(-size // PAGE_SIZE))
+        self.allocations = 0
+
+    @classmethod
+    def from_cells(cls, cells, size=None):
+        memory = cls(len(cells) if size is None else size)
+        for start in range(0, len(cells), PAGE_SIZE):
+            chunk = cells[start:start + PAGE_SIZE]
+            if any(chunk):
+                memory.allocate(start >> PAGE_SHIFT)[:len(chunk)] = chunk
+        return memory
+
+    def allocate(self, number):
+        """Returns the writable page `number`, allocating it on first use."""
+        page = self.pages[number]
+        if page is ZERO_PAGE:
+            page = self.pages[number] = [0] * PAGE_SIZE
+            self.allocations += 1
+        return page
+
+    def resize(self, size):
+        if size > self.size:
+            self.pages.extend([ZERO_PAGE] * (-(-size // PAGE_SIZE) - len(self.pages)))
+        self.size = size
+
+    def clear(self, start, stop):
+        """Zeroes cells start..stop-1; whole pages go back to the zero page."""
+        pages = self.pages
+        while start < stop:
+            number = start >> PAGE_SHIFT
+            offset = start & PAGE_MASK
+            end = min(stop, (number + 1) << PAGE_SHIFT)
+            if offset == 0 and end - start == PAGE_SIZE:
+                pages[number] = ZERO_PAGE
+            elif pages[number] is not ZERO_PAGE:
+                pages[number][offset:offset + end - start] = [0] * (end - start)
+            start = end
+
+    def _index(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("memory index out of range")
+        return index
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        index = self._index(index)
+        return self.pages[index >> PAGE_SHIFT][index & PAGE_MASK]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.size))
+            values = list(value)
+            if len(values) != len(indices):
+                raise ValueError("paged memory cannot change size through slice assignment")
+            if indices.step == 1 and not any(values):
+                self.clear(indices.start, indices.stop)
+                return
+            for i, cell in zip(indices, values):
+                self[i] = cell
+            return
+        index = self._index(index)
+        self.allocate(index >> PAGE_SHIFT)[index & PAGE_MASK] = value
+
+    def __iter__(self):
+        return islice(chain.from_iterable(self.pages), self.size)
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def used_cells(self):
+        """Cells up to the end of the last resident page; the rest are zero."""
+        last = len(self.pages)
+        while last and self.pages[last - 1] is ZERO_PAGE:
+            last -= 1
+        return list(islice(chain.from_iterable(self.pages[:last]), self.size))
+
+    def stats(self):
+        resident = sum(1 for page in self.pages if page is not ZERO_PAGE)
+        return {
+            'page_size': PAGE_SIZE,
+            'pages': len(self.pages),
+            'resident_pages': resident,
+            'resident_cells': resident * PAGE_SIZE,
+            'allocations': self.allocations,
+        }
+
+
+# === VM fast path: installed on the instance by CMaInstructionProcessor ===
+
+def op_loadr(self, offset):
+    address = self.fp + int(offset)
+    self.stack.append(self.memory.pages[address >> PAGE_SHIFT][address & PAGE_MASK])
+
+
+def op_storer(self, offset):
+    address = self.fp + int(offset)
+    page = self.memory.pages[address >> PAGE_SHIFT]
+    if page is ZERO_PAGE:
+        page = self.memory.allocate(address >> PAGE_SHIFT)
+    page[address & PAGE_MASK] = self.stack.pop()
+
+
+def op_load(self, _=None):
+    address = self.stack.pop()
+    self._check_memory_bounds(address)
+    self.stack.append(self.memory.pages[address >> PAGE_SHIFT][address & PAGE_MASK])
+
+
+def op_store(self, _=None):
+    address = self.stack.pop()
+    self._check_memory_bounds(address)
+    page = self.memory.pages[address >> PAGE_SHIFT]
+    if page is ZERO_PAGE:
+        page = self.memory.allocate(address >> PAGE_SHIFT)
+    page[address & PAGE_MASK] = self.stack.pop()
+
+
+def op_loada(self, address):
+    address = int(address)
+    self.stack.append(self.memory.pages[address >> PAGE_SHIFT][address & PAGE_MASK])
+
+
+def op_storea(self, address):
+    address = int(address)
+    page = self.memory.pages[address >> PAGE_SHIFT]
+    if page is ZERO_PAGE:
+        page = self.memory.allocate(address >> PAGE_SHIFT)
+    page[address & PAGE_MASK] = self.stack.pop()
+
+
+def op_enter(self, size):
+    end = self.fp + int(size)
+    self._ensure_memory(end)
+    self.memory.clear(self.fp, end)
+    self.frame_top = end
+
+
+PAGED_OPS = {
+    'op_loadr': op_loadr, 'op_storer': op_storer,
+    'op_load': op_load, 'op_store': op_store,
+    'op_loada': op_loada, 'op_storea': op_storea,
+    'op_enter': op_enter,
+}
@@ -0,0 +1,62 @@
+import re
+from src.vm.cma_instruction import CMaInstruction
+
+# One match per line: an opcode with an optional integer, quoted (char or
+# string literal, may contain spaces) or other (label/float) operand, or a
+# label definition, followed by an optional // comment. Empty and
+# comment-only lines match with no groups set.
+LINE_PATTERN = re.compile(r"""
+    [ \t]*
+    (?:
+        (?P<opcode>[A-Za-z_]\w*)
+        (?:[ \t]+(?:
+            (?P<int>[-+]?\d+)(?![^\s/])
+          | (?P<quoted>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+          | (?P<text>[^\s/]+)
+        ))?
+      | (?P<label>[^\s:]+):
+    )?
+    \s*(?://[^\n]*)?\s*
+    """, re.VERBOSE)
+
+
+class CMaProgramParser:
+    def __init__(self):
+        pass
+
+    def parse_lines(self, lines):
+        """
+        Parses an iterable of lines, consumed lazily (e.g. an open file).
+
+        Identical lines share one CMaInstruction object, so repeated code is
+        matched only once; instructions are treated as immutable by the VM.
+        """
+        instructions = []
+        append = instructions.append
+        cache = {}
+        cached = cache.get
+        match = LINE_PATTERN.fullmatch
+        for number, line in enumerate(lines, start=1):
+            instruction = cached(line)
+            if instruction is None:
+                m = match(line)
+                if m is None:
+                    raise SyntaxError(f"Invalid CMA line {number}: {line.strip()!r}")
+                opcode, number_text, quoted, text, label = m.groups()
+                if opcode is not None:
+                    instruction = CMaInstruction(opcode, int(number_text) if number_text is not None else quoted or text)
+                elif label is not None:
+                    instruction = CMaInstruction("label", label)
+                else:
+                    instruction = False  # Empty or comment-only line
+                cache[line] = instruction
+            if instruction:
+                append(instruction)
+        return instructions
+
+    def parse_file(self, filepath):
+        with open(filepath, "r") as f:
+            return self.parse_lines(f)
+
+    def parse_string(self, program_string):
+        return self.parse_lines(program_string.splitlines())
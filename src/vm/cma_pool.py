@@ -0,0 +1,297 @@
+"""
+Parallel CMA execution: many programs, or one program over many initial
+memory images, run across worker processes.
+
+Every distinct program is parsed, verified and assembled to bytecode once
+(spread over the pool). All bytecode goes into one shared memory block, so
+workers only receive (job id, program index, memory image) tuples and decode
+each program once per worker, straight from the shared block. Results are streamed back in
+completion order.
+
+Usage:
+    python -m src.vm.cma_pool prog1.cma prog2.cma ... [--workers 8]
+    python -m src.vm.cma_pool prog.cma --memory images.txt
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from src import bytecode
+from src.verifier import StackVerifier
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+# How often (in steps) a running job checks its timeout
+TIMEOUT_CHECK_INTERVAL = 1024
+
+EXTENT = struct.Struct('<Q')
+
+
+class JobResult:
+    """Outcome of one job; status is 'ok', 'error', 'step_budget' or 'timeout'."""
+
+    __slots__ = ('job_id', 'program', 'status', 'value', 'steps', 'elapsed', 'error')
+
+    def __init__(self, job_id, program, status, value=None, steps=0, elapsed=0.0, error=None):
+        self.job_id = job_id
+        self.program = program
+        self.status = status
+        self.value = value
+        self.steps = steps
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 'ok'
+
+    def __repr__(self):
+        detail = self.value if self.ok else self.error
+        return f"<job {self.job_id} program={self.program} {self.status}: {detail}>"
+
+
+def decode(text):
+    """Parses and verifies CMA text and returns its bytecode."""
+    instructions = CMaProgramParser().parse_string(text)
+    program = [(instr.opcode, instr.operand) for instr in instructions]
+    StackVerifier().verify(program)
+    return bytecode.assemble(program)
+
+
+def _decode_or_error(text):
+    try:
+        return decode(text), None
+    except Exception as e:
+        return b'', str(e)
+
+
+class SharedCode:
+    """
+    Bytecode of several programs in one shared memory block.
+
+    Layout: uint64 program count, (offset, size) uint64 pairs, then the
+    8-byte aligned bytecode of every program.
+    """
+
+    def __init__(self, blobs):
+        extents = []
+        offset = EXTENT.size * (2 * len(blobs) + 1)
+        for blob in blobs:
+            extents.append((offset, len(blob)))
+            offset = bytecode._align(offset + len(blob))
+        self.shm = shared_memory.SharedMemory(create=True, size=offset)
+        EXTENT.pack_into(self.shm.buf, 0, len(blobs))
+        for index, (blob, (start, size)) in enumerate(zip(blobs, extents)):
+            EXTENT.pack_into(self.shm.buf, EXTENT.size * (2 * index + 1), start)
+            EXTENT.pack_into(self.shm.buf, EXTENT.size * (2 * index + 2), size)
+            self.shm.buf[start:start + size] = blob
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def read_extents(buf):
+    count, = EXTENT.unpack_from(buf, 0)
+    values = [EXTENT.unpack_from(buf, EXTENT.size * (i + 1))[0] for i in range(2 * count)]
+    return list(zip(values[0::2], values[1::2]))
+
+
+# === Worker side ===
+
+# Attached shared block and the programs decoded from it in this process
+_worker = {'name': None}
+
+
+def _attach(name, owner=True):
+    if _worker['name'] == name:
+        return
+    if _worker['name'] is not None:
+        _worker['shm'].close()
+    if owner or os.name != 'posix':
+        shm = shared_memory.SharedMemory(name=name)
+    elif sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # Attaching registers the block with this process's resource tracker,
+        # which would "clean up" the parent's block again at exit
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister('/' + shm.name, "shared_memory")
+    _worker.update(name=name, shm=shm, extents=read_extents(shm.buf), decoded={})
+
+
+def _detach():
+    if _worker['name'] is not None:
+        _worker['shm'].close()
+        _worker.update(name=None, shm=None, extents=None, decoded=None)
+
+
+def _instructions(index):
+    """Decodes a program from the shared block once per worker."""
+    decoded = _worker['decoded']
+    if index not in decoded:
+        start, size = _worker['extents'][index]
+        with bytecode.BytecodeProgram(_worker['shm'].buf[start:start + size]) as program:
+            vm = CMaInstructionProcessor()
+            vm.load_bytecode(program)
+        decoded[index] = (vm.instructions, vm.labels)
+    return decoded[index]
+
+
+def _run_job(job, max_steps, timeout):
+    job_id, program, index, memory = job
+    start = time.perf_counter()
+    steps = 0
+    try:
+        vm = CMaInstructionProcessor()
+        vm.instructions, vm.labels = _instructions(index)
+        vm.verified = True  # Verified once before dispatch
+        if memory:
+            vm._ensure_memory(len(memory))
+            vm.memory[:len(memory)] = memory
+
+        deadline = None if timeout is None else start + timeout
+        step = vm.step
+        vm.running = True
+        while vm.running:
+            step()
+            steps += 1
+            if max_steps is not None and steps >= max_steps and vm.running:
+                return JobResult(job_id, program, 'step_budget', steps=steps,
+                                 elapsed=time.perf_counter() - start,
+                                 error=f"Step budget of {max_steps} exceeded")
+            if deadline is not None and steps % TIMEOUT_CHECK_INTERVAL == 0 \
+                    and time.perf_counter() > deadline:
+                return JobResult(job_id, program, 'timeout', steps=steps,
+                                 elapsed=time.perf_counter() - start,
+                                 error=f"Timeout after {timeout}s")
+    except Exception as e:
+        return JobResult(job_id, program, 'error', steps=steps,
+                         elapsed=time.perf_counter() - start, error=str(e))
+    return JobResult(job_id, program, 'ok', vm.return_value, steps, time.perf_counter() - start)
+
+
+def _run_chunk(task):
+    name, max_steps, timeout, jobs = task
+    _attach(name, owner=False)
+    return [_run_job(job, max_steps, timeout) for job in jobs]
+
+
+# === Parent side ===
+
+def run_batch(programs, memories=None, workers=None, max_steps=None, timeout=None, chunksize=None):
+    """
+    Runs CMA programs in parallel and yields JobResults as they complete.
+
+    programs:  CMA program texts
+    memories:  optional initial memory images, written from address 0; with
+               one program, one job runs per image, otherwise images pair up
+               with the programs. They suit hand-written CMa that reads them
+               with LOADA: compiled programs put their frames at address 0
+               (fp is 2 after the call to main) and overwrite the image
+    workers:   number of processes (default: all cores); 1 runs in-process
+    max_steps: per-job instruction budget
+    timeout:   per-job wall-clock limit in seconds
+    """
+    programs = list(programs)
+    if memories is None:
+        jobs = [(i, i, None) for i in range(len(programs))]
+    else:
+        memories = list(memories)
+        if len(programs) == 1:
+            jobs = [(i, 0, memory) for i, memory in enumerate(memories)]
+        elif len(programs) == len(memories):
+            jobs = [(i, i, memory) for i, memory in enumerate(memories)]
+        else:
+            raise ValueError("Pass one program, or one memory image per program")
+
+    # Identical programs are decoded and shipped only once
+    unique = {}
+    indices = [unique.setdefault(text, len(unique)) for text in programs]
+    jobs = [(job_id, program, indices[program], memory) for job_id, program, memory in jobs]
+    workers = workers or os.cpu_count() or 1
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+    try:
+        # Decoding is spread over the pool too, so it does not serialize the batch
+        if pool is None:
+            decoded = [_decode_or_error(text) for text in unique]
+        else:
+            decoded = pool.map(_decode_or_error, unique, chunksize=max(1, len(unique) // (workers * 4)))
+
+        # Programs that do not parse or verify fail their jobs without running
+        for job_id, program, index, _ in jobs:
+            error = decoded[index][1]
+            if error is not None:
+                yield JobResult(job_id, program, 'error', error=error)
+        jobs = [job for job in jobs if decoded[job[2]][1] is None]
+
+        code = SharedCode([blob for blob, _ in decoded])
+        try:
+            if pool is None:
+                _attach(code.name)
+                try:
+                    for job in jobs:
+                        yield _run_job(job, max_steps, timeout)
+                finally:
+                    _detach()
+                return
+
+            # Chunks amortize the IPC per job; a few per worker keeps the load balanced
+            chunksize = chunksize or max(1, min(256, len(jobs) // (workers * 4)))
+            tasks = [(code.name, max_steps, timeout, jobs[i:i + chunksize])
+                     for i in range(0, len(jobs), chunksize)]
+            for results in pool.imap_unordered(_run_chunk, tasks):
+                yield from results
+        finally:
+            code.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def read_memory_images(path):
+    """One memory image per line: whitespace-separated integers."""
+    with open(path) as f:
+        return [[int(cell) for cell in line.split()] for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run CMA programs in parallel')
+    parser.add_argument('programs', nargs='+', help='.cma files')
+    parser.add_argument('--memory', help='File with one initial memory image per line (one program only)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--max-steps', type=int, default=None, help='Instruction budget per job')
+    parser.add_argument('--timeout', type=float, default=None, help='Time limit per job in seconds')
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.programs:
+        with open(path) as f:
+            texts.append(f.read())
+    memories = read_memory_images(args.memory) if args.memory else None
+    names = args.programs if memories is None else [f"{args.programs[0]}#{i}" for i in range(len(memories))]
+
+    failed = 0
+    for result in run_batch(texts, memories, args.workers, args.max_steps, args.timeout):
+        if result.ok:
+            print(f"{names[result.job_id]}: {result.value}")
+        else:
+            failed += 1
+            print(f"{names[result.job_id]}: {result.status}: {result.error}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
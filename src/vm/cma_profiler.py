@@ -0,0 +1,237 @@
+"""
+Execution profiler for the CMA VM.
+
+CMaProfiler replaces the step method of one VM instance with a counting
+wrapper, so VMs without a profiler run the unchanged class method. While
+running it only counts executions per instruction and per call stack and
+tracks the stack and memory high-water marks; counts per opcode, basic block,
+label and function are derived from the instruction counts afterwards.
+
+With a source map from the compiler (compiler.py --source-map), counts are
+also aggregated per source line and source function.
+
+Usage:
+    python -m src.vm.cma_profiler program.cma [--json profile.json] [--collapsed out.folded]
+                                                   [--source-map program.cma.map]
+
+The collapsed output ("main;fib;fib 1234" per line) is the input format of
+flamegraph.pl, speedscope and similar tools; weights are instructions.
+"""
+
+import os
+import json
+import argparse
+from src.sourcemap import SourceMap
+
+TOP_LEVEL = '<top>'
+
+# Instructions after which a new basic block starts
+BLOCK_ENDS = ('jump', 'jumpz', 'call', 'return', 'halt')
+
+# Per-instruction bookkeeping besides counting
+_PLAIN, _CALL, _RETURN, _ENTER, _STOREA, _STORE = range(6)
+_KINDS = {'call': _CALL, 'return': _RETURN, 'enter': _ENTER, 'storea': _STOREA, 'store': _STORE}
+
+
+class CMaProfiler:
+    def __init__(self, vm):
+        self.vm = vm
+        self.instructions = vm.instructions
+        self.counts = [0] * len(self.instructions)
+        self.kinds = [_KINDS.get(instr.opcode, _PLAIN) for instr in self.instructions]
+        self.call_stack = [TOP_LEVEL]
+        self.stack_key = TOP_LEVEL
+        self.stack_samples = {}
+        self.max_stack_depth = len(vm.stack)
+        self.memory_high_water = vm.frame_top
+        self._step = vm.step
+        vm.step = self.step  # Instance attribute shadows the class method
+
+    def detach(self):
+        del self.vm.step
+
+    def step(self):
+        vm = self.vm
+        pc = vm.pc
+        if pc >= len(self.counts):
+            self._step()
+            return
+
+        self.counts[pc] += 1
+        samples = self.stack_samples
+        samples[self.stack_key] = samples.get(self.stack_key, 0) + 1
+        kind = self.kinds[pc]
+        if kind == _STORE and vm.stack:
+            self._touch(vm.stack[-1])
+        depth = vm.call_depth
+
+        self._step()
+
+        if len(vm.stack) > self.max_stack_depth:
+            self.max_stack_depth = len(vm.stack)
+        if kind == _PLAIN:
+            return
+        if kind == _CALL and vm.call_depth > depth:
+            self.call_stack.append(self.instructions[pc].operand)
+            self.stack_key = ';'.join(self.call_stack)
+        elif kind == _RETURN and vm.call_depth < depth:
+            self.call_stack.pop()
+            self.stack_key = ';'.join(self.call_stack)
+        elif kind == _ENTER:
+            self._touch(vm.frame_top - 1)
+        elif kind == _STOREA:
+            self._touch(int(self.instructions[pc].operand))
+
+    def _touch(self, address):
+        if address + 1 > self.memory_high_water:
+            self.memory_high_water = address + 1
+
+    # === Derived views ===
+
+    def _label_names(self):
+        names = {}
+        for name, index in self.vm.labels.items():
+            names.setdefault(index, []).append(name)
+        return names
+
+    def blocks(self):
+        """(start, end, labels, executions) for every basic block."""
+        n = len(self.instructions)
+        leaders = {0} | {index for index in self.vm.labels.values() if index < n}
+        for index, instr in enumerate(self.instructions):
+            if instr.opcode in BLOCK_ENDS and index + 1 < n:
+                leaders.add(index + 1)
+        starts = sorted(leaders) if n else []
+        names = self._label_names()
+        return [(start, end, names.get(start, []), self.counts[start])
+                for start, end in zip(starts, starts[1:] + [n])]
+
+    def functions(self):
+        """name → {'instructions': executed instructions, 'calls': calls}."""
+        entries = {0: TOP_LEVEL}
+        calls = {}
+        for index, instr in enumerate(self.instructions):
+            if instr.opcode == 'call' and instr.operand in self.vm.labels:
+                entries[self.vm.labels[instr.operand]] = instr.operand
+                calls[instr.operand] = calls.get(instr.operand, 0) + self.counts[index]
+
+        result = {}
+        starts = sorted(entries)
+        for start, end in zip(starts, starts[1:] + [len(self.instructions)]):
+            name = entries[start]
+            result[name] = {'instructions': sum(self.counts[start:end]), 'calls': calls.get(name, 0)}
+        return result
+
+    def opcodes(self):
+        totals = {}
+        for instr, count in zip(self.instructions, self.counts):
+            totals[instr.opcode] = totals.get(instr.opcode, 0) + count
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def labels(self):
+        return {name: self.counts[index] for name, index in self.vm.labels.items()
+                if index < len(self.counts)}
+
+    def source_lines(self, source_map):
+        """Executions per source line, hottest first, using a src.sourcemap.SourceMap."""
+        totals = {}
+        for index, count in enumerate(self.counts):
+            entry = source_map.lookup(index)
+            if count and entry is not None:
+                totals[entry[0]] = totals.get(entry[0], 0) + count
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def source_functions(self, source_map):
+        """Executions per source function; unmapped code counts as TOP_LEVEL."""
+        totals = {}
+        for index, count in enumerate(self.counts):
+            entry = source_map.lookup(index)
+            name = entry[2] if entry is not None else TOP_LEVEL
+            totals[name] = totals.get(name, 0) + count
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def to_dict(self, source_map=None):
+        data = {
+            'total': sum(self.counts),
+            'max_stack_depth': self.max_stack_depth,
+            'memory_high_water': self.memory_high_water,
+            'opcodes': self.opcodes(),
+            'functions': self.functions(),
+            'labels': self.labels(),
+            'blocks': [{'start': start, 'end': end, 'labels': names, 'count': count}
+                       for start, end, names, count in self.blocks()],
+            'instructions': [{'pc': pc, 'opcode': instr.opcode, 'operand': instr.operand, 'count': count}
+                             for pc, (instr, count) in enumerate(zip(self.instructions, self.counts))],
+        }
+        if source_map is not None:
+            data['source'] = {
+                'file': source_map.file,
+                'lines': self.source_lines(source_map),
+                'functions': self.source_functions(source_map),
+            }
+        return data
+
+    def write_json(self, path, source_map=None):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(source_map), f, indent=2)
+
+    def collapsed(self):
+        """Collapsed call stacks, one 'a;b;c count' line per stack."""
+        return '\n'.join(f"{key} {count}" for key, count in sorted(self.stack_samples.items()))
+
+    def report(self, top=10, source_map=None):
+        data = self.to_dict()
+        lines = [f"Instructions: {data['total']}  max stack depth: {data['max_stack_depth']}  "
+                 f"memory high-water: {data['memory_high_water']}", "Opcodes:"]
+        lines += [f"  {opcode.upper():<8} {count}" for opcode, count in list(data['opcodes'].items())[:top]]
+        lines.append("Functions:")
+        lines += [f"  {name:<16} {info['instructions']} instructions, {info['calls']} calls"
+                  for name, info in data['functions'].items()]
+        if source_map is not None:
+            lines += ["Source lines:"] + self._hot_lines(source_map, top)
+        return '\n'.join(lines)
+
+    def _hot_lines(self, source_map, top):
+        source = []
+        if source_map.file and os.path.exists(source_map.file):
+            with open(source_map.file) as f:
+                source = f.read().splitlines()
+        lines = []
+        for line, count in list(self.source_lines(source_map).items())[:top]:
+            text = source[line - 1].strip() if 0 < line <= len(source) else ''
+            lines.append(f"  {source_map.file or '<source>'}:{line:<5} {count:>10}  {text}")
+        return lines
+
+
+def main():
+    from src.vm.cma_parser import CMaProgramParser
+    from src.vm.cma_instruction import CMaInstructionProcessor
+
+    parser = argparse.ArgumentParser(description='Profile a CMA program on the Python VM')
+    parser.add_argument('program', help='.cma file')
+    parser.add_argument('--json', help='Write the full profile as JSON')
+    parser.add_argument('--collapsed', help='Write collapsed stacks for flamegraph tools')
+    parser.add_argument('--source-map', help='Source map from the compiler (default: <program>.map if present)')
+    args = parser.parse_args()
+
+    source_map = None
+    map_path = args.source_map or args.program + '.map'
+    if args.source_map or os.path.exists(map_path):
+        source_map = SourceMap.load(map_path)
+
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_file(args.program))
+    profiler = vm.enable_profiling()
+    vm.run()
+
+    print(f"Result: {vm.return_value}")
+    print(profiler.report(source_map=source_map))
+    if args.json:
+        profiler.write_json(args.json, source_map)
+    if args.collapsed:
+        with open(args.collapsed, 'w') as f:
+            f.write(profiler.collapsed() + '\n')
+
+
+if __name__ == "__main__":
+    main()
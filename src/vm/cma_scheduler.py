@@ -0,0 +1,146 @@
+"""
+Cooperative scheduling of many CMA VMs in one process.
+
+Every VM runs one quantum of instructions per turn (CMaInstructionProcessor
+.resume) in round-robin order, so a long or looping program cannot starve
+the others. Each task can have an instruction budget and a wall-clock limit,
+and can be cancelled. run() drives all tasks to completion; run_async() does
+the same but yields to the asyncio event loop after every round, and tasks
+can be awaited.
+"""
+
+import time
+import asyncio
+from collections import deque
+
+# Task states; everything except PENDING and RUNNING is final
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+CANCELLED = 'cancelled'
+BUDGET_EXCEEDED = 'budget_exceeded'
+TIMEOUT = 'timeout'
+
+
+class VMTask:
+    """One VM under the scheduler; awaitable from a coroutine."""
+
+    def __init__(self, vm, budget=None, time_limit=None, name=None):
+        self.vm = vm
+        self.budget = budget
+        self.time_limit = time_limit
+        self.name = name
+        self.status = PENDING
+        self.error = None
+        self.started = None
+        self.elapsed = 0.0
+        self.quanta = 0
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status not in (PENDING, RUNNING)
+
+    @property
+    def result(self):
+        """The program's return value; raises if the task did not finish normally."""
+        if self.status != DONE:
+            raise RuntimeError(f"Task {self.name!r} has no result ({self.status}: {self.error})")
+        return self.vm.return_value
+
+    def cancel(self):
+        if not self.done:
+            self._finish(CANCELLED, "Cancelled")
+
+    def _finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+        if self._future is not None and not self._future.done():
+            self._future.set_result(self)
+
+    def __await__(self):
+        if self._future is None:
+            self._future = asyncio.get_running_loop().create_future()
+            if self.done:
+                self._future.set_result(self)
+        return self._future.__await__()
+
+    def __repr__(self):
+        return f"<VMTask {self.name!r} {self.status} executed={self.vm.executed}>"
+
+
+class VMScheduler:
+    def __init__(self, quantum=1000):
+        self.quantum = quantum
+        self.tasks = []
+        self._ready = deque()
+        self.rounds = 0
+        self.switches = 0
+
+    def spawn(self, vm, budget=None, time_limit=None, name=None):
+        """
+        Adds a loaded VM and returns its VMTask.
+
+        budget:     maximum number of instructions
+        time_limit: wall-clock seconds, counted from the task's first quantum
+        """
+        task = VMTask(vm, budget, time_limit, name if name is not None else len(self.tasks))
+        self.tasks.append(task)
+        self._ready.append(task)
+        return task
+
+    def run(self):
+        """Runs every task to a final state and returns the list of tasks."""
+        while self._ready:
+            self.run_round()
+        return self.tasks
+
+    async def run_async(self):
+        """Like run(), but gives the event loop a turn after every round."""
+        while self._ready:
+            self.run_round()
+            await asyncio.sleep(0)
+        return self.tasks
+
+    def run_round(self):
+        """Gives every runnable task one quantum."""
+        self.rounds += 1
+        for _ in range(len(self._ready)):
+            task = self._ready.popleft()
+            if self._run_quantum(task):
+                self._ready.append(task)
+
+    def _run_quantum(self, task):
+        """Runs one quantum of a task; returns True if it stays runnable."""
+        if task.done:
+            return False  # Cancelled while waiting
+        now = time.perf_counter()
+        if task.started is None:
+            task.started = now
+            task.status = RUNNING
+        elif task.time_limit is not None and now - task.started > task.time_limit:
+            task._finish(TIMEOUT, f"Wall-clock limit of {task.time_limit}s exceeded")
+            return False
+
+        vm = task.vm
+        quantum = self.quantum
+        if task.budget is not None:
+            quantum = min(quantum, task.budget - vm.executed)
+        self.switches += 1
+        task.quanta += 1
+        try:
+            running = vm.resume(quantum)
+        except Exception as e:
+            task._finish(ERROR, str(e))
+            return False
+
+        if not running:
+            task._finish(DONE)
+            return False
+        if task.budget is not None and vm.executed >= task.budget:
+            task._finish(BUDGET_EXCEEDED, f"Instruction budget of {task.budget} exceeded")
+            return False
+        return True
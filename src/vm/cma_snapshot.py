@@ -0,0 +1,260 @@
+"""
+Snapshots of a running CMA VM: save the machine state to a compact binary
+blob and restore it into a fresh VM, in this or another process.
+
+A snapshot holds the registers (pc, fp, frame_top, call_depth), the operand
+stack, the memory (call frames live there too), the return value and a hash
+of the loaded program. Restoring requires the same program to be loaded, so
+a snapshot can never resume different code.
+
+Layout (little-endian):
+    header    magic 'CMAS', version, flags, program hash (sha256), registers,
+              executed instructions and the full memory size
+    sections  stack, memory, return value; each is (encoding, byte length,
+              payload). Integer cells are raw int64 arrays; any other values
+              (floats, big integers) fall back to JSON. Trailing zero memory
+              cells are not stored. With FLAG_COMPRESSED the sections are
+              zlib-compressed.
+"""
+
+import os
+import sys
+import json
+import zlib
+import struct
+import hashlib
+import threading
+from array import array
+from src.vm.cma_memory import PagedMemory
+
+MAGIC = b'CMAS'
+VERSION = 1
+
+FLAG_FINISHED = 1
+FLAG_COMPRESSED = 2
+
+HEADER = struct.Struct('<4sHH32sqqqqqQ')
+SECTION = struct.Struct('<BQ')
+
+ENCODING_INT64 = 0
+ENCODING_JSON = 1
+
+ZERO_BLOCK = bytes(1 << 16)
+
+
+class SnapshotError(Exception):
+    """Raised for malformed snapshots or snapshots of a different program."""
+
+
+def program_hash(vm):
+    """sha256 over the loaded instructions and labels of a VM."""
+    digest = hashlib.sha256()
+    for instr in vm.instructions:
+        digest.update(f"{instr.opcode} {instr.operand!r}\n".encode('utf-8'))
+    for name, index in sorted(vm.labels.items()):
+        digest.update(f"{name}:{index}\n".encode('utf-8'))
+    return digest.digest()
+
+
+def _encode(values, trim=False):
+    if not isinstance(values, array):
+        try:
+            values = array('q', values)
+        except (TypeError, OverflowError):
+            return _json_section(values)
+    if sys.byteorder != 'little':
+        values = array('q', values)
+        values.byteswap()
+    data = values.tobytes()
+    if trim:
+        # Drops trailing zero cells; the cut is rounded up to whole cells
+        data = data[:(_trimmed_length(data) + 7) & ~7]
+    return SECTION.pack(ENCODING_INT64, len(data)) + data
+
+
+def _trimmed_length(data):
+    """Length without trailing zero bytes; whole zero blocks compare with memcmp."""
+    end = len(data)
+    block = len(ZERO_BLOCK)
+    while end >= block and data[end - block:end] == ZERO_BLOCK:
+        end -= block
+    start = max(0, end - block)
+    return start + len(data[start:end].rstrip(b'\0'))
+
+
+def _json_section(values):
+    data = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return SECTION.pack(ENCODING_JSON, len(data)) + data
+
+
+def _decode(view, offset):
+    encoding, size = SECTION.unpack_from(view, offset)
+    offset += SECTION.size
+    payload = view[offset:offset + size]
+    if len(payload) != size:
+        raise SnapshotError("Truncated snapshot section")
+    if encoding == ENCODING_INT64:
+        values = array('q')
+        values.frombytes(payload)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tolist(), offset + size
+    if encoding == ENCODING_JSON:
+        return json.loads(bytes(payload)), offset + size
+    raise SnapshotError(f"Unknown section encoding {encoding}")
+
+
+def capture(vm):
+    """Copies the mutable state of a VM; cheap enough to call between quanta."""
+    memory = vm.memory
+    if isinstance(memory, PagedMemory):
+        memory = memory.used_cells()  # Pages past the last resident one are zero
+    return {
+        'hash': program_hash(vm),
+        'registers': (vm.pc, vm.fp, vm.frame_top, vm.call_depth, vm.executed),
+        'finished': vm.finished,
+        'stack': list(vm.stack),
+        'memory': _copy_memory(memory),
+        'memory_size': len(vm.memory),
+        'return_value': vm.return_value,
+    }
+
+
+def _copy_memory(memory):
+    # An int64 array copy runs in C; other cell values need a list copy
+    try:
+        return array('q', memory)
+    except (TypeError, OverflowError):
+        return list(memory)
+
+
+def encode(state, compress=False):
+    """Serializes a captured state to snapshot bytes."""
+    flags = (FLAG_FINISHED if state['finished'] else 0) | (FLAG_COMPRESSED if compress else 0)
+    body = (_encode(state['stack'])
+            + _encode(state['memory'], trim=True)
+            + _json_section(state['return_value']))
+    if compress:
+        body = zlib.compress(body, 1)
+    header = HEADER.pack(MAGIC, VERSION, flags, state['hash'], *state['registers'], state['memory_size'])
+    return header + body
+
+
+def snapshot(vm, compress=False):
+    """Returns the state of a VM as snapshot bytes."""
+    return encode(capture(vm), compress)
+
+
+def restore(vm, data):
+    """Restores snapshot bytes into a VM that has the same program loaded."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise SnapshotError("Snapshot too short for a header")
+    (magic, version, flags, digest, pc, fp, frame_top, call_depth, executed,
+     memory_size) = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise SnapshotError("Not a CMA snapshot (bad magic)")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    if digest != program_hash(vm):
+        raise SnapshotError("Snapshot was taken from a different program")
+
+    body = view[HEADER.size:]
+    if flags & FLAG_COMPRESSED:
+        body = memoryview(zlib.decompress(body))
+    stack, offset = _decode(body, 0)
+    memory, offset = _decode(body, offset)
+    return_value, offset = _decode(body, offset)
+
+    if isinstance(vm.memory, PagedMemory):
+        memory = PagedMemory.from_cells(memory, memory_size)
+    else:
+        memory.extend([0] * (memory_size - len(memory)))
+    vm.pc, vm.fp, vm.frame_top, vm.call_depth, vm.executed = pc, fp, frame_top, call_depth, executed
+    vm.stack = stack
+    vm.memory = memory
+    vm.return_value = return_value
+    vm.finished = bool(flags & FLAG_FINISHED)
+    vm.running = False
+    return vm
+
+
+def save(vm, path, compress=False):
+    write_atomic(path, snapshot(vm, compress))
+
+
+def load(vm, path):
+    with open(path, 'rb') as f:
+        return restore(vm, f.read())
+
+
+def write_atomic(path, data):
+    """Writes through a temporary file, so a crash never leaves a torn snapshot."""
+    temp = f"{path}.tmp{os.getpid()}"
+    with open(temp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+class Checkpointer:
+    """
+    Runs a VM and writes a snapshot to `path` every `every` instructions.
+
+    The state is copied between quanta on the VM's thread (C-level array
+    copies), and encoding and writing happen on a background thread while the
+    VM keeps running. At most one write is in flight; a new checkpoint waits
+    for the previous one.
+    """
+
+    def __init__(self, vm, path, every=1_000_000, compress=False, background=True):
+        self.vm = vm
+        self.path = path
+        self.every = every
+        self.compress = compress
+        self.background = background
+        self.checkpoints = 0
+        self._writer = None
+        self._error = None
+
+    def run(self):
+        """Runs the VM to the end, checkpointing on the way; returns the VM."""
+        try:
+            while self.vm.resume(self.every):
+                self.checkpoint()
+        finally:
+            self.wait()
+        return self.vm
+
+    def checkpoint(self):
+        self.wait()
+        state = capture(self.vm)
+        self.checkpoints += 1
+        if not self.background:
+            self._write(state)
+            return
+        self._writer = threading.Thread(target=self._write, args=(state,), daemon=True)
+        self._writer.start()
+
+    def _write(self, state):
+        try:
+            write_atomic(self.path, encode(state, self.compress))
+        except Exception as e:
+            self._error = e
+
+    def wait(self):
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    @staticmethod
+    def resume_from(vm, path):
+        """Restores the last checkpoint into `vm` if there is one; returns True if it did."""
+        if not os.path.exists(path):
+            return False
+        load(vm, path)
+        return True
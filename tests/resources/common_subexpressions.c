@@ -0,0 +1,41 @@
+/* Test for repeated expressions, array loads and stores between them */
+
+int scale(int v) {
+    return v * 3 + 1;
+}
+
+int main() {
+    int a[8];
+    int b[8];
+    int i;
+    int s = 0;
+    int x = 7;
+    int y = 4;
+
+    for (i = 0; i < 8; i = i + 1) {
+        a[i] = scale(i);
+        b[i] = a[i] * 2 + i;
+    }
+
+    // The same products in the condition and the body
+    if (x * y + a[x - y] > 20) {
+        s = s + (x * y + a[x - y]) % 50;
+    }
+
+    // Loads reused until a store to the same array
+    for (i = 1; i < 7; i = i + 1) {
+        s = s + a[i - 1] * a[i + 1] % 10 + (a[i - 1] * a[i + 1]) / 9;
+        a[i] = a[i] + b[i];
+        s = s + a[i] % 7 + b[i] % 7;
+    }
+
+    // A store to another index leaves a[2] alone
+    int t = a[2] + b[2];
+    a[5] = t;
+    t = t + (a[2] + b[2]) * 2;
+
+    // Calls are kept, even with the same argument
+    s = s + scale(y) + scale(y);
+
+    return (s + t) % 256;  // 60
+}
@@ -0,0 +1,173 @@
+# tests/test_batch.py
+
+import os
+import glob
+import pytest
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.parser import CParser
+from src.codegen import CodeGenerator
+
+np = pytest.importorskip("numpy")
+from src.vm.cma_batch import CMaBatchProcessor, post_dominators
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "resources")
+
+# fib(n) of memory cell 0: the lanes diverge on n <= 1 at every level
+FIB = """
+LOADA 0
+CALL fib
+HALT
+fib:
+ENTER 1
+STORER 0
+LOADR 0
+LOADC 2
+LE
+JUMPZ rec
+LOADR 0
+RETURN
+rec:
+LOADR 0
+LOADC 1
+SUB
+CALL fib
+LOADR 0
+LOADC 2
+SUB
+CALL fib
+ADD
+RETURN
+"""
+
+# Collatz steps of memory cell 0: a loop with a different trip count per lane
+COLLATZ = """
+LOADC 0
+STOREA 1
+loop:
+LOADA 0
+LOADC 1
+EQ
+NOT
+JUMPZ done
+LOADA 0
+LOADC 2
+MOD
+JUMPZ even
+LOADA 0
+LOADC 3
+MUL
+LOADC 1
+ADD
+STOREA 0
+JUMP next
+even:
+LOADA 0
+LOADC 2
+DIV
+STOREA 0
+next:
+LOADA 1
+LOADC 1
+ADD
+STOREA 1
+JUMP loop
+done:
+LOADA 1
+HALT
+"""
+
+
+def batch(source, **kwargs):
+    vm = CMaBatchProcessor(**kwargs)
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    return vm
+
+
+def scalar(source, memory=()):
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    vm.memory[:len(memory)] = memory
+    vm.run()
+    return vm.return_value
+
+
+def test_divergent_recursion_matches_scalar_vm():
+    inputs = list(range(12))
+    result = batch(FIB).run(memory=[[n] for n in inputs])
+    assert result.tolist() == [scalar(FIB, [n]) for n in inputs]
+
+
+def test_entry_function_with_per_lane_arguments():
+    assert batch(FIB).run(entry='fib', args=[10, 1, 7]).tolist() == [55, 1, 13]
+
+
+def test_entry_function_not_called_from_main():
+    source = "int square(int n) {\n    return n * n;\n}\nint main() {\n    return 1;\n}\n"
+    generator = CodeGenerator()
+    generator.generate(CParser().parse(source))
+    processor = batch("\n".join(generator.code))
+    assert processor.run(entry='square', args=[3, 4]).tolist() == [9, 16]
+    with pytest.raises(ValueError, match="nonexistent"):
+        processor.run(entry='nonexistent', args=[1])
+
+
+def test_loop_with_per_lane_trip_counts():
+    inputs = [1, 2, 3, 6, 7, 27]
+    result = batch(COLLATZ).run(memory=[[n] for n in inputs])
+    assert result.tolist() == [scalar(COLLATZ, [n]) for n in inputs]
+    assert result.tolist() == [0, 1, 7, 8, 16, 111]
+
+
+def test_memory_is_separate_per_lane():
+    vm = batch(COLLATZ)
+    vm.run(memory=[[3], [6]])
+    assert vm.memory[1].tolist() == [7, 8]
+
+
+def test_lanes_halting_on_different_paths():
+    vm = batch("""
+LOADA 0
+JUMPZ zero
+LOADC 1
+HALT
+zero:
+LOADC 2
+HALT
+""")
+    assert vm.run(memory=[[0], [5], [0]]).tolist() == [2, 1, 2]
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(RESOURCES, "*.c"))))
+def test_compiled_programs_match_scalar_vm(path):
+    with open(path) as f:
+        code = CodeGenerator().generate(CParser().parse(f.read()))
+    dtype = np.float64 if os.path.basename(path) == "types.c" else np.int64
+    assert batch(code, dtype=dtype).run(lanes=4).tolist() == [scalar(code)] * 4
+
+
+def test_float_constants_need_float_lanes():
+    with pytest.raises(ValueError, match="Invalid LOADC operand"):
+        batch("LOADC 3.14\nHALT")
+
+
+def test_rejects_unverifiable_code():
+    with pytest.raises(Exception, match="Inconsistent stack depth"):
+        batch("""
+LOADA 0
+JUMPZ skip
+LOADC 1
+skip:
+HALT
+""")
+
+
+def test_step_budget():
+    vm = batch("loop:\nJUMP loop", max_steps=100)
+    with pytest.raises(RuntimeError, match="Step budget"):
+        vm.run(lanes=2)
+
+
+def test_post_dominators_of_diamond():
+    # 0 → {1, 2} → 3 → exit
+    assert post_dominators([[1, 2], [3], [3], [4]]) == [3, 3, 3, 4]
@@ -0,0 +1,65 @@
+# tests/test_benchmarks.py
+
+import math
+import shutil
+import subprocess
+import pytest
+from compiler import run_string
+from benchmarks.generator import generate_program
+from benchmarks.bench_suite import compare
+from benchmarks.bench_scaling import fit_exponent, superlinear
+
+
+def test_generator_is_deterministic():
+    assert generate_program(seed=3) == generate_program(seed=3)
+    assert generate_program(seed=3) != generate_program(seed=4)
+
+
+def test_generator_parameters_scale_the_program():
+    small = generate_program(functions=2, statements=4)
+    assert generate_program(functions=20, statements=4).count('\n') > 5 * small.count('\n')
+    assert 'int buf[32];' in generate_program(array_size=32)
+    assert 'i3' in generate_program(depth=4, statements=40)
+
+
+@pytest.mark.skipif(shutil.which('gcc') is None, reason="needs gcc")
+@pytest.mark.parametrize('seed', range(5))
+def test_generated_programs_match_gcc(tmp_path, seed):
+    source = generate_program(functions=4, statements=10, depth=3, seed=seed)
+    path = tmp_path / 'program.c'
+    path.write_text(source)
+    subprocess.run(['gcc', '-w', str(path), '-o', str(tmp_path / 'program')], check=True)
+    expected = subprocess.run([str(tmp_path / 'program')]).returncode
+    assert run_string(source)[0] == expected
+
+
+def results(calibration, **seconds):
+    return {'calibration': calibration, 'workloads': {'small': {
+        'params': {'functions': 8}, 'phases': {phase: {'seconds': s} for phase, s in seconds.items()}}}}
+
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    baseline = results(1.0, lex=1.0, parse=2.0)
+    regressions, ratios = compare(results(1.0, lex=1.1, parse=3.0), baseline, 0.25)
+    assert regressions == [('small', 'parse', 1.5)]
+    assert ratios[('small', 'lex')] == pytest.approx(1.1)
+
+
+def test_compare_scales_by_calibration():
+    # Everything twice as slow on a machine that is twice as slow: no regression
+    regressions, ratios = compare(results(2.0, lex=2.0), results(1.0, lex=1.0), 0.1)
+    assert regressions == [] and ratios[('small', 'lex')] == pytest.approx(1.0)
+
+
+def test_compare_skips_changed_workloads():
+    new = results(1.0, lex=5.0)
+    new['workloads']['small']['params'] = {'functions': 9}
+    assert compare(new, results(1.0, lex=1.0), 0.25) == ([], {})
+
+
+def test_scaling_fit_recovers_exponents():
+    sizes = [1000 * 2 ** k for k in range(5)]
+    assert fit_exponent(sizes, [3e-6 * n ** 2 for n in sizes]) == pytest.approx(2.0)
+    assert superlinear(sizes, [1e-3 * n * math.log(n) for n in sizes], 0.2)[1] is False
+    assert superlinear(sizes, [1e-6 * n ** 1.5 for n in sizes], 0.2)[1] is True
+    assert superlinear(sizes, [1e-6 * n for n in sizes], 0.2) == (pytest.approx(1.0), False)
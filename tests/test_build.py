@@ -0,0 +1,116 @@
+# tests/test_build.py
+
+import os
+import json
+import subprocess
+import sys
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.build import Builder, collect_sources, COMPILED, UP_TO_DATE, ERROR
+from src.passes import PassManager
+from src.pipeline import compile_source
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def make_tree(tmp_path, count=4):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    paths = []
+    for i in range(count):
+        path = src / ("sub" if i % 2 else "") / f"prog{i}.c"
+        path.write_text(f"int main() {{ return {i} + 1; }}\n")
+        paths.append(path)
+    return src, paths
+
+
+def statuses(summary):
+    return {os.path.basename(f['source']): f['status'] for f in summary['files']}
+
+
+def test_collect_sources_walks_directories(tmp_path):
+    src, paths = make_tree(tmp_path)
+    (src / "notes.txt").write_text("not a source")
+    assert sorted(collect_sources([str(src)])) == sorted(str(p) for p in paths)
+
+
+def test_build_skips_up_to_date_outputs(tmp_path):
+    src, paths = make_tree(tmp_path)
+    manifest = str(tmp_path / "manifest.json")
+    summary = Builder(jobs=2, manifest=manifest).build([str(src)])
+    assert summary['totals'] == {COMPILED: 4, UP_TO_DATE: 0, ERROR: 0}
+    for path in paths:
+        expected = CodeGenerator(verify=True).generate(CParser().parse(path.read_text()))
+        assert path.with_suffix('.cma').read_text() == expected
+    assert set(summary['phases']) == {'read', 'parse', 'semantics', 'codegen', 'write'}
+
+    summary = Builder(jobs=1, manifest=manifest).build([str(src)])
+    assert summary['totals'][UP_TO_DATE] == 4
+
+    # Touching keeps the content, editing does not
+    os.utime(paths[0], (0, 0))
+    paths[1].write_text("int main() { return 42; }\n")
+    os.utime(paths[1], (1, 1))
+    summary = Builder(jobs=1, manifest=manifest).build([str(src)])
+    assert statuses(summary) == {'prog0.c': UP_TO_DATE, 'prog1.c': COMPILED,
+                                 'prog2.c': UP_TO_DATE, 'prog3.c': UP_TO_DATE}
+
+    # Other options, or a missing output, rebuild
+    paths[2].with_suffix('.cma').unlink()
+    summary = Builder(jobs=1, manifest=manifest).build([str(src)])
+    assert statuses(summary)['prog2.c'] == COMPILED
+    summary = Builder(jobs=1, manifest=manifest, emit='bytecode').build([str(src)])
+    assert summary['totals'][COMPILED] == 4
+
+
+def test_errors_are_reported_and_retried(tmp_path):
+    src, paths = make_tree(tmp_path, count=2)
+    paths[0].write_text("int main() { return x; }\n")
+    manifest = str(tmp_path / "manifest.json")
+    seen = []
+    summary = Builder(jobs=1, manifest=manifest).build([str(src)], on_result=seen.append)
+    assert len(seen) == 2
+    failed = [f for f in summary['files'] if f['status'] == ERROR]
+    assert failed[0]['errors'] == ["Use of undeclared variable 'x'"]
+    summary = Builder(jobs=1, manifest=manifest).build([str(src)])
+    assert statuses(summary) == {'prog0.c': ERROR, 'prog1.c': UP_TO_DATE}
+
+
+def test_cli_build_mode_writes_summary(tmp_path):
+    src, paths = make_tree(tmp_path)
+    summary_path = tmp_path / "summary.json"
+    completed = subprocess.run(
+        [sys.executable, 'compiler.py', str(src), '-j', '2', '--manifest', str(tmp_path / "m.json"),
+         '--summary', str(summary_path)], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    assert "4 compiled, 0 up to date, 0 failed" in completed.stdout
+    summary = json.loads(summary_path.read_text())
+    assert summary['jobs'] == 2 and len(summary['files']) == 4
+
+
+def test_pass_options_and_rebuild(tmp_path):
+    src, paths = make_tree(tmp_path, count=2)
+    paths[0].write_text("int main() {\n    int x = 2 * 3;\n    if (0) {\n        x = 1;\n    }\n    return x;\n}\n")
+    manifest = str(tmp_path / "manifest.json")
+    summary = Builder(jobs=1, manifest=manifest, opt_level=1, disable=['peephole']).build([str(src)])
+    assert summary['totals'][COMPILED] == 2
+    _, generator = compile_source(CParser().build(), paths[0].read_text(),
+                                  optimizer=PassManager(1, disable=['peephole']))
+    assert paths[0].with_suffix('.cma').read_text() == '\n'.join(generator.code)
+
+    summary = Builder(jobs=1, manifest=manifest, opt_level=1, disable=['peephole']).build([str(src)])
+    assert summary['totals'][UP_TO_DATE] == 2
+    summary = Builder(jobs=1, manifest=manifest, opt_level=1).build([str(src)])
+    assert summary['totals'][COMPILED] == 2  # Other passes, other build key
+    summary = Builder(jobs=1, manifest=manifest, opt_level=1, rebuild=True).build([str(src)])
+    assert summary['totals'][COMPILED] == 2
+
+
+def test_cli_build_mode_rejects_single_file_options(tmp_path):
+    src, paths = make_tree(tmp_path, count=2)
+    for options in (['--time-passes'], ['--pass-stats'], ['--disable-pass', 'nonexistent']):
+        completed = subprocess.run([sys.executable, 'compiler.py', str(src), *options],
+                                   cwd=ROOT, capture_output=True, text=True)
+        assert completed.returncode == 2
+        assert 'error:' in completed.stderr
+    assert not paths[0].with_suffix('.cma').exists()
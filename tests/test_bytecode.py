@@ -0,0 +1,80 @@
+# tests/test_bytecode.py
+
+import os
+import pytest
+from src import bytecode
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+example_dir = "./cma_examples"
+example_files = sorted(
+    os.path.join(example_dir, f) for f in os.listdir(example_dir) if f.endswith(".cma")
+)
+
+RECURSIVE = """
+int fib(int n) {
+    if (n <= 1) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+int main() { return fib(10); }
+"""
+
+
+def text_pairs(text):
+    return [(i.opcode, i.operand) for i in CMaProgramParser().parse_string(text)]
+
+
+def bytecode_pairs(program):
+    return [(op.lower(), operand) for op, operand in program.instructions()]
+
+
+@pytest.mark.parametrize("path", example_files)
+def test_examples_round_trip(path):
+    with open(path) as f:
+        text = f.read()
+    program = bytecode.BytecodeProgram(bytecode.assemble_text(text))
+    assert bytecode_pairs(program) == text_pairs(text)
+
+    # Disassembled text assembles to identical bytes (source map aside)
+    again = bytecode.assemble_text(bytecode.disassemble(program))
+    assert bytecode.BytecodeProgram(again).instructions() == program.instructions()
+
+
+def test_operand_kinds_and_labels():
+    text = "start:\nLOADC 5\nLOADC -3\nLOADC 2.5\nLOADC 'A'\nLOADC start\nJUMP start\nLOADC 12345678901\nend:"
+    program = bytecode.BytecodeProgram(bytecode.assemble_text(text))
+    assert [program.operand(i) for i in range(len(program))] == [5, -3, '2.5', "'A'", 'start', 'start', 12345678901]
+    assert program.kinds[5] == bytecode.OPERAND_LABEL
+    assert program.kinds[6] == bytecode.OPERAND_BIGINT
+    assert program.labels == {'start': 0, 'end': 7}
+    assert list(program.source_lines) == [2, 3, 4, 5, 6, 7, 8]
+
+
+def test_mmap_load_runs_on_vm(tmp_path):
+    code = CodeGenerator().generate(CParser().parse(RECURSIVE))
+    path = tmp_path / "fib.cmab"
+    bytecode.write(path, bytecode.assemble_text(code))
+
+    with bytecode.load(path) as program:
+        vm = CMaInstructionProcessor()
+        vm.load_bytecode(program, verify=True)
+    vm.run()
+    assert vm.return_value == 55
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(bytecode.BytecodeError, match="magic"):
+        bytecode.BytecodeProgram(b"NOPE" + bytes(64))
+
+
+@pytest.mark.parametrize("size", [0, 10, None])
+def test_empty_and_truncated_files_are_rejected(tmp_path, size):
+    data = bytecode.assemble_text(CodeGenerator().generate(CParser().parse(RECURSIVE)))
+    path = tmp_path / "fib.cmab"
+    path.write_bytes(data[:len(data) - 8 if size is None else size])
+    with pytest.raises(bytecode.BytecodeError):
+        bytecode.load(path)
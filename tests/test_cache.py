@@ -0,0 +1,96 @@
+# tests/test_cache.py
+
+import os
+import time
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.sourcemap import SourceMap
+from src.cache import CompileCache
+from compiler import compile_file
+
+SOURCE = """int main() {
+    int i;
+    int s = 0;
+    for (i = 0; i < 4; i = i + 1) {
+        if (i == 2) { continue; }
+        s = s + i;
+    }
+    return s;
+}
+"""
+
+
+def write_source(tmp_path, text=SOURCE, name="prog.c"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_codegen_is_deterministic_across_programs():
+    generator = CodeGenerator()
+    ast = CParser().parse(SOURCE)
+    first = generator.generate(ast)
+    assert generator.generate(ast) == first
+    assert CodeGenerator().generate(ast) == first
+
+
+def test_key_depends_on_source_and_options():
+    key = CompileCache.key(SOURCE, verify=True, emit='cma')
+    assert key == CompileCache.key(SOURCE, emit='cma', verify=True)
+    assert key != CompileCache.key(SOURCE, verify=False, emit='cma')
+    assert key != CompileCache.key(SOURCE + "\n", verify=True, emit='cma')
+
+
+def test_hit_reproduces_output_and_source_map(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"))
+    source = write_source(tmp_path)
+    out = str(tmp_path / "prog.cma")
+    assert compile_file(source, out, source_map=True, cache=cache)
+    with open(out) as f:
+        compiled = f.read()
+    os.remove(out)
+    os.remove(out + '.map')
+
+    assert compile_file(source, out, source_map=True, cache=cache)
+    with open(out) as f:
+        assert f.read() == compiled
+    assert SourceMap.load(out + '.map').file == source
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    # Other options are a separate entry
+    assert compile_file(source, str(tmp_path / "prog.cmab"), emit='bytecode', cache=cache)
+    assert cache.stats()['misses'] == 2
+
+
+def test_entry_holds_the_ast(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    source = write_source(tmp_path)
+    compile_file(source, str(tmp_path / "prog.cma"), cache=cache)
+    entry = cache.get(cache.key(SOURCE, verify=True, emit='cma', source_map=False))
+    assert entry['ast'] == CParser().parse(SOURCE)
+    assert entry['ast'][0].lineno == 1
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    cache.put('k', 'LOADC 1\nHALT')
+    with open(os.path.join(str(tmp_path), 'k.entry'), 'wb') as f:
+        f.write(b'garbage')
+    assert cache.get('k') is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction(tmp_path):
+    cache = CompileCache(str(tmp_path), max_bytes=10 ** 9)
+    for name in 'abc':
+        cache.put(name, name * 1000)
+    old = time.time() - 100
+    for offset, name in enumerate('abc'):
+        os.utime(cache._path(name), (old + offset, old + offset))
+    assert cache.get('a') is not None  # Now the most recently used
+
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.evictions == 1
@@ -0,0 +1,62 @@
+# tests/test_cma_parser.py
+
+import pytest
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+
+@pytest.fixture
+def parser():
+    return CMaProgramParser()
+
+
+def pairs(instructions):
+    return [(i.opcode, i.operand) for i in instructions]
+
+
+def test_operands_are_classified(parser):
+    program = parser.parse_string(
+        "LOADC 5\nLOADC -3\nLOADC 2.5\nLOADC 'A'\nJUMP end\nADD\nend:")
+    assert pairs(program) == [
+        ('loadc', 5), ('loadc', -3), ('loadc', '2.5'), ('loadc', "'A'"),
+        ('jump', 'end'), ('add', None), ('label', 'end'),
+    ]
+
+
+def test_comments_indentation_and_blank_lines(parser):
+    program = parser.parse_string("""
+// header comment
+    main:    // entry
+        LOADC 1    // Push 1
+        JUMPZ main//no space
+
+        HALT
+""")
+    assert pairs(program) == [
+        ('label', 'main'), ('loadc', 1), ('jumpz', 'main'), ('halt', None),
+    ]
+
+
+def test_opcodes_are_interned(parser):
+    first, second = parser.parse_string("ADD\nadd")
+    assert first.opcode is second.opcode == 'add'
+
+
+def test_invalid_line_raises(parser):
+    with pytest.raises(SyntaxError, match="Invalid CMA line 2"):
+        parser.parse_string("LOADC 1\nLOADC 1 2")
+
+
+def test_parse_file_streams_lines(parser, tmp_path):
+    path = tmp_path / "program.cma"
+    path.write_text("LOADC 4\nLOADC 6\nADD\n")
+    assert pairs(parser.parse_file(path)) == [('loadc', 4), ('loadc', 6), ('add', None)]
+
+
+def test_quoted_operands_keep_spaces(parser):
+    program = parser.parse_string("LOADC ' '  // space\nLOADC \"a b // c\"\nHALT")
+    assert pairs(program) == [('loadc', "' '"), ('loadc', '"a b // c"'), ('halt', None)]
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(program[:1] + program[2:])
+    vm.run()
+    assert vm.return_value == 32
@@ -0,0 +1,32 @@
+# tests/test_code_metrics.py
+
+import json
+from tests.utils.code_metrics import program_metrics, corpus_metrics, compare, DEFAULT_BASELINE
+
+
+def test_code_quality_does_not_regress():
+    with open(DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    regressions, _ = compare(corpus_metrics(), baseline)
+    assert regressions == [], "Generated code got worse; if intended, run tests/utils/code_metrics.py --update"
+
+
+def test_program_metrics():
+    metrics = program_metrics("int twice(int n) {\n    return n + n;\n}\n"
+                              "int main() {\n    int a[4];\n    int i;\n"
+                              "    for (i = 0; i < 3; i = i + 1) { a[i] = twice(i); }\n    return a[2];\n}\n")
+    assert metrics['result'] == 4
+    assert metrics['max_frame'] == 5  # a[4] and i
+    assert metrics['frame_cells'] == 6  # And the parameter of twice
+    assert metrics['executed'] > metrics['instructions']  # The loop runs three times
+    assert program_metrics("int main() {\n    return x;\n}\n") == {'error': "Semantic errors:"}
+
+
+def test_compare():
+    old = {'p.c': {'instructions': 10, 'labels': 1, 'frame_cells': 2, 'max_frame': 2, 'executed': 50, 'result': 7},
+           'broken.c': {'error': 'Syntax error'}}
+    better = dict(old['p.c'], executed=40)
+    assert compare({'p.c': better, 'broken.c': better}, old) == ([], [('p.c', 'executed', 50, 40)])
+    worse = dict(old['p.c'], instructions=11, result=8)
+    assert compare({'p.c': worse}, old)[0] == [('p.c', 'result', 7, 8), ('p.c', 'instructions', 10, 11)]
+    assert compare({'p.c': {'error': 'Syntax error'}}, old)[0] == [('p.c', 'error', None, 'Syntax error')]
@@ -0,0 +1,51 @@
+# tests/test_differential.py
+
+import shutil
+import pytest
+from tests.utils.differential import check, NativeCache
+
+pytestmark = pytest.mark.skipif(shutil.which('gcc') is None, reason="needs gcc")
+
+PROGRAM = "int main() {\n    int a = 6;\n    return a * 7;\n}\n"
+
+
+def test_native_results_are_cached(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text(PROGRAM)
+    cache = NativeCache(str(tmp_path / 'cache'))
+
+    first = check(str(source), cache=cache)
+    assert first['match'] and not first['cached']
+    assert first['native'] == first['cma'] == 42
+    assert 'gcc_compile' in first['timings'] and 'cma_run' in first['timings']
+
+    second = check(str(source), cache=cache)
+    assert second['match'] and second['cached']
+    assert 'gcc_compile' not in second['timings']
+
+
+def test_key_depends_on_the_source(tmp_path):
+    assert NativeCache.key(b"int main() { return 1; }") != NativeCache.key(b"int main() { return 2; }")
+
+
+def test_work_stays_in_the_work_directory(tmp_path, monkeypatch):
+    source = tmp_path / 'prog.c'
+    source.write_text(PROGRAM)
+    workdir = tmp_path / 'work'
+    workdir.mkdir()
+    monkeypatch.chdir(tmp_path)
+    check(str(source), str(workdir))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['prog.c', 'work']
+    assert sorted(p.name for p in workdir.iterdir()) == ['native.out', 'program.cma']
+
+
+def test_mismatch_and_failures_are_reported(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text("int main() {\n    return 300;\n}\n")
+    result = check(str(source))
+    assert result['native'] == 44 and result['cma'] == 300
+    assert result['match']  # Compared modulo 256, like an exit status
+
+    source.write_text("int main() {\n    return x;\n}\n")
+    result = check(str(source))
+    assert result['native'] is None and result['cma'] is None and not result['match']
@@ -0,0 +1,90 @@
+# tests/test_incremental.py
+
+import os
+import glob
+import pytest
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.incremental import IncrementalCompiler, split_functions
+from src.pipeline import SemanticErrors
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "resources")
+
+PROGRAM = """int square(int x) {
+    if (x < 0) { x = -x; }
+    return x * x;
+}
+// A comment with a brace {
+int loop(int n) {
+    int i;
+    int s = 0;
+    for (i = 0; i < n; i = i + 1) {
+        if (i == 2) { continue; }
+        s = s + square(i);
+    }
+    return s;
+}
+int main() {
+    return loop(5);
+}
+"""
+
+
+def full_compile(source):
+    return CodeGenerator().generate(CParser().parse(source))
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(RESOURCES, "*.c"))))
+def test_matches_full_compilation(path):
+    with open(path) as f:
+        source = f.read()
+    assert IncrementalCompiler(verify=True).compile(source) == full_compile(source)
+
+
+def test_split_functions_skips_comments_and_literals():
+    chunks = split_functions(PROGRAM)
+    assert len(chunks) == 3
+    assert chunks[1].startswith("// A comment")
+    assert split_functions("int main() { return 0;") is None
+
+
+def test_only_the_edited_function_is_regenerated():
+    compiler = IncrementalCompiler()
+    compiler.compile(PROGRAM)
+    edited = PROGRAM.replace("return loop(5);", "return loop(6);")
+    assert compiler.compile(edited) == full_compile(edited)
+    assert compiler.stats == {'functions': 3, 'parsed': 1, 'generated': 1, 'reused': 2}
+
+
+def test_labels_are_renumbered_after_an_edit_adds_labels():
+    compiler = IncrementalCompiler()
+    compiler.compile(PROGRAM)
+    edited = PROGRAM.replace("if (x < 0) { x = -x; }", "if (x < 0) { x = -x; } else { x = x; }")
+    assert compiler.compile(edited) == full_compile(edited)
+    assert compiler.stats['generated'] == 1
+
+
+def test_signature_change_regenerates_callers():
+    compiler = IncrementalCompiler()
+    compiler.compile(PROGRAM)
+    edited = PROGRAM.replace("int square(int x)", "void square(int x)").replace("return x * x;", "return;")
+    edited = edited.replace("s = s + square(i);", "square(i);")
+    assert compiler.compile(edited) == full_compile(edited)
+    assert compiler.stats['generated'] == 2  # square and its caller loop; main is reused
+
+
+def test_semantic_errors_are_reported_and_recovered():
+    compiler = IncrementalCompiler()
+    compiler.compile(PROGRAM)
+    broken = PROGRAM.replace("return loop(5);", "return loop(5, 6);")
+    with pytest.raises(SemanticErrors, match="wrong number of arguments") as raised:
+        compiler.compile(broken)
+    assert len(raised.value.errors) == 1
+    assert compiler.compile(PROGRAM) == full_compile(PROGRAM)
+    assert compiler.stats['generated'] == 1
+
+
+def test_unsplittable_source_is_compiled_whole():
+    source = PROGRAM + "}"
+    with pytest.raises(SyntaxError):
+        IncrementalCompiler().compile(source)
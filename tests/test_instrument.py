@@ -0,0 +1,56 @@
+# tests/test_instrument.py
+
+import time
+from src.parser import CParser
+from src.instrument import PassTimer, NULL_TIMER
+from compiler import compile_file
+
+SOURCE = "int main() {\n    int a = 2;\n    return a * 21;\n}\n"
+
+
+def test_nested_phases_are_not_counted_twice():
+    timer = PassTimer()
+    with timer.phase('outer'):
+        with timer.phase('inner'):
+            time.sleep(0.02)
+    phases = timer.phases
+    assert phases['inner']['wall'] >= 0.02
+    assert phases['outer']['wall'] < 0.01
+    assert abs(timer.total() - (phases['inner']['wall'] + phases['outer']['wall'])) < 1e-9
+
+
+def test_lexing_is_split_out_of_parsing():
+    parser = CParser().build()
+    timer = PassTimer()
+    with timer.phase('parse'), timer.lexing(parser.lexer.lexer):
+        ast = parser.parse(SOURCE)
+    assert ast == CParser().parse(SOURCE)
+    assert timer.phases['lex']['tokens'] == 17  # 16 tokens and the end of input
+    assert 'token' not in vars(parser.lexer.lexer)  # The wrapper is removed
+
+
+def test_memory_report():
+    timer = PassTimer(memory=True)
+    with timer.phase('alloc'):
+        data = [[i] for i in range(10000)]
+    timer.close()
+    entry = timer.phases['alloc']
+    assert entry['peak'] >= 10000 * 16 and entry['retained'] > 0
+    assert entry['objects'] >= 5000  # Net change; collections may free other objects
+    assert 'Peak KiB' in timer.report()
+    del data
+
+
+def test_compile_file_phases(tmp_path):
+    source = tmp_path / "prog.c"
+    source.write_text(SOURCE)
+    timer = PassTimer(memory=True)
+    assert compile_file(str(source), str(tmp_path / "prog.cma"), timer=timer)
+    timer.close()
+    assert list(timer.phases) == ['read', 'setup', 'lex', 'parse', 'semantics', 'codegen', 'verify', 'emit']
+    data = timer.to_dict()
+    assert data['total_wall'] > 0 and set(data['phases']['codegen']) >= {'wall', 'cpu', 'peak', 'objects'}
+
+    # The null timer gives the same output
+    assert compile_file(str(source), str(tmp_path / "plain.cma"), timer=NULL_TIMER)
+    assert (tmp_path / "plain.cma").read_text() == (tmp_path / "prog.cma").read_text()
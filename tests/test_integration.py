@@ -7,6 +7,7 @@ import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from tests.utils.runner import compare_results
+from tests.utils.differential import check, NativeCache, format_timings
 from compiler import compile_file
 
 resource_dir = "./tests/resources"
@@ -17,24 +18,22 @@ test_files = [
     if f.endswith(".c")
 ]
 
-@pytest.mark.parametrize("c_file_path", test_files)
-def test_integration(c_file_path):
-    print(f"\n🧪 Testing: {c_file_path}")
-    cma_path = c_file_path.replace(".c", ".cma")
+@pytest.fixture(scope="session")
+def native_cache():
+    # Native results survive between runs, keyed by source hash and gcc version
+    return NativeCache()
 
-    # Step 1: Compile C-like to CMA
-    success = compile_file(c_file_path, verbose=True)
-    assert success, f"❌ Compilation to CMA failed for {c_file_path}"
+@pytest.mark.parametrize("c_file_path", test_files)
+def test_integration(c_file_path, tmp_path, native_cache, record_property):
+    # Compiles and runs both sides in tmp_path, so tests can run in parallel
+    result = check(c_file_path, str(tmp_path), native_cache)
+    for name, seconds in result['timings'].items():
+        record_property(name, round(seconds, 6))
+    print(f"\n🧪 {c_file_path}: native {result['native']}{' (cached)' if result['cached'] else ''}, "
+          f"cma {result['cma']} [{format_timings(result['timings'])}]")
 
-    # Step 2: Compare native C vs CMA
-    match = compare_results(c_file_path, cma_path, verbose=True)   
-    
-    # Step 3: Enforce correctness
-    assert match, f"❌ Test failed: {c_file_path} (C != CMA)"
-    
-    # Cleanup only if test passed
-    if os.path.exists(cma_path):
-        os.remove(cma_path)
+    assert result['cma'] is not None, f"❌ Compilation to CMA failed for {c_file_path}"
+    assert result['match'], f"❌ Test failed: {c_file_path} (C {result['native']} != CMA {result['cma']})"
 
 # === Allow single-file execution ===
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+# tests/test_memory.py
+
+import os
+import glob
+import pytest
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_memory import PagedMemory, PAGE_SIZE, ZERO_PAGE
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "resources")
+
+HUGE_ARRAY = """
+int main() {
+    int a[1000000];
+    a[999999] = 7;
+    a[3] = 5;
+    return a[999999] + a[3] + a[500000];
+}
+"""
+
+
+def run(source, **kwargs):
+    vm = CMaInstructionProcessor(**kwargs)
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    vm.run()
+    return vm
+
+
+def test_pages_are_allocated_on_first_write():
+    memory = PagedMemory(10 * PAGE_SIZE)
+    assert memory[5 * PAGE_SIZE + 3] == 0
+    assert memory.stats()['resident_pages'] == 0
+    memory[5 * PAGE_SIZE + 3] = 9
+    assert memory[5 * PAGE_SIZE + 3] == 9
+    assert memory.stats()['resident_pages'] == 1
+    assert memory.pages[4] is ZERO_PAGE
+
+
+def test_clear_returns_whole_pages_to_the_zero_page():
+    memory = PagedMemory(4 * PAGE_SIZE)
+    memory[:] = range(4 * PAGE_SIZE)
+    memory.clear(10, 3 * PAGE_SIZE)
+    assert memory.pages[1] is ZERO_PAGE and memory.pages[2] is ZERO_PAGE
+    assert memory[9] == 9 and memory[10] == 0 and memory[3 * PAGE_SIZE] == 3 * PAGE_SIZE
+    assert memory.stats()['resident_pages'] == 2
+
+
+def test_list_protocol():
+    memory = PagedMemory(2 * PAGE_SIZE + 5)
+    memory[1:4] = [1, 2, 3]
+    assert memory[:5] == [0, 1, 2, 3, 0]
+    assert memory[-1] == 0 and len(memory) == 2 * PAGE_SIZE + 5
+    assert list(memory)[:4] == [0, 1, 2, 3] and len(list(memory)) == len(memory)
+    with pytest.raises(IndexError):
+        memory[len(memory)]
+    assert PagedMemory.from_cells([0, 1, 2, 3], len(memory)) == memory
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(RESOURCES, "*.c"))))
+def test_compiled_programs_match_dense_memory(path):
+    with open(path) as f:
+        code = CodeGenerator().generate(CParser().parse(f.read()))
+    assert run(code, memory_model='paged').return_value == run(code).return_value
+
+
+def test_huge_sparse_array_touches_few_pages():
+    code = CodeGenerator().generate(CParser().parse(HUGE_ARRAY))
+    vm = run(code, memory_model='paged')
+    assert vm.return_value == 12
+    assert vm.memory.stats()['resident_pages'] <= 3
+
+
+def test_high_address_store():
+    vm = run("LOADC 42\nSTOREA 3000000\nLOADA 3000000\nHALT", memory_model='paged')
+    assert vm.return_value == 42
+    assert vm.memory.stats()['resident_pages'] == 1
+
+
+def test_paged_snapshot_round_trip():
+    source = "LOADC 42\nSTOREA 3000000\nLOADC 1\nHALT"
+    vm = CMaInstructionProcessor(memory_model='paged')
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    vm.resume(2)
+    restored = CMaInstructionProcessor(memory_model='paged')
+    restored.load_instructions(CMaProgramParser().parse_string(source))
+    restored.restore(vm.snapshot())
+    assert isinstance(restored.memory, PagedMemory)
+    assert restored.memory[3000000] == 42
+    assert restored.memory.stats()['resident_pages'] == 1
+
+
+def test_unknown_memory_model():
+    with pytest.raises(ValueError, match="Unknown memory model"):
+        CMaInstructionProcessor(memory_model='banked')
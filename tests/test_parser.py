@@ -162,3 +162,24 @@ def test_parser_ast(parser, code, expected):
 def test_invalid_inputs_raise_syntax_error(parser, code):
     with pytest.raises(SyntaxError, match=r"Syntax error|Illegal character"):
         parser.parse(code)
+
+
+def test_nodes_carry_source_positions(parser):
+    [function] = parser.parse("int main() {\n    int x = 1;\n    return x + 2;\n}")
+    declaration, ret = function[4]
+    assert function.position == (1, 1)
+    assert declaration.position == (2, 5)
+    assert ret.position == (3, 5)
+    assert ret[1].position == (3, 12)       # BINOP starts at its left operand
+    assert ret[1][3].position == (3, 16)    # INTEGER 2
+
+
+def test_line_numbers_restart_for_every_parse(parser):
+    parser.parse("void f() {\n\n}")
+    [function] = parser.parse("void g() {}")
+    assert function.lineno == 1
+
+
+def test_syntax_errors_report_the_column(parser):
+    with pytest.raises(SyntaxError, match=r"at line 3, column 12$"):
+        parser.parse("int main() {\n    int x = 1;\n    x = 2 +;\n}")
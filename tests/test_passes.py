@@ -0,0 +1,130 @@
+# tests/test_passes.py
+
+import os
+import glob
+import shutil
+import subprocess
+import sys
+import pytest
+from compiler import compile_string, run_string, _generate
+from src.parser import CParser
+from src.passes import PassManager, PassError, Code, ConstantFolding, Peephole, JumpThreading, UnusedLabels, pass_names
+from tests.utils.differential import check
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESOURCES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'resources', '*.c')))
+
+
+def code(*lines):
+    return Code(list(lines), [None] * len(lines))
+
+
+def test_levels_select_passes():
+    assert PassManager(0).passes == []
+    assert [p.name for p in PassManager(1).passes] == ['fold', 'unreachable', 'peephole']
+    assert [p.name for p in PassManager(2).passes] == pass_names()
+    assert [p.name for p in PassManager(1, enable=['labels'], disable=['fold']).passes] == ['unreachable', 'peephole', 'labels']
+    with pytest.raises(ValueError):
+        PassManager(1, disable=['nonsense'])
+    with pytest.raises(ValueError):
+        PassManager(3)
+
+
+def test_constant_folding():
+    ast = CParser().parse("int main() {\n    return (2 + 3) * 4 - -1 + (7 / 2) + (1 < 2) + !0;\n}\n")
+    folded, changes = ConstantFolding().run(ast)
+    ret = folded[0][4][0]
+    assert ret[0] == 'RETURN' and ret[1] == ('INTEGER', 26)
+    assert ret[1].lineno == 2
+    assert changes == 10
+    # Division of negative operands truncates in C but floors in the VM: left alone
+    ast = CParser().parse("int main() {\n    return -7 / 2;\n}\n")
+    assert ConstantFolding().run(ast)[0][0][4][0][1][0] == 'BINOP'
+
+
+def test_peephole():
+    out, changes = Peephole().run(code("LOADR 0", "LOADC 0", "ADD", "LOADC 1", "MUL", "STORER 1",
+                                       "LOADC 5", "POP", "JUMP a", "a:", "LOADC 0", "JUMPZ b", "b:", "HALT"))
+    # The constant branch becomes a jump to the next line, which goes too
+    assert out.lines == ["LOADR 0", "STORER 1", "a:", "b:", "HALT"]
+    assert changes == 6
+
+
+def test_jump_threading_and_labels():
+    out, changes = JumpThreading().run(code("main:", "ENTER 0", "JUMPZ a", "a:", "JUMP b", "b:", "JUMP c",
+                                            "c:", "HALT", "loop:", "JUMP loop"))
+    assert changes == 2
+    assert out.lines[2] == "JUMPZ c" and out.lines[4] == "JUMP c"
+    out, changes = UnusedLabels().run(out)
+    assert [line for line in out.lines if line.endswith(':')] == ["main:", "c:", "loop:"]
+    assert changes == 2
+
+
+def test_positions_follow_the_code():
+    source = "int main() {\n    int x = 1 + 2;\n    return x;\n    x = 5;\n}\n"
+    generator = _generate(source, opt_level=1)
+    lines = {generator.positions[i][0] for i in range(len(generator.code)) if i in generator.positions}
+    assert 4 not in lines  # Unreachable statement after the return is gone
+    assert all(0 <= i < len(generator.code) for i in generator.positions)
+
+
+def test_stats_and_report():
+    manager = PassManager(2)
+    generator = _generate("int main() {\n    return 1 + 2;\n}\n")
+    manager.run_code(generator)
+    assert set(manager.stats) == {'unreachable', 'jump-thread', 'peephole', 'labels'}
+    assert all(entry['runs'] == 1 and entry['seconds'] >= 0 for entry in manager.stats.values())
+    assert 'peephole' in manager.report()
+
+
+def test_debug_verification_catches_broken_passes(monkeypatch):
+    # A peephole that drops every constant leaves the stack short
+    broken = lambda self, c: (code(*[line for line in c.lines if not line.startswith('LOADC')]), 1)
+    monkeypatch.setattr(Peephole, 'run', broken)
+    source = "int main() {\n    int x = 1;\n    return x;\n}\n"
+    generator = _generate(source)
+    PassManager(1).run_code(generator)  # Unchecked
+    with pytest.raises(PassError, match='peephole'):
+        PassManager(1, debug=True).run_code(_generate(source))
+
+
+@pytest.mark.parametrize('path', RESOURCES, ids=os.path.basename)
+def test_optimized_programs_keep_their_results(path):
+    with open(path) as f:
+        source = f.read()
+    expected = run_string(source)[0]
+    for level in (1, 2):
+        manager = PassManager(level, debug=True)
+        assert run_string(source, opt_level=level)[0] == expected
+        assert len(compile_string(source, opt_level=level)) <= len(compile_string(source))
+        manager.run_ast(CParser().parse(source))  # Verified after every pass
+        manager.run_code(_generate(source))
+
+
+@pytest.mark.skipif(shutil.which('gcc') is None, reason="needs gcc")
+@pytest.mark.parametrize('path', RESOURCES, ids=os.path.basename)
+def test_optimized_programs_match_gcc(path):
+    assert check(path, opt_level=2)['match']
+
+
+def test_command_line(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text("int main() {\n    return 2 * 3 + 0;\n}\n")
+    output = tmp_path / 'prog.cma'
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'compiler.py'), str(source), '-o', str(output),
+                             '-O2', '--disable-pass', 'labels', '--verify-passes', '--pass-stats', '--no-cache'],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'fold' in result.stderr and 'labels' not in result.stderr
+    assert 'LOADC 6' in output.read_text()
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'compiler.py'), str(source), '--enable-pass', 'nonsense'],
+                            capture_output=True, text=True)
+    assert result.returncode == 2 and 'Unknown pass' in result.stderr
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+def test_for_without_condition(level):
+    source = ("int main() {\n    int z = 0;\n    for (;;) {\n        z = z + 1;\n"
+              "        if (z > 30) break;\n    }\n    return z;\n}\n")
+    assert run_string(source, opt_level=level)[0] == 31
+    assert compile_string(source, opt_level=level)
@@ -0,0 +1,72 @@
+# tests/test_pool.py
+
+import os
+import sys
+import subprocess
+import pytest
+from src.vm.cma_pool import run_batch, read_memory_images
+
+DOUBLE = """
+LOADA 0
+LOADC 2
+MUL
+HALT
+"""
+
+LOOP = """
+loop:
+JUMP loop
+"""
+
+
+def by_job(results):
+    return sorted(results, key=lambda result: result.job_id)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_one_program_over_memory_images(workers):
+    results = by_job(run_batch([DOUBLE], memories=[[n] for n in range(40)], workers=workers))
+    assert [result.value for result in results] == [2 * n for n in range(40)]
+    assert all(result.ok and result.program == 0 for result in results)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_many_programs_with_step_budget(workers):
+    programs = [DOUBLE, LOOP, "LOADC 7\nHALT", LOOP]
+    results = by_job(run_batch(programs, workers=workers, max_steps=500))
+    assert [result.status for result in results] == ['ok', 'step_budget', 'ok', 'step_budget']
+    assert [result.program for result in results] == [0, 1, 2, 3]
+    assert results[2].value == 7
+    assert results[1].steps == 500
+
+
+def test_timeout():
+    [result] = run_batch([LOOP], workers=1, timeout=0.01)
+    assert result.status == 'timeout'
+
+
+def test_invalid_program_fails_only_its_jobs():
+    results = by_job(run_batch(["LOADC 1\nHALT", "ADD\nHALT"], workers=1))
+    assert results[0].ok and results[0].value == 1
+    assert results[1].status == 'error' and "underflow" in results[1].error
+
+
+def test_memory_images_must_match_programs():
+    with pytest.raises(ValueError):
+        list(run_batch([DOUBLE, DOUBLE], memories=[[1]], workers=1))
+
+
+def test_read_memory_images(tmp_path):
+    path = tmp_path / "images.txt"
+    path.write_text("1 2 3\n\n4\n")
+    assert read_memory_images(str(path)) == [[1, 2, 3], [4]]
+
+
+def test_workers_leave_no_shared_memory_warnings():
+    code = ("from src.vm.cma_pool import run_batch\n"
+            f"print(sorted(r.value for r in run_batch([{DOUBLE!r}], [[n] for n in range(8)], workers=2)))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=root))
+    assert result.stdout.strip() == str([2 * n for n in range(8)])
+    assert result.stderr == ''
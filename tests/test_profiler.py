@@ -0,0 +1,83 @@
+# tests/test_profiler.py
+
+import json
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+# sum(n) = n + sum(n - 1), called with n = 3
+PROGRAM = """
+LOADC 3
+CALL sum
+HALT
+sum:
+ENTER 1
+STORER 0
+LOADR 0
+JUMPZ base
+LOADR 0
+LOADR 0
+LOADC 1
+SUB
+CALL sum
+ADD
+RETURN
+base:
+LOADC 0
+RETURN
+"""
+
+
+def profiled(source):
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    profiler = vm.enable_profiling()
+    vm.run()
+    return vm, profiler
+
+
+def test_counts_per_instruction_opcode_and_function():
+    vm, profiler = profiled(PROGRAM)
+    assert vm.return_value == 6
+    assert profiler.counts[0] == 1                      # LOADC 3
+    assert profiler.counts[vm.labels['sum']] == 4       # ENTER: sum(3) .. sum(0)
+    assert profiler.counts[vm.labels['base']] == 1
+    assert profiler.opcodes()['call'] == 4
+    functions = profiler.functions()
+    assert functions['sum']['calls'] == 4
+    assert functions['<top>']['instructions'] == 3
+    assert sum(profiler.counts) == sum(info['instructions'] for info in functions.values())
+
+
+def test_basic_blocks_and_labels():
+    vm, profiler = profiled(PROGRAM)
+    blocks = {start: (end, names, count) for start, end, names, count in profiler.blocks()}
+    start = vm.labels['sum']
+    assert blocks[start] == (start + 4, ['sum'], 4)     # ENTER .. JUMPZ
+    assert blocks[start + 4][2] == 3                    # Recursive case
+    assert profiler.labels() == {'sum': 4, 'base': 1}
+
+
+def test_high_water_marks_and_collapsed_stacks():
+    vm, profiler = profiled(PROGRAM)
+    assert profiler.max_stack_depth == 5                # 3, 2, 1 pending plus n, 1 in sum(1)
+    assert profiler.memory_high_water == 12             # Four frames of header + one cell
+    collapsed = dict(line.rsplit(' ', 1) for line in profiler.collapsed().splitlines())
+    assert collapsed['<top>'] == '3'
+    assert collapsed['<top>;sum;sum;sum;sum'] == '6'    # sum(0): ENTER .. RETURN
+    assert sum(map(int, collapsed.values())) == sum(profiler.counts)
+
+
+def test_json_export(tmp_path):
+    _, profiler = profiled(PROGRAM)
+    path = tmp_path / "profile.json"
+    profiler.write_json(str(path))
+    data = json.loads(path.read_text())
+    assert data['total'] == sum(profiler.counts)
+    assert data['instructions'][0] == {'pc': 0, 'opcode': 'loadc', 'operand': 3, 'count': 1}
+
+
+def test_profiling_is_per_instance():
+    vm, profiler = profiled(PROGRAM)
+    assert 'step' not in vars(CMaInstructionProcessor())
+    profiler.detach()
+    assert 'step' not in vars(vm)
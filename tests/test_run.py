@@ -0,0 +1,69 @@
+# tests/test_run.py
+
+import os
+import sys
+import glob
+import subprocess
+import pytest
+from compiler import compile_string, run_string, _generate
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESOURCES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'resources', '*.c')))
+
+
+def run_text(code):
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string(code), verify=True)
+    vm.run()
+    return vm.return_value
+
+
+@pytest.mark.parametrize('path', RESOURCES, ids=os.path.basename)
+def test_instruction_stream_matches_the_text_path(path):
+    with open(path) as f:
+        source = f.read()
+    text = _generate(source).code
+    parsed = [(instr.opcode, instr.operand) for instr in CMaProgramParser().parse_lines(text)]
+    assert compile_string(source) == parsed
+    assert run_string(source)[0] == run_text('\n'.join(text))
+
+
+def test_profile():
+    value, profiler = run_string("int main() {\n    return 6 * 7;\n}\n", profile=True)
+    assert value == 42
+    assert profiler.opcodes()['mul'] == 1
+
+
+def test_unprofiled_run_has_no_profiler():
+    assert run_string("int main() {\n    return 1;\n}\n") == (1, None)
+
+
+def test_semantic_errors_raise():
+    with pytest.raises(Exception, match="Semantic errors"):
+        compile_string("int main() {\n    return x;\n}\n")
+
+
+def test_run_command(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text("int main() {\n    int a = 5;\n    return a * a;\n}\n")
+    result = subprocess.run([sys.executable, 'compiler.py', 'run', str(source), '--profile'],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+    assert 'Program returned 25' in result.stdout
+    assert f'{source}:3' in result.stderr  # Profile per source line
+    assert list(tmp_path.iterdir()) == [source]  # No intermediate files
+
+
+def test_run_string_from_the_installed_packages(tmp_path):
+    # Only what setup.py installs, without the repository root on sys.path
+    lib = tmp_path / 'lib'
+    subprocess.run([sys.executable, 'setup.py', '-q', 'build_py', '--build-lib', str(lib)],
+                   cwd=ROOT, capture_output=True, check=True)
+    code = "from compiler import run_string\nprint(run_string('int main() {\\n    return 6 * 7;\\n}\\n')[0])"
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(env, PYTHONPATH=str(lib)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '42'
@@ -0,0 +1,107 @@
+# tests/test_scheduler.py
+
+import asyncio
+import pytest
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_scheduler import VMScheduler, DONE, ERROR, CANCELLED, BUDGET_EXCEEDED, TIMEOUT
+
+# Counts memory cell 0 down to zero and returns the number of iterations
+COUNTDOWN = """
+LOADC 0
+STOREA 1
+loop:
+LOADA 0
+JUMPZ done
+LOADA 0
+LOADC 1
+SUB
+STOREA 0
+LOADA 1
+LOADC 1
+ADD
+STOREA 1
+JUMP loop
+done:
+LOADA 1
+HALT
+"""
+
+LOOP = """
+loop:
+JUMP loop
+"""
+
+
+def vm_for(source, n=None):
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    if n is not None:
+        vm.memory[0] = n
+    return vm
+
+
+def test_resume_runs_in_quanta_and_matches_run():
+    vm = vm_for(COUNTDOWN, 50)
+    quanta = 0
+    while vm.resume(7):
+        quanta += 1
+    assert vm.finished and vm.return_value == 50
+    assert quanta == vm.executed // 7
+
+    reference = vm_for(COUNTDOWN, 50)
+    reference.run()
+    assert reference.return_value == vm.return_value
+    assert vm.resume(7) is False  # Stays finished
+
+
+def test_round_robin_is_fair():
+    scheduler = VMScheduler(quantum=10)
+    tasks = [scheduler.spawn(vm_for(COUNTDOWN, n)) for n in (5, 100, 20)]
+    scheduler.run()
+    assert [task.status for task in tasks] == [DONE, DONE, DONE]
+    assert [task.result for task in tasks] == [5, 100, 20]
+    # Every task ran one quantum per round until it finished
+    assert tasks[1].quanta == scheduler.rounds
+
+
+def test_infinite_loop_hits_budget_without_starving_others():
+    scheduler = VMScheduler(quantum=100)
+    looping = scheduler.spawn(vm_for(LOOP), budget=1050)
+    counting = scheduler.spawn(vm_for(COUNTDOWN, 30))
+    scheduler.run()
+    assert looping.status == BUDGET_EXCEEDED
+    assert looping.vm.executed == 1050
+    assert counting.result == 30
+    with pytest.raises(RuntimeError, match="no result"):
+        looping.result
+
+
+def test_time_limit():
+    scheduler = VMScheduler(quantum=1000)
+    task = scheduler.spawn(vm_for(LOOP), time_limit=0.01)
+    scheduler.run()
+    assert task.status == TIMEOUT
+
+
+def test_cancel_and_errors():
+    scheduler = VMScheduler(quantum=5)
+    cancelled = scheduler.spawn(vm_for(LOOP))
+    failing = scheduler.spawn(vm_for("ADD\nHALT"))
+    scheduler.run_round()
+    cancelled.cancel()
+    scheduler.run()
+    assert cancelled.status == CANCELLED
+    assert failing.status == ERROR and "underflow" in failing.error
+
+
+def test_run_async_and_await_tasks():
+    async def main():
+        scheduler = VMScheduler(quantum=10)
+        tasks = [scheduler.spawn(vm_for(COUNTDOWN, n)) for n in range(1, 21)]
+        runner = asyncio.ensure_future(scheduler.run_async())
+        finished = await asyncio.gather(*tasks)
+        await runner
+        return [task.result for task in finished]
+
+    assert asyncio.run(main()) == list(range(1, 21))
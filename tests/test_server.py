@@ -0,0 +1,98 @@
+# tests/test_server.py
+
+import io
+import json
+import time
+import threading
+import pytest
+from compiler import _generate
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.server import CompileServer, compile_request
+from src.client import CompileClient
+
+SOURCE = "int twice(int n) { return n * 2; }\nint main() { return twice(21); }\n"
+
+
+def expected_code(source):
+    return CodeGenerator(verify=True).generate(CParser().parse(source))
+
+
+def test_compile_request_returns_code_inline():
+    response = compile_request({'id': 7, 'source': SOURCE, 'source_map': True})
+    assert response['ok'] and response['id'] == 7
+    assert response['code'] == expected_code(SOURCE)
+    assert response['source_map']['functions'] == ['twice', 'main']
+
+
+def test_diagnostics_for_semantic_and_syntax_errors():
+    response = compile_request({'source': "int main() { return x; }"})
+    assert not response['ok']
+    assert response['diagnostics'] == ["Use of undeclared variable 'x'"]
+    response = compile_request({'source': "int main() { return 1 }"})
+    assert not response['ok'] and 'Syntax error' in response['diagnostics'][0]
+    response = compile_request({'input': '/nonexistent/prog.c'})
+    assert not response['ok'] and 'Could not open' in response['diagnostics'][0]
+
+
+@pytest.mark.parametrize("level", [0, 1, 2])
+def test_optimization_level_matches_the_compiler(level):
+    source = "int main() {\n    int x = 2 * 3;\n    int y = x * 4 + x * 4;\n    if (0) {\n        y = 1;\n    }\n    return y;\n}\n"
+    response = compile_request({'source': source, 'opt_level': level})
+    assert response['ok'], response
+    assert response['code'] == '\n'.join(_generate(source, verify=True, opt_level=level).code)
+
+
+def test_pass_options():
+    response = compile_request({'source': SOURCE, 'opt_level': 1, 'disable': ['peephole', 'fold']})
+    assert response['ok'], response
+    response = compile_request({'source': SOURCE, 'enable': ['nonexistent']})
+    assert not response['ok'] and 'Unknown pass' in response['diagnostics'][0]
+
+
+def test_stdio_json_lines():
+    server = CompileServer(workers=0)
+    requests = [json.dumps({'id': i, 'source': SOURCE}) for i in range(3)] + ['not json']
+    out = io.StringIO()
+    server.serve_stdio(io.StringIO('\n'.join(requests) + '\n'), out)
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r['id'] for r in responses] == [0, 1, 2, None]
+    assert all(r['ok'] for r in responses[:3])
+    assert 'Malformed request' in responses[3]['diagnostics'][0]
+
+
+def test_unix_socket_with_worker_pool(tmp_path):
+    path = str(tmp_path / "server.sock")
+    server = CompileServer(workers=2)
+    thread = threading.Thread(target=server.serve_unix, args=(path,), daemon=True)
+    thread.start()
+    try:
+        for _ in range(100):
+            if (tmp_path / "server.sock").exists():
+                break
+            time.sleep(0.05)
+        sources = []
+        for i in range(4):
+            source = tmp_path / f"prog{i}.c"
+            source.write_text(SOURCE.replace("21", str(i)))
+            sources.append(source)
+        with CompileClient(path) as client:
+            responses = client.compile_many([{'input': str(s)} for s in sources]
+                                            + [{'source': "int main() { return y; }"}])
+        for source, response in zip(sources, responses):
+            assert response['ok'], response
+            assert response['output'] == str(source.with_suffix('.cma'))
+            assert source.with_suffix('.cma').read_text() == expected_code(source.read_text())
+        assert not responses[-1]['ok']
+    finally:
+        server.shutdown()
+        thread.join(5)
+
+
+def test_socket_path_that_is_not_a_socket_is_kept(tmp_path):
+    path = tmp_path / "server.sock"
+    path.write_text("not a socket")
+    server = CompileServer(workers=0)
+    with pytest.raises(FileExistsError, match="not a socket"):
+        server.serve_unix(str(path))
+    assert path.read_text() == "not a socket"
@@ -0,0 +1,118 @@
+# tests/test_snapshot.py
+
+import pytest
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_snapshot import Checkpointer, SnapshotError, save, load
+
+# fact(n) of memory cell 0, recursive so snapshots catch live frames
+FACT = """
+LOADA 0
+CALL fact
+HALT
+fact:
+ENTER 1
+STORER 0
+LOADR 0
+LOADC 2
+LE
+JUMPZ rec
+LOADC 1
+RETURN
+rec:
+LOADR 0
+LOADR 0
+LOADC 1
+SUB
+CALL fact
+MUL
+RETURN
+"""
+
+
+def vm_for(source=FACT, n=10, memory_size=1000):
+    vm = CMaInstructionProcessor(memory_size=memory_size)
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    vm.memory[0] = n
+    return vm
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_restore_mid_run_into_fresh_vm(compress):
+    vm = vm_for()
+    vm.resume(37)
+    data = vm.snapshot(compress=compress)
+
+    restored = vm_for(n=0)
+    restored.restore(data)
+    assert (restored.pc, restored.fp, restored.call_depth) == (vm.pc, vm.fp, vm.call_depth)
+    assert restored.stack == vm.stack and restored.memory == vm.memory
+
+    vm.run()
+    restored.run()
+    assert restored.return_value == vm.return_value == 3628800
+    assert restored.executed == 37
+
+
+def test_trailing_zero_memory_is_not_stored():
+    small = vm_for(memory_size=1000).snapshot()
+    large = vm_for(memory_size=1_000_000).snapshot()
+    assert len(large) == len(small)
+    restored = vm_for(n=0, memory_size=10)
+    restored.restore(large)
+    assert len(restored.memory) == 1_000_000
+
+
+def test_non_integer_cells_fall_back():
+    vm = vm_for()
+    vm.memory[5] = 2.5
+    vm.stack = [1 << 70, 'x']
+    restored = vm_for(n=0)
+    restored.restore(vm.snapshot())
+    assert restored.memory[5] == 2.5
+    assert restored.stack == [1 << 70, 'x']
+
+
+def test_rejects_other_programs_and_garbage():
+    data = vm_for().snapshot()
+    with pytest.raises(SnapshotError, match="different program"):
+        vm_for("LOADC 1\nHALT").restore(data)
+    with pytest.raises(SnapshotError, match="bad magic"):
+        vm_for().restore(b'XXXX' + data[4:])
+
+
+def test_finished_vm_stays_finished():
+    vm = vm_for(n=5)
+    vm.run()
+    restored = vm_for(n=0)
+    restored.restore(vm.snapshot())
+    assert restored.finished and restored.return_value == 120
+    assert restored.resume(10) is False
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "vm.snap")
+    vm = vm_for()
+    vm.resume(20)
+    save(vm, path)
+    restored = load(vm_for(n=0), path)
+    restored.run()
+    assert restored.return_value == 3628800
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_checkpointer_resumes_after_crash(tmp_path, background):
+    path = str(tmp_path / "vm.snap")
+    first = Checkpointer(vm_for(), path, every=25, background=background)
+    # Simulated crash: stop after a few checkpoints
+    for _ in range(3):
+        first.vm.resume(first.every)
+        first.checkpoint()
+    first.wait()
+    assert first.checkpoints == 3
+
+    vm = vm_for(n=0)
+    assert Checkpointer.resume_from(vm, path)
+    assert vm.executed == 75
+    Checkpointer(vm, path, every=25, background=background).run()
+    assert vm.return_value == 3628800
@@ -0,0 +1,71 @@
+# tests/test_sourcemap.py
+
+from src.parser import CParser
+from src.codegen import CodeGenerator
+from src.sourcemap import SourceMap
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+SOURCE = """int twice(int n) {
+    return n * 2;
+}
+int main() {
+    int s = 0;
+    int i;
+    for (i = 0; i < 10; i = i + 1) {
+        s = s + twice(i);
+    }
+    return s;
+}
+"""
+
+
+def compile_with_map(source):
+    generator = CodeGenerator()
+    code = generator.generate(CParser().parse(source))
+    return code, generator.source_map("prog.c")
+
+
+def test_every_instruction_is_mapped_to_its_function():
+    code, source_map = compile_with_map(SOURCE)
+    instructions = [i for i in CMaProgramParser().parse_string(code) if i.opcode != 'label']
+    assert len(source_map) == len(instructions)
+    # CALL main / HALT are compiler-generated
+    assert source_map.lookup(0) is None and source_map.lookup(1) is None
+    for index, instr in enumerate(instructions[2:], start=2):
+        line, column, function = source_map.lookup(index)
+        assert function == ('twice' if line <= 3 else 'main')
+
+
+def test_instructions_map_to_innermost_node():
+    code, source_map = compile_with_map(SOURCE)
+    instructions = [i for i in CMaProgramParser().parse_string(code) if i.opcode != 'label']
+    mul = next(i for i, instr in enumerate(instructions) if instr.opcode == 'mul')
+    assert source_map.lookup(mul) == (2, 12, 'twice')   # n * 2
+    assert source_map.location(mul) == "prog.c:2:12"
+
+
+def test_json_round_trip(tmp_path):
+    _, source_map = compile_with_map(SOURCE)
+    path = str(tmp_path / "prog.cma.map")
+    source_map.write(path)
+    loaded = SourceMap.load(path)
+    assert loaded.file == "prog.c"
+    assert loaded.entries == source_map.entries
+
+
+def test_profiler_aggregates_by_source_line():
+    code, source_map = compile_with_map(SOURCE)
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string(code))
+    profiler = vm.enable_profiling()
+    vm.run()
+    assert vm.return_value == 90
+
+    lines = profiler.source_lines(source_map)
+    assert next(iter(lines)) == 7                         # The loop header is hottest
+    assert sum(lines.values()) == sum(profiler.counts) - 2  # All but CALL main / HALT
+    functions = profiler.source_functions(source_map)
+    assert functions['<top>'] == 2
+    assert functions['twice'] == 10 * 6                   # ENTER, STORER, LOADR, LOADC, MUL, RETURN
+    assert profiler.to_dict(source_map)['source']['file'] == "prog.c"
@@ -0,0 +1,260 @@
+# tests/test_ssa.py
+
+import os
+import glob
+import shutil
+import pytest
+from compiler import run_string, compile_string, _generate
+from src.codegen import CodeGenerator
+from src.parser import CParser
+from src import ssa
+from src.passes import PassManager
+from tests.utils.differential import check
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESOURCES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'resources', '*.c')))
+
+
+def build(source):
+    module = ssa.build(CParser().parse(source))
+    ssa.verify(module)
+    return module
+
+
+def main_of(module):
+    return next(function for function in module.functions if function.name == 'main')
+
+
+def block(function, hint):
+    return next(b for b in function.blocks if b.hint == hint)
+
+
+def test_if_else_places_one_phi_at_the_join():
+    fn = main_of(build("int main() {\n    int x = 3;\n    int y = 0;\n"
+                       "    if (x > 1) { y = 1; } else { y = 2; }\n    return y + x;\n}\n"))
+    join = block(fn, 'endif')
+    assert len(join.preds) == 2
+    assert [sorted(arg.attr for arg in phi.args) for phi in join.phis] == [[1, 2]]
+    # x is the same on both paths: no phi, the constant is used directly
+    ret = join.terminator.args[0]
+    assert ret.op == 'binop' and ret.args[0] is join.phis[0] and ret.args[1].attr == 3
+
+
+def test_loops_get_phis_for_changed_variables_only():
+    fn = main_of(build("int main() {\n    int i = 0;\n    int s = 0;\n    int k = 7;\n"
+                       "    while (i < 10) { s = s + i * k; i = i + 1; }\n    return s;\n}\n"))
+    header = block(fn, 'while_start')
+    assert len(header.phis) == 2  # i and s, not k
+    for phi in header.phis:
+        assert phi.args[0].op == 'const' and phi.args[1].block is block(fn, 'while_body')
+    fn = main_of(build("int main() {\n    int s = 0;\n    int i;\n"
+                       "    for (i = 0; i < 4; i = i + 1) { if (i == 2) { continue; } s = s + i; }\n    return s;\n}\n"))
+    assert all(len(phi.args) == len(phi.block.preds) for b in fn.blocks for phi in b.phis)
+
+
+def test_use_def_chains():
+    fn = main_of(build("int twice(int n) {\n    return n + n;\n}\n"
+                       "int main() {\n    int a = twice(4);\n    return a * a;\n}\n"))
+    call = next(value for value in fn.values() if value.op == 'call')
+    product = fn.blocks[0].terminator.args[0]
+    assert product.args == [call, call] and call.users == [product, product]
+    twice = build("int twice(int n) {\n    return n + n;\n}\n").functions[0]
+    assert twice.params[0].users == [twice.blocks[0].terminator.args[0]] * 2
+
+
+def test_dominator_tree():
+    fn = main_of(build("int main() {\n    int x = 0;\n    while (x < 3) {\n"
+                       "        if (x == 1) { x = x + 2; } else { x = x + 1; }\n    }\n    return x;\n}\n"))
+    tree = ssa.DominatorTree(fn)
+    entry, header = fn.blocks[0], block(fn, 'while_start')
+    then, join = block(fn, 'then'), block(fn, 'endif')
+    assert tree.idom[header] is entry and tree.idom[join] is block(fn, 'while_body')
+    assert tree.dominates(header, join) and not tree.dominates(then, join)
+    assert tree.preorder()[0] is entry and len(tree.preorder()) == len(fn.blocks)
+
+
+def test_verify_reports_broken_ir():
+    fn = main_of(build("int main() {\n    int x = 1;\n    if (x) { x = 2; }\n    return x;\n}\n"))
+    join = block(fn, 'endif')
+    join.phis[0].args.pop()
+    with pytest.raises(ssa.SSAError, match='operands for 2 predecessors'):
+        ssa.verify_function(fn)
+    fn = main_of(build("int main() {\n    int x = 1;\n    return x + 2;\n}\n"))
+    fn.blocks[0].terminator.args[0].users.clear()
+    with pytest.raises(ssa.SSAError, match='missing from its users'):
+        ssa.verify_function(fn)
+
+
+def test_dead_code_elimination():
+    fn = main_of(build("int f(int x) {\n    return x;\n}\n"
+                       "int main() {\n    int a[2];\n    int i = 0;\n    int unused = 0;\n"
+                       "    while (i < 5) { unused = unused + i * 2; a[0] = f(i); i = i + 1; }\n"
+                       "    return a[0];\n}\n"))
+    ops = lambda: sorted(value.op for value in fn.values())
+    assert ssa.eliminate_dead_code(fn) == 3  # The phi, + and * of `unused`
+    assert ops().count('call') == 1 and ops().count('store') == 1 and ops().count('phi') == 1
+    assert ssa.eliminate_dead_code(fn) == 0
+
+
+@pytest.mark.parametrize('source, expected', [
+    # Swap through a temporary inside a loop: phis that read each other
+    ("int main() {\n    int a = 1;\n    int b = 2;\n    int t;\n    int i = 0;\n"
+     "    while (i < 3) { t = a; a = b; b = t + a; i = i + 1; }\n    return a * 10 + b;\n}\n", 58),
+    # Lost copy: the old value is used after the loop changed it
+    ("int main() {\n    int x = 1;\n    int y = 0;\n"
+     "    while (x < 20) { y = x; x = x * 3; }\n    return x + y;\n}\n", 36),
+    # Critical edge: the loop exit carries a different value than the body
+    ("int main() {\n    int x = 0;\n    int r = 5;\n"
+     "    if (x == 0) { r = 7; }\n    while (x < 4) { r = r + x; x = x + 1; }\n    return r;\n}\n", 13),
+    # Break and continue
+    ("int main() {\n    int s = 0;\n    int i;\n    for (i = 0; i < 10; i = i + 1) {\n"
+     "        if (i == 7) { break; }\n        if (i % 2) { continue; }\n        s = s + i;\n    }\n"
+     "    return s * 10 + i;\n}\n", 127),
+    # Endless loop left by break
+    ("int main() {\n    int n = 0;\n    for (;;) { n = n + 3; if (n > 10) { break; } }\n    return n;\n}\n", 12),
+    # Arrays and calls keep their order
+    ("int f(int x) {\n    return x * 2;\n}\n"
+     "int main() {\n    int a[3];\n    a[0] = 4;\n    int v = a[0];\n    a[0] = f(v) + a[0];\n"
+     "    return v + a[0];\n}\n", 16),
+])
+def test_tricky_programs(source, expected):
+    assert run_string(source, opt_level=2)[0] == expected
+
+
+@pytest.mark.parametrize('path', RESOURCES, ids=os.path.basename)
+def test_round_trip_keeps_results(path):
+    with open(path) as f:
+        source = f.read()
+    manager = PassManager(2, debug=True)
+    manager.generate(CodeGenerator(), manager.run_ast(CParser().parse(source)))  # SSA verified after every pass
+    assert run_string(source, opt_level=2)[0] == run_string(source)[0]
+    assert len(compile_string(source, opt_level=2)) <= len(compile_string(source, opt_level=1))
+
+
+@pytest.mark.skipif(shutil.which('gcc') is None, reason="needs gcc")
+def test_generated_programs_match_gcc(tmp_path):
+    from benchmarks.generator import generate_program
+    for seed in range(3):
+        path = tmp_path / f'program{seed}.c'
+        path.write_text(generate_program(functions=4, statements=12, depth=3, seed=seed))
+        assert check(str(path), opt_level=2)['match']
+
+
+def test_deeper_operand_goes_first():
+    # Both + and * evaluate their deeper right operand first: never more than two cells
+    lines, _ = ssa.lower(build("int f(int a, int b, int c) {\n    return a + b * (c - a);\n}\n"))
+    body = [line.split('    //')[0] for line in lines[5:]]
+    assert body == ['LOADR 2', 'LOADR 0', 'SUB', 'LOADR 1', 'MUL', 'LOADR 0', 'ADD', 'RETURN']
+
+
+def test_lowering_without_copies_or_stubs():
+    # Every phi gets the slot of its operands, so no copy and no extra label is needed
+    source = ("int main() {\n    int i = 0;\n    int s = 0;\n"
+              "    while (i < 10) { if (i % 3) { s = s + i; } i = i + 1; }\n    return s;\n}\n")
+    lines = _generate(source, opt_level=2).code
+    assert run_string(source, opt_level=2)[0] == 27
+    assert not any(line.startswith('edge') for line in lines)
+    assert sum(line.startswith('STORER') for line in lines) == 4  # Two initializations and two updates
+
+
+def cse(source):
+    fn = main_of(build(source))
+    removed = ssa.eliminate_common_subexpressions(fn)
+    ssa.eliminate_dead_code(fn)
+    ssa.verify_function(fn)
+    return fn, removed
+
+
+def count(fn, op):
+    return sum(1 for value in fn.values() if value.op == op)
+
+
+def executed(source, manager):
+    from src.vm.cma_instruction import CMaInstructionProcessor
+    generator = CodeGenerator()
+    manager.generate(generator, manager.run_ast(CParser().parse(source)))
+    vm = CMaInstructionProcessor()
+    vm.load_program(generator.instructions(), verify=True)
+    vm.resume(1 << 62)
+    return vm.return_value, vm.executed
+
+
+def test_cse_within_a_block():
+    fn, removed = cse("int main() {\n    int a[4];\n    int i = 2;\n    int b = 3;\n    a[i] = b;\n"
+                      "    int x = a[i + 1] + a[i + 1] * b;\n    int y = (b * i - 1) * (i * b - 1);\n"
+                      "    return x + y;\n}\n")
+    assert count(fn, 'load') == 1
+    # a[i + 1] and (i * b - 1); i + 1 and i * b are too cheap to keep, but numbered alike
+    assert removed == 2
+
+
+def test_cse_across_dominating_blocks():
+    source = ("int main() {\n    int a[4];\n    int x = 3;\n    int y = 4;\n    int r = 0;\n"
+              "    a[x - 2] = x;\n    if (a[x - 2] * y + x > 5) {\n        r = a[x - 2] * y + x;\n"
+              "    } else {\n        r = 1;\n    }\n    while (r < 100) { r = r + a[x - 2] * y; }\n"
+              "    return r + (a[x - 2] * y + x);\n}\n")
+    fn, removed = cse(source)
+    assert count(fn, 'load') == 0  # Forwarded from the store: a[1] is x
+    assert removed >= 4
+    assert run_string(source, opt_level=2)[0] == run_string(source)[0] == 126
+
+
+def test_cse_respects_stores():
+    # A store to the array between the loads, or on a path into a join or a loop, invalidates them
+    source = ("int main() {\n    int a[4];\n    int b[4];\n    int i = 1;\n    int j = 2;\n    a[i] = 5;\n"
+              "    int x = a[i];\n    a[j] = 7;\n    int y = a[i];\n    b[i] = 9;\n    int z = a[j];\n"
+              "    if (x > 1) { a[0] = 1; }\n    int w = a[j];\n    int s = 0;\n"
+              "    while (s < 3) { s = s + a[i]; a[i] = 0; }\n    return x + y * 10 + z * 100 + w * 1000 + s * 10000;\n}\n")
+    fn, _ = cse(source)
+    assert count(fn, 'load') == 2  # w after the join and a[i] in the loop; x, y and z are forwarded
+    assert run_string(source, opt_level=2)[0] == run_string(source)[0] == 57755
+    # Stores to another constant index leave a constant-index load alone
+    fn, _ = cse("int main() {\n    int a[4];\n    a[0] = 4;\n    int x = a[2];\n    a[1] = 5;\n"
+                "    int y = a[2];\n    a[x] = 6;\n    return x + y + a[2];\n}\n")
+    assert count(fn, 'load') == 2
+
+
+def test_cse_keeps_calls_and_cheap_expressions():
+    fn, removed = cse("int f(int v) {\n    return v + 1;\n}\n"
+                      "int main() {\n    int x = 2;\n    int y = 3;\n    return f(x) + f(x) + (x * y) + (y * x);\n}\n")
+    assert count(fn, 'call') == 2
+    # x * y costs no more evaluated twice than kept in a temporary
+    assert removed == 0 and count(fn, 'binop') == 5
+    fn, removed = cse("int main() {\n    int x = 2;\n    int y = 3;\n    int a = x * y;\n    int b = y * x;\n"
+                      "    return a + b + a * b;\n}\n")
+    assert removed == 1  # x * y already has two uses
+
+
+def test_cse_merges_mirrored_comparisons_and_phis():
+    fn, removed = cse("int main() {\n    int x = 2;\n    int y = 3;\n    int p = 0;\n    int q = 0;\n"
+                      "    if (x < y) { p = x; q = x; } else { p = y; q = y; }\n"
+                      "    int r = (x * p < y * q) * 9;\n    return r + (y * q > x * p) + p * q;\n}\n")
+    assert len(block(fn, 'endif').phis) == 1
+    assert removed == 2  # q, and y * q > x * p
+    assert [value.attr for value in block(fn, 'endif').instrs].count('<') == 1
+    assert '>' not in [value.attr for value in fn.values()]
+
+
+def test_cse_reduces_executed_instructions():
+    source = ("int main() {\n    int a[8];\n    int i;\n    int s = 0;\n    for (i = 0; i < 8; i = i + 1) {\n"
+              "        a[i] = i * 3 + 1;\n    }\n    for (i = 1; i < 7; i = i + 1) {\n"
+              "        s = s + a[i - 1] * a[i + 1] + a[i - 1] * a[i + 1] % 7 + (a[i] + i) * (a[i] + i);\n    }\n"
+              "    return s % 256;\n}\n")
+    manager = PassManager(2)
+    optimized = executed(source, manager)
+    unoptimized = executed(source, PassManager(2, disable=['cse']))
+    assert optimized[0] == unoptimized[0] == run_string(source)[0]
+    assert optimized[1] < unoptimized[1]
+    assert manager.stats['cse']['changes'] >= 3
+    assert 'cse' in manager.report()
+
+
+def test_may_alias():
+    fn = main_of(build("int main() {\n    int a[4];\n    int b[4];\n    int i = 1;\n    i = i + i;\n"
+                       "    a[i] = 1;\n    a[i + 1] = 2;\n    a[1 + i] = 3;\n    a[i - 1] = 4;\n    a[2] = 5;\n    b[i] = 6;\n"
+                       "    return a[i];\n}\n"))
+    store = [value for value in fn.values() if value.op == 'store']
+    assert not ssa.may_alias(store[0], store[1]) and not ssa.may_alias(store[0], store[3])
+    assert ssa.may_alias(store[1], store[2])
+    assert ssa.may_alias(store[0], store[4])  # i is not known to be 2
+    assert not ssa.may_alias(store[0], store[5])
@@ -0,0 +1,87 @@
+# tests/test_startup.py
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# `import compiler` may cost at most this share of importing the pipeline it
+# defers. Both are measured on the same machine, so load slows them alike.
+IMPORT_BUDGET_SHARE = 0.25
+
+HEAVY_MODULES = ('ply', 'ply.yacc', 'ply.lex', 'pprint', 'src.parser', 'src.semantics', 'src.codegen')
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=ROOT))
+
+
+def import_time(module):
+    """Cumulative `python -X importtime` of `module` in microseconds, in a fresh interpreter."""
+    result = run_python('-X', 'importtime', '-c', f'import {module}')
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"no importtime line for {module}:\n{result.stderr}")
+
+
+def loaded_modules(code):
+    result = run_python('-c', code + '\nprint(" ".join(sorted(sys.modules)))')
+    assert result.returncode == 0, result.stderr
+    return set(result.stdout.split())
+
+
+def test_import_stays_within_budget():
+    # Both from cached bytecode, or compiling compiler.py alone would dominate
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    subprocess.run([sys.executable, '-c', 'import compiler, src.pipeline'], cwd=ROOT,
+                   env=dict(env, PYTHONPATH=ROOT), check=True)
+    # Least disturbed of a few runs each
+    compiler = min(import_time('compiler') for _ in range(3))
+    pipeline = min(import_time('src.pipeline') for _ in range(3))
+    assert compiler < IMPORT_BUDGET_SHARE * pipeline, \
+        f"import compiler took {compiler}us, the pipeline {pipeline}us (budget {IMPORT_BUDGET_SHARE:.0%})"
+
+
+def test_import_does_not_load_the_pipeline():
+    modules = loaded_modules('import sys, compiler')
+    assert not modules & set(HEAVY_MODULES)
+
+
+def test_help_does_not_load_the_pipeline():
+    code = ('import sys, compiler\n'
+            'sys.argv = ["compiler.py", "--help"]\n'
+            'try:\n    compiler.main()\nexcept SystemExit:\n    pass')
+    modules = loaded_modules(code)
+    assert 'argparse' in modules
+    assert not modules & set(HEAVY_MODULES)
+
+
+def test_cache_hit_does_not_load_ply(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text("int main() {\n    return 42;\n}\n")
+    code = ('import sys, compiler\n'
+            'from src.cache import CompileCache\n'
+            f'cache = CompileCache({str(tmp_path / "cache")!r})\n'
+            f'compiler.compile_file({str(source)!r}, cache=cache)')
+    assert 'ply' in loaded_modules(code)  # Miss: the pipeline is loaded
+    assert 'ply' not in loaded_modules(code)  # Hit: the output comes from the cache
+
+
+def test_parser_builds_tables_on_first_parse():
+    from src.parser import CParser
+    parser = CParser()
+    assert parser.parser is None
+    assert parser.parse("int main() {\n    return 1;\n}\n")[0][0] == 'FUNCTION'
+    assert parser.parser is not None
+
+
+def test_startup_time_report(tmp_path):
+    source = tmp_path / 'prog.c'
+    source.write_text("int main() {\n    return 42;\n}\n")
+    result = run_python('compiler.py', str(source), '--no-cache', '--startup-time')
+    assert result.returncode == 0
+    assert 'Startup:' in result.stderr
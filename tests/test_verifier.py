@@ -0,0 +1,119 @@
+# tests/test_verifier.py
+
+import pytest
+from src.verifier import StackVerifier, VerificationError
+
+
+def verify(source):
+    return StackVerifier().verify_lines(source.strip().split("\n"))
+
+
+def test_straight_line_depths():
+    info = verify("""
+LOADC 1
+LOADC 2
+ADD    // comment
+LOADC 3
+MUL
+""")
+    assert info.depths == [0, 1, 2, 1, 2]
+    assert info.max_depth == 2
+
+
+def test_join_point_with_consistent_depth():
+    info = verify("""
+LOADC 1
+JUMPZ else
+LOADC 2
+JUMP end
+else:
+LOADC 3
+end:
+HALT
+""")
+    assert info.depths[-1] == 1
+
+
+def test_join_point_with_inconsistent_depth_is_rejected():
+    with pytest.raises(VerificationError, match="Inconsistent stack depth"):
+        verify("""
+LOADC 1
+JUMPZ end
+LOADC 2
+end:
+HALT
+""")
+
+
+def test_loop_that_leaks_a_value_is_rejected():
+    with pytest.raises(VerificationError, match="Inconsistent stack depth"):
+        verify("""
+start:
+LOADC 1
+LOADC 1
+JUMPZ start
+""")
+
+
+def test_top_level_underflow_is_rejected():
+    with pytest.raises(VerificationError, match="underflow"):
+        verify("LOADC 1\nADD")
+
+
+def test_undefined_label_is_rejected():
+    with pytest.raises(VerificationError, match="Undefined label"):
+        verify("JUMP nowhere")
+
+
+def test_recursive_function_summary():
+    info = verify("""
+LOADC 5
+CALL fact
+HALT
+fact:
+ENTER 1
+STORER 0
+LOADR 0
+LOADC 2
+LE
+JUMPZ rec
+LOADC 1
+RETURN
+rec:
+LOADR 0
+LOADR 0
+LOADC 1
+SUB
+CALL fact
+MUL
+RETURN
+""")
+    fact = info.functions['fact']
+    assert fact.params == 1
+    assert fact.return_depth == 0  # pops one argument, pushes one result
+    assert fact.max_depth == 2
+    assert info.max_depth is None  # unbounded because of recursion
+
+
+def test_program_max_depth_includes_callees():
+    info = verify("""
+LOADC 1
+LOADC 2
+LOADC 3
+CALL add
+ADD
+HALT
+add:
+ENTER 2
+STORER 0
+STORER 1
+LOADR 0
+LOADR 1
+LOADC 0
+ADD
+ADD
+RETURN
+""")
+    assert info.functions['add'].max_depth == 1
+    # Two arguments on top of one value, then three more cells inside add
+    assert info.max_depth == 4
@@ -0,0 +1,108 @@
+# tests/test_vm.py
+
+import pytest
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+
+def run(source, **kwargs):
+    vm = CMaInstructionProcessor(**kwargs)
+    vm.load_instructions(CMaProgramParser().parse_string(source))
+    vm.run()
+    return vm
+
+
+def test_call_and_return_restore_frame():
+    vm = run("""
+LOADC 4
+LOADC 3
+CALL sub
+HALT
+sub:
+ENTER 2
+STORER 0
+STORER 1
+LOADR 0
+LOADR 1
+SUB
+RETURN
+""")
+    assert vm.return_value == -1
+    assert vm.fp == 0 and vm.frame_top == 0 and vm.call_depth == 0
+    assert vm.stack == [-1]
+
+
+def test_recursive_calls_get_separate_frames():
+# fact(n) = n <= 1 ? 1 : n * fact(n - 1)
+    vm = run("""
+LOADC 6
+CALL fact
+HALT
+fact:
+ENTER 1
+STORER 0
+LOADR 0
+LOADC 2
+LE
+JUMPZ rec
+LOADC 1
+RETURN
+rec:
+LOADR 0
+LOADR 0
+LOADC 1
+SUB
+CALL fact
+MUL
+RETURN
+""")
+    assert vm.return_value == 720
+    assert vm.stack == [720]
+
+
+def test_frame_memory_is_reused_across_calls():
+    source = "\n".join(["CALL f"] * 50 + ["HALT", "f:", "ENTER 8", "RETURN"])
+    vm = run(source, memory_size=16)
+    assert len(vm.memory) == 16
+
+
+def test_deep_recursion_grows_memory_and_overflows_at_limit():
+    source = "CALL f\nHALT\nf:\nENTER 4\nCALL f\nRETURN"
+    with pytest.raises(RuntimeError, match="Stack overflow"):
+        run(source, memory_size=8, max_memory=1024)
+
+
+def test_relative_address_load_and_store():
+    vm = run("""
+CALL f
+HALT
+f:
+ENTER 3
+LOADC 7
+LOADC 1
+LOADRC 1
+ADD
+STORE
+LOADR 2
+RETURN
+""")
+    assert vm.return_value == 7
+
+
+def test_return_without_call_stops_machine():
+    vm = run("LOADC 5\nRETURN\nLOADC 9")
+    assert vm.return_value == 5
+
+
+def test_unverified_underflow_raises():
+    with pytest.raises(RuntimeError, match="Stack underflow on ADD"):
+        run("LOADC 1\nADD")
+
+
+def test_verified_load_records_stack_depth():
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_string("LOADC 1\nLOADC 2\nADD\nHALT"), verify=True)
+    vm.run()
+    assert vm.verified
+    assert vm.max_stack_depth == 2
+    assert vm.return_value == 3
@@ -0,0 +1,153 @@
+"""
+Generated-code quality metrics: how much code the compiler emits and how
+much of it the VM executes, per program of a corpus.
+
+Per program:
+    instructions   static instruction count (labels excluded)
+    labels         label definitions (functions and generated labels)
+    frame_cells    sum of the ENTER frame sizes over all functions
+    max_frame      largest single frame
+    executed       instructions the VM executed for one run
+    result         main's return value, so a change in meaning is visible
+Programs that do not compile (tests/future_work holds programs with
+unsupported features) are recorded with their error instead. Every program
+is measured at -O0 (keyed by its path) and at the optimization LEVELS
+(keyed "<path> -O<level>").
+
+The counts are deterministic, so against a committed baseline any increase
+is a regression; decreases are reported as improvements to record with
+--update.
+
+Usage:
+    python tests/utils/code_metrics.py [--baseline tests/code_metrics.json] [--update]
+                                       [corpus directories ...]
+"""
+
+import os
+import sys
+import json
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+CORPORA = (os.path.join('tests', 'resources'), os.path.join('tests', 'future_work'))
+DEFAULT_BASELINE = os.path.join(ROOT, 'tests', 'code_metrics.json')
+
+# Lower is better for all of these; result must not change at all
+COST_METRICS = ('instructions', 'labels', 'frame_cells', 'max_frame', 'executed')
+
+LEVELS = (2,)
+
+
+def program_metrics(source, opt_level=0):
+    """Metrics dict of one source text; {'error': message} if it does not compile."""
+    from compiler import compile_string
+    try:
+        program = compile_string(source, opt_level=opt_level)
+    except Exception as e:
+        return {'error': str(e).splitlines()[0]}
+
+    frames = {}
+    pending = None  # Label right before the current instruction
+    for opcode, operand in program:
+        if opcode == 'label':
+            pending = operand
+            continue
+        if opcode == 'enter' and pending is not None:
+            frames[pending] = int(operand)
+        pending = None
+
+    vm = CMaInstructionProcessor()
+    vm.load_program(program, verify=True)
+    vm.resume(1 << 62)  # Like run(), but counts executed instructions
+    return {
+        'instructions': sum(1 for opcode, _ in program if opcode != 'label'),
+        'labels': sum(1 for opcode, _ in program if opcode == 'label'),
+        'frame_cells': sum(frames.values()),
+        'max_frame': max(frames.values(), default=0),
+        'executed': vm.executed,
+        'result': vm.return_value,
+    }
+
+
+def corpus_metrics(corpora=CORPORA):
+    """Path relative to the repository → metrics, for every .c file of the corpora."""
+    metrics = {}
+    for corpus in corpora:
+        directory = os.path.join(ROOT, corpus)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.c'):
+                with open(os.path.join(directory, name)) as f:
+                    source = f.read()
+                path = os.path.relpath(os.path.join(directory, name), ROOT)
+                metrics[path] = program_metrics(source)
+                for level in LEVELS:
+                    metrics[f"{path} -O{level}"] = program_metrics(source, level)
+    return metrics
+
+
+def compare(metrics, baseline):
+    """
+    (regressions, improvements) as lists of (program, metric, old, new).
+    A program that stops compiling or returns another result regresses;
+    programs new to the corpus or newly compiling are neither.
+    """
+    regressions = []
+    improvements = []
+    for program, new in metrics.items():
+        old = baseline.get(program)
+        if old is None or 'error' in old:
+            continue
+        if 'error' in new:
+            regressions.append((program, 'error', None, new['error']))
+            continue
+        if new['result'] != old['result']:
+            regressions.append((program, 'result', old['result'], new['result']))
+        for metric in COST_METRICS:
+            if new[metric] > old[metric]:
+                regressions.append((program, metric, old[metric], new[metric]))
+            elif new[metric] < old[metric]:
+                improvements.append((program, metric, old[metric], new[metric]))
+    return regressions, improvements
+
+
+def totals(metrics):
+    compiled = [entry for entry in metrics.values() if 'error' not in entry]
+    return {metric: sum(entry[metric] for entry in compiled) for metric in COST_METRICS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generated-code quality metrics against a baseline')
+    parser.add_argument('corpora', nargs='*', default=list(CORPORA), help='Directories of .c programs (relative to the repository)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Committed baseline metrics')
+    parser.add_argument('--update', action='store_true', help='Write the current metrics as the new baseline')
+    args = parser.parse_args()
+
+    metrics = corpus_metrics(args.corpora)
+    for program, entry in metrics.items():
+        if 'error' in entry:
+            print(f"{program}: not compiled ({entry['error']})")
+        else:
+            print(f"{program}: " + ", ".join(f"{metric} {entry[metric]}" for metric in COST_METRICS))
+    print("total: " + ", ".join(f"{metric} {value}" for metric, value in totals(metrics).items()))
+
+    if args.update:
+        with open(args.baseline, 'w') as f:
+            json.dump(metrics, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions, improvements = compare(metrics, baseline)
+    for program, metric, old, new in improvements:
+        print(f"IMPROVED {program} {metric}: {old} → {new} (record with --update)")
+    for program, metric, old, new in regressions:
+        print(f"REGRESSION {program} {metric}: {old} → {new}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Differential testing against gcc: compiles a program natively and with the
+CMa compiler, runs both and compares main's return value (the native exit
+status, so results are taken modulo 256).
+
+Native results are cached on disk, keyed by the sha256 of the source, the
+gcc version and the gcc flags, so a repeated run only compiles and runs the
+CMa side. Every check works in its own temporary directory and the VM runs
+quietly, so checks can run in parallel (pytest -n auto with pytest-xdist,
+or this module's command line, which uses a process pool).
+
+Each check returns a result dict with the native and CMa values, whether
+the native one came from the cache, and the time of every step
+(gcc_compile, gcc_run, cma_compile, cma_run).
+
+Usage:
+    python tests/utils/differential.py tests/resources [more.c ...] [-j N] [--no-cache] [-O LEVEL]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from multiprocessing import Pool
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+
+GCC_FLAGS = ('-w',)
+
+_gcc_version = None
+
+
+def default_cache_directory():
+    """$CLIKE_NATIVE_CACHE_DIR, else native/ under the compilation cache directory."""
+    from src.cache import default_directory
+    return os.environ.get('CLIKE_NATIVE_CACHE_DIR') or os.path.join(default_directory(), 'native')
+
+
+def gcc_version():
+    """`gcc --version` first line, computed once per process."""
+    global _gcc_version
+    if _gcc_version is None:
+        output = subprocess.run(['gcc', '--version'], stdout=subprocess.PIPE, text=True, check=True).stdout
+        _gcc_version = output.splitlines()[0]
+    return _gcc_version
+
+
+class NativeCache:
+    """Exit statuses of natively compiled programs, one JSON file per key."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_directory()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(source):
+        digest = hashlib.sha256()
+        digest.update(f"{gcc_version()}\0{' '.join(GCC_FLAGS)}\0".encode('utf-8'))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)['returncode']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, returncode):
+        path = self._path(key)
+        temp = f"{path}.tmp{os.getpid()}"
+        with open(temp, 'w') as f:
+            json.dump({'returncode': returncode}, f)
+        os.replace(temp, path)  # Parallel checks may write the same key
+
+
+def run_native(source_path, workdir, timings):
+    """Compiles and runs with gcc in `workdir`; returns the exit status, or None if gcc fails."""
+    executable = os.path.join(workdir, 'native.out')
+    start = time.perf_counter()
+    compiled = subprocess.run(['gcc', *GCC_FLAGS, source_path, '-o', executable],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    timings['gcc_compile'] = time.perf_counter() - start
+    if compiled.returncode != 0:
+        print(f"❌ Compilation failed for {source_path}:\n{compiled.stderr}")
+        return None
+    start = time.perf_counter()
+    returncode = subprocess.run([executable], stdout=subprocess.PIPE, stderr=subprocess.PIPE).returncode
+    timings['gcc_run'] = time.perf_counter() - start
+    return returncode
+
+
+def run_cma(source_path, workdir, timings, opt_level=0):
+    """Compiles with compile_file into `workdir` and runs the .cma on a quiet VM."""
+    from compiler import compile_file
+    from src.passes import PassManager
+    output = os.path.join(workdir, 'program.cma')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # The pipeline reports on stdout
+        compiled = compile_file(source_path, output, optimizer=PassManager(opt_level) if opt_level else None)
+    timings['cma_compile'] = time.perf_counter() - start
+    if not compiled:
+        return None
+    start = time.perf_counter()
+    vm = CMaInstructionProcessor()
+    vm.load_instructions(CMaProgramParser().parse_file(output), verify=True)
+    vm.run()
+    timings['cma_run'] = time.perf_counter() - start
+    return vm.return_value
+
+
+def check(source_path, workdir=None, cache=None, opt_level=0):
+    """
+    Differential check of one program. workdir defaults to a fresh
+    temporary directory; cache is a NativeCache or None to always run gcc;
+    opt_level is the CMa compiler's optimization level.
+    """
+    if workdir is None:
+        with tempfile.TemporaryDirectory(prefix='clike_diff_') as workdir:
+            return check(source_path, workdir, cache, opt_level)
+    timings = {}
+    result = {'source': source_path, 'native': None, 'cma': None, 'cached': False, 'timings': timings}
+    with open(source_path, 'rb') as f:
+        source = f.read()
+
+    key = None
+    if cache is not None:
+        key = cache.key(source)
+        result['native'] = cache.get(key)
+        result['cached'] = result['native'] is not None
+    if result['native'] is None:
+        result['native'] = run_native(source_path, workdir, timings)
+        if cache is not None and result['native'] is not None:
+            cache.put(key, result['native'])
+
+    result['cma'] = run_cma(source_path, workdir, timings, opt_level)
+    # Native exit statuses are 8 bits
+    result['match'] = (result['native'] is not None and result['cma'] is not None
+                       and result['native'] == result['cma'] % 256)
+    return result
+
+
+def _check_task(task):
+    source_path, cache_directory, opt_level = task
+    return check(source_path, cache=NativeCache(cache_directory) if cache_directory else None, opt_level=opt_level)
+
+
+def collect_sources(paths):
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.c')))
+        else:
+            sources.append(path)
+    return sources
+
+
+def format_timings(timings):
+    return ', '.join(f"{name} {seconds * 1e3:.1f}ms" for name, seconds in timings.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Differential testing of the CMa compiler against gcc')
+    parser.add_argument('paths', nargs='+', help='C sources or directories of them')
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Always compile and run natively')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0, help='Optimization level of the CMa compiler')
+    parser.add_argument('--cache-dir', help='Native result cache (default: $CLIKE_NATIVE_CACHE_DIR or <compilation cache>/native)')
+    args = parser.parse_args()
+
+    cache_directory = None if args.no_cache else NativeCache(args.cache_dir).directory
+    tasks = [(path, cache_directory, args.opt_level) for path in collect_sources(args.paths)]
+    start = time.perf_counter()
+    failures = 0
+    with Pool(args.jobs) as pool:
+        for result in pool.imap_unordered(_check_task, tasks):
+            failures += not result['match']
+            status = '✅' if result['match'] else '❌'
+            native = f"{result['native']}{' (cached)' if result['cached'] else ''}"
+            print(f"{status} {result['source']}: native {native}, cma {result['cma']} [{format_timings(result['timings'])}]")
+    print(f"{len(tasks) - failures}/{len(tasks)} matched in {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
 import sys
-import subprocess
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
-from tests.utils.cma_parser import CMaProgramParser
-from tests.utils.cma_instruction import CMaInstructionProcessor
+from src.vm.cma_parser import CMaProgramParser
+from src.vm.cma_instruction import CMaInstructionProcessor
+from tests.utils.differential import run_native
 
 """
 Note: The returncode returns the value as the program's exit code, 
@@ -13,43 +14,16 @@ Any number outside this range is undefined (will wrap around)
 All test output should be < 255
 """
 def compile_and_run_c_program(c_file_path):
-    # Get filename without extension
-    base_name = os.path.splitext(os.path.basename(c_file_path))[0]
-    output_exe = f"{base_name}.out"
-
-    # Compile the C file
-    compile_process = subprocess.run(
-        ["gcc", c_file_path, "-o", output_exe],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-
-    if compile_process.returncode != 0:
-        print(f"❌ Compilation failed for {c_file_path}:\n{compile_process.stderr}")
-        return None
-
-    # Run the executable
-    run_process = subprocess.run(
-        [f"./{output_exe}"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-
-    # Clean up
-    os.remove(output_exe)
-
-    return run_process.returncode  # Value returned from main()
-
-def run_cma_program(cma_file_path):
-    with open(cma_file_path, "r") as f:
-        raw_program = f.read()
+    # Build in a private temporary directory, so runs can happen in parallel
+    with tempfile.TemporaryDirectory(prefix="clike_native_") as workdir:
+        return run_native(c_file_path, workdir, {})  # Value returned from main()
 
+def run_cma_program(cma_file_path, verbose=False):
     parser = CMaProgramParser()
-    instructions = parser.parse_string(raw_program)
+    instructions = parser.parse_file(cma_file_path)
 
-    vm = CMaInstructionProcessor(verbose=True)
-    vm.load_instructions(instructions)
+    vm = CMaInstructionProcessor(verbose=verbose)
+    vm.load_instructions(instructions, verify=True)
     vm.run()
 
     return vm.return_value